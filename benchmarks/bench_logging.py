@@ -0,0 +1,73 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : bench_logging.py
+# Time       : 2025-04-17 10:48:05
+# Author     : lyx
+# version    : python 3.11
+# Description: 调试日志基准测试: f-string(改造前) 对比 lazy 延迟格式化
+
+运行: python benchmarks/bench_logging.py [--rounds 2000]
+日志对象为视图返回的 ResponseSchema(1000 行数据)。INFO 级别(生产环境)下 lazy 只有函数调用的开销,
+DEBUG 级别下 lazy 会截断过长的输出。
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_util
+
+bench_util.setup_project(DEBUG=False)
+
+from faplus.logging import lazy
+from faplus.utils import Response
+
+logger = logging.getLogger("bench.logging")
+logger.propagate = False
+
+
+class FormatHandler(logging.Handler):
+    """只格式化不输出, 用于统计格式化的开销"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.format(record)
+
+
+logger.addHandler(FormatHandler())
+
+
+def make_result(size: int):
+    now = datetime.datetime(2025, 4, 17, 10, 48, 5)
+    rows = [{"id": i, "name": f"user_{i}", "nickname": "用户" + str(i), "created_at": now} for i in range(size)]
+    return Response.ok(data={"rows": rows})
+
+
+def main(rounds: int):
+    result = make_result(1000)
+
+    def fstring():
+        logger.debug(f"result: {result}")
+
+    def lazy_str():
+        logger.debug("result: %s", lazy(result))
+
+    rows = []
+    for level in (logging.INFO, logging.DEBUG):
+        logger.setLevel(level)
+        name = logging.getLevelName(level)
+        n = rounds if level == logging.INFO else max(10, rounds // 20)
+        rows.append((f"f-string, level {name}", bench_util.measure(fstring, n, warmup=min(n, 200))))
+        rows.append((f"lazy, level {name}", bench_util.measure(lazy_str, n, warmup=min(n, 200))))
+
+    bench_util.report("logger.debug(result), ResponseSchema with 1000 rows", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=2000)
+    main(parser.parse_args().rounds)
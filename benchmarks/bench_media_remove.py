@@ -0,0 +1,112 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : bench_media_remove.py
+# Time       : 2025-04-24 15:06:42
+# Author     : lyx
+# version    : python 3.11
+# Description: 批量删除文件基准测试: 逐条查询删除(改造前) 对比 MediaManager.remove
+
+运行: python benchmarks/bench_media_remove.py [--files 10000] [--rounds 3]
+数据库为 sqlite 内存库, 每 10 条记录中有 1 条与其他记录共用同一个文件(删除后文件仍被引用)。
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_util
+
+bench_util.setup_project(DEBUG=False)
+
+from tortoise import Tortoise
+
+from faplus.media.media_manager import MediaManager, media_delete_opens
+from faplus.media.models import FileRecord
+from faplus.media.utils import file_util
+
+
+class LegacyMediaManager(MediaManager):
+    """改造前的 remove: 每条记录两次 count、逐个删除文件、逐条删除记录"""
+
+    async def remove(self, sn_lst):
+        file_data_lst = await FileRecord.filter(sn__in=sn_lst).values("file_path", "file_hash", "sn", "original_name")
+        rst = []
+        for item in file_data_lst:
+            file_path, file_hash, sn, original_name = (
+                item["file_path"], item["file_hash"], item["sn"], item["original_name"]
+            )
+            manager = FileRecord.filter(file_path=file_path, file_hash=file_hash)
+            await manager.count()
+            if await manager.count() == 1:
+                await self.delete_manager.delete(file_path, file_hash, original_name)
+            await manager.filter(sn=sn).delete()
+            rst.append(sn)
+        return rst
+
+
+async def prepare(media_dir: str, n: int) -> list[str]:
+    """生成 n 条记录和对应的文件, 返回需要删除的 sn"""
+    await FileRecord.all().delete()
+    shutil.rmtree(media_dir, ignore_errors=True)
+    os.makedirs(media_dir)
+
+    sn_lst = await file_util.generate_sns(n)
+    keep_sns = iter(await file_util.generate_sns((n + 9) // 10))
+    records = []
+    for idx, sn in enumerate(sn_lst):
+        file_hash = f"{idx:064x}"
+        name = f"file_{idx}.bin"
+        with open(os.path.join(media_dir, f"{file_hash}_{name}"), "wb") as f:
+            f.write(b"x" * 64)
+        records.append(FileRecord(original_name=name, sn=sn, file_hash=file_hash, file_path=media_dir, file_type="bin"))
+        if idx % 10 == 0:  # 共用文件的记录, 不删除
+            records.append(FileRecord(
+                original_name=name, sn=next(keep_sns), file_hash=file_hash, file_path=media_dir, file_type="bin"
+            ))
+    await FileRecord.bulk_create(records, batch_size=1000)
+    return sn_lst
+
+
+async def run(manager_cls: type, media_dir: str, backup_dir: str, n: int) -> float:
+    sn_lst = await prepare(media_dir, n)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    start = time.perf_counter()
+    async with manager_cls(media_delete_opens, back_dir=backup_dir) as manager:
+        removed = await manager.remove(sn_lst)
+    elapsed = time.perf_counter() - start
+
+    assert len(removed) == n, len(removed)
+    assert await FileRecord.all().count() == (n + 9) // 10
+    assert len(os.listdir(media_dir)) == (n + 9) // 10
+    return elapsed
+
+
+async def main(n: int, rounds: int):
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["faplus.media.models"]})
+    await Tortoise.generate_schemas()
+    root = tempfile.mkdtemp(prefix="faplus_media_")
+    media_dir, backup_dir = os.path.join(root, "media"), os.path.join(root, "backup")
+    try:
+        print(f"\nMediaManager.remove, {n} files, {rounds} rounds")
+        print(f"{'case':<36}{'best(ms)':>12}{'mean(ms)':>12}")
+        for name, manager_cls in (("legacy (per-record)", LegacyMediaManager), ("set-based", MediaManager)):
+            samples = [await run(manager_cls, media_dir, backup_dir, n) * 1e3 for _ in range(rounds)]
+            print(f"{name:<36}{min(samples):>12.1f}{sum(samples) / len(samples):>12.1f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.files, args.rounds))
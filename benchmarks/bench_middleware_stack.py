@@ -0,0 +1,143 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : bench_middleware_stack.py
+# Time       : 2025-04-02 14:48:10
+# Author     : lyx
+# version    : python 3.11
+# Description: 中间件栈基准测试: BaseHTTPMiddleware(改造前) 对比 纯ASGI(改造后) 对比 融合管道
+
+运行: python benchmarks/bench_middleware_stack.py [--rounds 5000]
+两个栈使用相同的中间件顺序与相同的业务逻辑, 只有调用方式不同。
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_util
+
+bench_util.setup_project(DEBUG=False, FAP_JWT_WHITES=["/bench/public"])
+
+from fastapi import Request, Response
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.status import HTTP_200_OK, HTTP_422_UNPROCESSABLE_ENTITY
+
+from faplus.applications import FastApiPlusApplication
+from faplus.core import settings
+from faplus.utils import app_util, token_util, Response as ApiResponse
+from faplus.middlewares import error_status_code_middleware, fused_pipeline
+
+
+# region ******************** 改造前的 BaseHTTPMiddleware 实现 start ******************** #
+class LegacyAdapter(BaseHTTPMiddleware):
+    """用 BaseHTTPMiddleware 调用 process_request, 还原改造前的调用方式"""
+
+    def __init__(self, app, middleware_cls):
+        super().__init__(app)
+        self.middleware = middleware_cls(app)
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        if not self.middleware.match(request.url.path):
+            return await call_next(request)
+        response = await self.middleware.process_request(request)
+        if response is not None:
+            return response
+        return await call_next(request)
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        if settings.DEBUG:
+            with app_util.Timer(f"{request.method} {request.url.path}"):
+                return await call_next(request)
+        return await call_next(request)
+
+
+class LegacyErrorStatusCodeMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        res = await call_next(request)
+        if res.status_code in [HTTP_200_OK, HTTP_422_UNPROCESSABLE_ENTITY]:
+            return res
+        return error_status_code_middleware.error_response(res.status_code)
+
+
+class LegacyExceptionToJsonResponseMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        try:
+            return await call_next(request)
+        except ResponseValidationError as e:
+            return JSONResponse(status_code=HTTP_422_UNPROCESSABLE_ENTITY, content={"detail": e.errors()})
+        except Exception:
+            return Response(ApiResponse.fail("500", "服务器错误").json(), headers={"Content-Type": "application/json"})
+
+
+LEGACY_WRAPPERS = {
+    "LoggingMiddleware": LegacyLoggingMiddleware,
+    "ErrorStatusCodeMiddleware": LegacyErrorStatusCodeMiddleware,
+    "ExceptionToJsonResponseMiddleware": LegacyExceptionToJsonResponseMiddleware,
+}
+# endregion ****************** 改造前的 BaseHTTPMiddleware 实现 end ********************* #
+
+
+def add_routes(app):
+    @app.get("/bench/public")
+    async def public():
+        return {"code": "0", "msg": None, "data": {"ok": True}}
+
+    @app.get("/bench/private")
+    async def private(request: Request):
+        return {"code": "0", "msg": None, "data": {"uid": request.state.uid}}
+
+
+def build_app(mode: str):
+    fap = FastApiPlusApplication()
+    fap.load()
+    app = fap.app
+    add_routes(app)
+    items = []
+    for middleware in settings.FAP_MIDDLEWARE_CLASSES:
+        module_name, class_name = middleware.rsplit(".", 1)
+        middleware_cls = getattr(importlib.import_module(module_name), class_name)
+        if mode != "legacy":
+            items.append((middleware_cls, None))
+        elif class_name in LEGACY_WRAPPERS:
+            items.append((LEGACY_WRAPPERS[class_name], None))
+        else:
+            items.append((LegacyAdapter, {"middleware_cls": middleware_cls}))
+    if mode == "fused":
+        items = fused_pipeline.fuse(items)
+    for middleware_cls, kwargs in items:
+        app.add_middleware(middleware_cls, **(kwargs or {}))
+    return app
+
+
+async def main(rounds: int):
+    token = await token_util.create_token({"username": "guest_0", "is_gest": True})
+    auth_headers = [(b"cookie", f"{settings.FAP_TOKEN_TAG}={token}".encode())]
+
+    rows = []
+    for name, mode in (("BaseHTTPMiddleware", "legacy"), ("pure ASGI", "asgi"), ("fused pipeline", "fused")):
+        app = build_app(mode)
+        status, body = await bench_util.asgi_request(app, "/bench/private", headers=auth_headers)
+        assert status == 200 and b'"uid":"g0"' in body, (name, body)
+
+        rows.append((f"{name} /bench/public", await bench_util.measure_async(
+            lambda: bench_util.asgi_request(app, "/bench/public"), rounds)))
+        rows.append((f"{name} /bench/private", await bench_util.measure_async(
+            lambda: bench_util.asgi_request(app, "/bench/private", headers=auth_headers), rounds)))
+
+    depth = len(settings.FAP_MIDDLEWARE_CLASSES)
+    bench_util.report(f"middleware stack, {depth} middlewares, {rounds} rounds", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5000)
+    asyncio.run(main(parser.parse_args().rounds))
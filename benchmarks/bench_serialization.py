@@ -0,0 +1,113 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : bench_serialization.py
+# Time       : 2025-04-16 14:05:52
+# Author     : lyx
+# version    : python 3.11
+# Description: 响应序列化基准测试: ResponseSchema + response_model 校验(改造前) 对比 快速json响应
+
+运行: python benchmarks/bench_serialization.py [--rounds 500]
+两个视图返回相同的数据, 路由配置与 router_loader 一致, 只有 fast_json_response 不同。
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+from typing import Union
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_util
+
+bench_util.setup_project(DEBUG=False)
+
+from fastapi import FastAPI, Request
+
+from faplus.schema import ResponseSchema, ErrorResponseSchema
+from faplus.utils import json_util
+from faplus.view import GetView
+
+SIZES = (10, 1000, 10000)
+
+
+def make_rows(size: int) -> dict:
+    now = datetime.datetime(2025, 4, 16, 14, 5, 52)
+    return {
+        "rows": [
+            {
+                "id": i,
+                "name": f"user_{i}",
+                "nickname": "用户" + str(i),
+                "score": i * 0.5,
+                "is_active": i % 2 == 0,
+                "created_at": now,
+                "tags": ["a", "b", "c"],
+            }
+            for i in range(size)
+        ]
+    }
+
+
+PAYLOADS = {size: make_rows(size) for size in SIZES}
+
+
+class SlowView(GetView):
+    fast_json_response = False
+
+    @staticmethod
+    async def api(request: Request, size: int = 10):
+        return PAYLOADS[size]
+
+
+class FastView(GetView):
+    fast_json_response = True
+
+    @staticmethod
+    async def api(request: Request, size: int = 10):
+        return PAYLOADS[size]
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    for path, view in (("/bench/slow", SlowView), ("/bench/fast", FastView)):
+        app.add_api_route(
+            path,
+            endpoint=view.api,
+            methods=view.methods,
+            response_model=Union[view.response_model, ErrorResponseSchema],
+        )
+    return app
+
+
+async def request(app: FastAPI, path: str, size: int) -> bytes:
+    status, body = await bench_util.asgi_request(app, path, query_string=f"size={size}".encode())
+    assert status == 200, body
+    return body
+
+
+async def main(rounds: int):
+    app = build_app()
+    print(f"json backend: {'orjson' if json_util.orjson else 'json'}")
+
+    rows = []
+    for size in SIZES:
+        slow = await request(app, "/bench/slow", size)
+        fast = await request(app, "/bench/fast", size)
+        assert slow == fast, (size, slow[:200], fast[:200])
+
+        n = max(10, rounds // max(1, size // 100))
+        rows.append((f"ResponseSchema {size} rows", await bench_util.measure_async(
+            lambda: request(app, "/bench/slow", size), n, warmup=min(n, 20))))
+        rows.append((f"fast json {size} rows", await bench_util.measure_async(
+            lambda: request(app, "/bench/fast", size), n, warmup=min(n, 20))))
+
+    bench_util.report("response serialization (view -> bytes)", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=500)
+    asyncio.run(main(parser.parse_args().rounds))
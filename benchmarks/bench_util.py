@@ -0,0 +1,129 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : bench_util.py
+# Time       : 2025-04-02 14:20:31
+# Author     : lyx
+# version    : python 3.11
+# Description: 基准测试公共工具: 生成临时项目, 直接驱动ASGI应用, 统计延迟分位数
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Callable
+
+
+def setup_project(**overrides) -> str:
+    """在临时目录中生成一个faplus项目, 并将overrides写入config.py(config优先级最高)
+
+    必须在导入 faplus.core 之前调用
+    :return: 项目根目录
+    """
+    from faplus.cli import generate_project
+
+    root = tempfile.mkdtemp(prefix="faplus_bench_")
+    generate_project.startproject(root, "bench")
+    overrides.setdefault(
+        "FAP_CACHE_CONFIG",
+        {"default": {"BACKEND": "faplus.cache.backends.menory_cache.MemoryCache", "PREFIX": "bench:"}},
+    )
+    overrides.setdefault("LOG_LEVEL", "WARNING")
+    overrides.setdefault("FAP_ACCESS_LOG", False)
+    overrides.setdefault("LOG_DIR", os.path.join(root, "logs"))
+    with open(os.path.join(root, "config.py"), "a", encoding="utf-8") as f:
+        f.write("\n")
+        for key, value in overrides.items():
+            f.write(f"{key} = {value!r}\n")
+
+    os.chdir(root)
+    sys.path.insert(0, root)
+    os.environ["FAP_SETTINGS_MODULE"] = "bench.settings"
+    return root
+
+
+async def asgi_request(
+    app, path: str, method: str = "GET", headers: list = None, body: bytes = b"", query_string: bytes = b""
+) -> tuple[int, bytes]:
+    """不经过网络, 直接调用ASGI应用
+
+    :return: (状态码, 响应体)
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string,
+        "root_path": "",
+        "headers": headers or [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8848),
+    }
+    done = asyncio.Event()
+    request_sent = False
+    status = 0
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+async def measure_async(func: Callable, rounds: int, warmup: int = 200) -> list[float]:
+    """多次执行协程函数, 返回每次耗时(微秒)"""
+    for _ in range(warmup):
+        await func()
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def measure(func: Callable, rounds: int, warmup: int = 200) -> list[float]:
+    """多次执行同步函数, 返回每次耗时(微秒)"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def report(title: str, rows: list[tuple[str, list[float]]]) -> None:
+    """打印 p50/p99/mean (微秒)"""
+    print(f"\n{title}")
+    print(f"{'case':<36}{'p50(us)':>12}{'p99(us)':>12}{'mean(us)':>12}")
+    for name, samples in rows:
+        mean = sum(samples) / len(samples)
+        print(f"{name:<36}{percentile(samples, 50):>12.1f}{percentile(samples, 99):>12.1f}{mean:>12.1f}")
@@ -94,6 +94,7 @@ class FastApiPlusApplication(object):
     def middleware_register(self, app: FastAPI):
         """中间件注册"""
         middlewares: list[Union[str, Tuple[str, dict]]] = settings.FAP_MIDDLEWARE_CLASSES
+        middleware_items = []
         for middleware in middlewares:
 
             if isinstance(middleware, str):
@@ -108,7 +109,14 @@ class FastApiPlusApplication(object):
             module = importlib.import_module(module_name)
             middleware_cls = getattr(module, class_name, None)
             assert middleware_cls, f"middleware {middleware} is not found"
+            middleware_items.append((middleware_cls, kwargs))
 
+        # 融合请求管道
+        if settings.FAP_FUSED_PIPELINE:
+            from .middlewares import fused_pipeline
+            middleware_items = fused_pipeline.fuse(middleware_items)
+
+        for middleware_cls, kwargs in middleware_items:
             if kwargs:
                 app.add_middleware(middleware_cls, **kwargs)
             else:
@@ -10,18 +10,19 @@
 
 import base64
 import logging
-from typing import Union, Callable, Dict
+from typing import Union, Callable, Dict, Optional
 import json
 from fastapi import Request, Response
 from fastapi.exceptions import HTTPException
 from fastapi.responses import RedirectResponse
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.responses import JSONResponse
 from starlette.status import HTTP_401_UNAUTHORIZED
 
 from faplus.utils import settings, token_util
 from faplus.auth.utils import guest_util
+from faplus.utils.path_util import path_classifier, PathCategoryEnum
 from faplus import const as faplus_const
+from faplus.middlewares.base_middleware import BaseMiddleware
 
 logger = logging.getLogger(__package__)
 TokenSourceEnum = faplus_const.TokenSourceEnum
@@ -86,15 +87,11 @@ token_handle = _token_handle()
     
 
 
-class GuestUserLoginMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        # 获取url
-        path = request.url.path
-        if not path.endswith(FAP_GEST_USERS_LOGIN_URL):
-            return await call_next(request)
+class GuestUserLoginMiddleware(BaseMiddleware):
+    def match(self, path: str) -> bool:
+        return PathCategoryEnum.guest_login in path_classifier.classify(path)
 
+    async def process_request(self, request: Request) -> Optional[Response]:
         # 提取Authorization头部
         auth_header = request.headers.get("Authorization")
         if not auth_header:
@@ -29,17 +29,26 @@ FAP_GUEST_USER_DICT = {user.username: user for user in FAP_GUEST_USERS}
 logger = logging.getLogger(__package__)
 
 
-async def get_user_info(**kwargs):
-    """查询用户信息, 会自动加解密以及缓存数据"""
-    if "id" in kwargs:  # 如果携带了id，就先用id去缓存中差
-        encrypt_data = await cache.get(const.USER_CK.format(uid=kwargs["id"]))
-        if encrypt_data:
-            user_str = crypto_util.secure_decrypt(encrypt_data)  # 数据解密
-            return json.loads(user_str)
+async def _query_user(**kwargs) -> User:
     user = await User.filter(**kwargs, is_active=True, is_delete=False).first()
     if not user:
         raise FAPStatusCodeException(StatusCodeEnum.用户不存在)
+    return user
+
+
+async def get_user_info(**kwargs):
+    """查询用户信息, 会自动加解密以及缓存数据"""
+    if "id" in kwargs:  # 如果携带了id，就先用id去缓存中查, 并发的缓存未命中只查询一次数据库
+
+        async def loader():
+            user = await _query_user(**kwargs)
+            return crypto_util.secure_encrypt(json.dumps(UserSchema.from_orm(user).dict()))
 
+        encrypt_data = await cache.get_or_set(const.USER_CK.format(uid=kwargs["id"]), loader)
+        user_str = crypto_util.secure_decrypt(encrypt_data)  # 数据解密
+        return json.loads(user_str)
+
+    user = await _query_user(**kwargs)
     user_dict = UserSchema.from_orm(user).dict()
     encrypt_data = crypto_util.secure_encrypt(json.dumps(user_dict))
     await cache.set(const.USER_CK.format(uid=user.id), encrypt_data)
@@ -47,6 +56,37 @@ async def get_user_info(**kwargs):
     return user_dict
 
 
+async def get_user_infos(uids: list[int]) -> dict[int, dict]:
+    """批量查询用户信息, 缓存一次批量读取, 未命中的用户一次查询数据库并批量写回缓存
+
+    :param uids: 用户id列表
+    :return: {用户id: 用户信息}, 不存在的用户不包含在结果中
+    """
+    uids = list(dict.fromkeys(uids))
+    if not uids:
+        return {}
+    cached = await cache.get_many([const.USER_CK.format(uid=uid) for uid in uids])
+
+    user_infos = {}
+    missing = []
+    for uid in uids:
+        encrypt_data = cached.get(const.USER_CK.format(uid=uid))
+        if encrypt_data:
+            user_infos[uid] = json.loads(crypto_util.secure_decrypt(encrypt_data))
+        else:
+            missing.append(uid)
+
+    if missing:
+        mapping = {}
+        for user in await User.filter(id__in=missing, is_active=True, is_delete=False):
+            user_dict = UserSchema.from_orm(user).dict()
+            user_infos[user.id] = user_dict
+            mapping[const.USER_CK.format(uid=user.id)] = crypto_util.secure_encrypt(json.dumps(user_dict))
+        await cache.set_many(mapping)
+
+    return user_infos
+
+
 async def authenticate_user(username: str, password: str, **kwargs) -> dict:
     try:
         db_password = crypto_util.enc_pwd(password)
@@ -8,7 +8,6 @@ Description: 登录视图
 """
 from fastapi import Body, Request
 
-from faplus import const
 from faplus.utils import StatusCodeEnum
 from faplus.cache import cache
 from faplus.view import PostView, ViewStatusEnum
@@ -35,16 +34,18 @@ class View(PostView):
 
         uid = user_dict["id"]
 
-        # 失效之前登录的token
         otk = await cache.get(auth_const.USER_TOKEN_CK.format(uid=uid))
-        if otk:
-            await cache.delete(const.ACTIVATE_TOKEN_CK.format(tk=otk))
 
-        # 创建token
-        payload = {"uid": uid}
-        token = await token_util.create_token(payload)
+        async with cache.pipeline() as p:
+            # 失效之前登录的token
+            if otk:
+                await token_util.revoke_token(otk, pipe=p)
 
-        # 重新设置token
-        await cache.set(auth_const.USER_TOKEN_CK.format(uid=uid), token)
+            # 创建token
+            payload = {"uid": uid}
+            token = await token_util.create_token(payload, pipe=p)
+
+            # 重新设置token
+            p.set(auth_const.USER_TOKEN_CK.format(uid=uid), token)
 
         return {"token": token, "user": user_dict}
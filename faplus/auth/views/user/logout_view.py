@@ -10,6 +10,7 @@ from faplus import const
 from faplus.auth import const as auth_const
 from faplus.cache import cache
 from faplus.utils import time_util
+from faplus.utils.principal_util import principal_cache
 
 logger = logging.getLogger(__package__)
 
@@ -27,6 +28,7 @@ class View(PostView):
     ):
         user_id = request.state.uid
         await cache.delete(auth_const.USER_CK.format(uid=user_id))
+        principal_cache.invalidate_uid(user_id)
         
         
         if FAP_TOKEN_SOURCE == TokenSourceEnum.Cookie:
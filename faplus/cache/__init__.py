@@ -1 +1,2 @@
-from .cache_manager import cache
\ No newline at end of file
+from .cache_manager import cache
+from .decorators import cached, invalidate_tag
@@ -7,15 +7,145 @@ Date: 2024/11/26 16:44:45
 Description: 内存缓存实现类
 """
 
-import asyncio
+import bisect
+import heapq
+import sys
 import time
+from collections import OrderedDict
 from typing import Any, Optional
 
-from faplus.cache.base_cache import BaseCache, FAP_CACHE_DEFAULT_EXPIRE
+from faplus.cache.base_cache import BaseCache, FAP_CACHE_DEFAULT_EXPIRE, expire_of
+
+
+class _Entry(object):
+    """缓存条目"""
+
+    __slots__ = ("value", "expire_at", "size")
+
+    def __init__(self, value: Any, expire_at: Optional[float], size: int) -> None:
+        self.value = value
+        self.expire_at = expire_at  # time.monotonic() 时间, None 表示永久有效
+        self.size = size
+
+
+def _sizeof(key: str, value: Any) -> int:
+    """估算条目占用的字节数"""
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class _SortedKeys(object):
+    """分块有序列表
+
+    键按顺序分布在多个长度不超过 2 * LOAD 的子列表中，另外记录每个子列表的最大键。
+    插入、删除只移动一个子列表内的元素，耗时 O(log n + LOAD)，不随键数量线性增长。
+    """
+
+    __slots__ = ("_lists", "_maxes")
+
+    LOAD = 512
+
+    def __init__(self) -> None:
+        self._lists: list[list[str]] = []
+        self._maxes: list[str] = []
+
+    def add(self, key: str) -> None:
+        """插入不存在的键"""
+        lists, maxes = self._lists, self._maxes
+        if not maxes:
+            lists.append([key])
+            maxes.append(key)
+            return
+
+        i = bisect.bisect_left(maxes, key)
+        if i == len(maxes):  # 比所有键都大, 追加到最后一个子列表
+            i -= 1
+            lists[i].append(key)
+            maxes[i] = key
+        else:
+            bisect.insort(lists[i], key)
+
+        sub = lists[i]
+        if len(sub) > 2 * self.LOAD:  # 拆分过长的子列表
+            half = sub[self.LOAD:]
+            del sub[self.LOAD:]
+            maxes[i] = sub[-1]
+            lists.insert(i + 1, half)
+            maxes.insert(i + 1, half[-1])
+
+    def discard(self, key: str) -> None:
+        """删除键, 不存在时忽略"""
+        lists, maxes = self._lists, self._maxes
+        i = bisect.bisect_left(maxes, key)
+        if i == len(maxes):
+            return
+        sub = lists[i]
+        j = bisect.bisect_left(sub, key)
+        if j == len(sub) or sub[j] != key:
+            return
+        del sub[j]
+        if not sub:
+            del lists[i]
+            del maxes[i]
+        elif j == len(sub):
+            maxes[i] = sub[-1]
+
+    def prefix(self, prefix: str) -> list[str]:
+        """以 prefix 开头的键, 耗时 O(log n + 结果数量)"""
+        result = []
+        lists = self._lists
+        for i in range(bisect.bisect_left(self._maxes, prefix), len(lists)):
+            sub = lists[i]
+            for j in range(bisect.bisect_left(sub, prefix), len(sub)):
+                key = sub[j]
+                if not key.startswith(prefix):
+                    return result
+                result.append(key)
+        return result
+
+    def pop_prefix(self, prefix: str) -> list[str]:
+        """删除并返回以 prefix 开头的键"""
+        result = []
+        lists, maxes = self._lists, self._maxes
+        i = bisect.bisect_left(maxes, prefix)
+        while i < len(lists):
+            sub = lists[i]
+            start = end = bisect.bisect_left(sub, prefix)
+            while end < len(sub) and sub[end].startswith(prefix):
+                end += 1
+            finished = end < len(sub)  # 遇到了不匹配的键
+            result.extend(sub[start:end])
+            del sub[start:end]
+            if sub:
+                maxes[i] = sub[-1]
+                i += 1
+            else:
+                del lists[i]
+                del maxes[i]
+            if finished:
+                break
+        return result
+
+    def clear(self) -> None:
+        self._lists.clear()
+        self._maxes.clear()
+
+    def __len__(self) -> int:
+        return sum(len(sub) for sub in self._lists)
 
 
 class MemoryCache(BaseCache):
-    """基于内存的缓存实现"""
+    """基于内存的缓存实现
+
+    所有操作都在事件循环线程内同步完成(中间没有 await)，因此不需要加锁。
+    过期时间保存在最小堆中，每次写入时顺带清理一小批过期条目，读取时也会惰性检查过期；
+    配置了 MAX_ENTRIES / MAX_BYTES 时, 超出后按 LRU 淘汰(token 等数据也保存在缓存中, 默认不限制)。
+    所有键另外保存在分块有序列表中，按前缀查询、删除时二分定位，耗时与结果数量成正比。
+
+    OPTIONS:
+        MAX_ENTRIES: 最大条目数, 默认 None 不限制
+        MAX_BYTES: 最大占用字节数(估算), 默认 None 不限制
+        SWEEP_BATCH: 每次写入最多清理的过期条目数, 默认 64
+    """
 
     def __init__(self, cache_config: dict):
         """
@@ -23,8 +153,94 @@ class MemoryCache(BaseCache):
         :param cache_config: 缓存配置，包含前缀等
         """
         super().__init__(cache_config)
-        self._store = {}  # 内存缓存存储
-        self._lock = asyncio.Lock()  # 异步锁，确保线程安全
+        options = cache_config.get("OPTIONS") or {}
+        self.max_entries: Optional[int] = options.get("MAX_ENTRIES")
+        self.max_bytes: Optional[int] = options.get("MAX_BYTES")
+        self.sweep_batch: int = options.get("SWEEP_BATCH", 64)
+
+        self._store: OrderedDict[str, _Entry] = OrderedDict()  # 内存缓存存储, 按最近使用排序
+        self._expire_heap: list[tuple[float, str]] = []  # (过期时间, 键)
+        self._keys = _SortedKeys()  # 有序键索引
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # region ******************** 内部方法 start ******************** #
+    def _pop(self, key: str) -> Optional[_Entry]:
+        entry = self._store.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+            self._keys.discard(key)
+        return entry
+
+    def _is_expired(self, entry: _Entry, now: float) -> bool:
+        return entry.expire_at is not None and entry.expire_at <= now
+
+    def _sweep(self, limit: Optional[int] = None) -> int:
+        """清理过期条目
+
+        :param limit: 最多处理的堆元素数量, None 表示清理全部
+        :return: 清理的条目数
+        """
+        now = time.monotonic()
+        heap = self._expire_heap
+        removed = 0
+        checked = 0
+        while heap and heap[0][0] <= now and (limit is None or checked < limit):
+            expire_at, key = heapq.heappop(heap)
+            checked += 1
+            entry = self._store.get(key)
+            # 键已被删除或被重新设置过期时间时, 堆中的记录已失效
+            if entry is not None and entry.expire_at == expire_at:
+                self._pop(key)
+                removed += 1
+        self.expirations += removed
+
+        # 堆中失效记录过多时重建
+        if len(heap) > 2 * len(self._store) + 1024:
+            self._expire_heap = [
+                (entry.expire_at, key) for key, entry in self._store.items() if entry.expire_at is not None
+            ]
+            heapq.heapify(self._expire_heap)
+        return removed
+
+    def _evict(self) -> None:
+        """超过容量时淘汰最久未使用的条目"""
+        store = self._store
+        while store and (
+            (self.max_entries is not None and len(store) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(store))
+            self._pop(key)
+            self.evictions += 1
+
+    def _get_entry(self, key: str) -> Optional[_Entry]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        if self._is_expired(entry, time.monotonic()):
+            self._pop(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _set(self, key: str, value: Any, expire: Optional[int], now: float) -> None:
+        expire_at = now + expire if expire else None
+        old = self._store.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        else:
+            self._keys.add(key)
+        entry = _Entry(value, expire_at, _sizeof(key, value))
+        self._store[key] = entry
+        self._bytes += entry.size
+        if expire_at is not None:
+            heapq.heappush(self._expire_heap, (expire_at, key))
+    # endregion ****************** 内部方法 end ********************* #
 
     async def set(self, key: str, value: Any, expire: Optional[int] = FAP_CACHE_DEFAULT_EXPIRE) -> None:
         """
@@ -33,9 +249,23 @@ class MemoryCache(BaseCache):
         :param value: 缓存值
         :param expire: 过期时间（秒），None（永久有效）
         """
-        async with self._lock:
-            expire_at = time.time() + expire if expire else None
-            self._store[key] = {"value": value, "expire_at": expire_at}
+        self._set(key, value, expire, time.monotonic())
+        self._sweep(self.sweep_batch)
+        self._evict()
+
+    async def set_many(
+        self, mapping: dict[str, Any], expire: Optional[int] | dict[str, Optional[int]] = FAP_CACHE_DEFAULT_EXPIRE
+    ) -> None:
+        """
+        批量设置缓存
+        :param mapping: {缓存键: 缓存值}
+        :param expire: 过期时间（秒），或 {缓存键: 过期时间}
+        """
+        now = time.monotonic()
+        for key, value in mapping.items():
+            self._set(key, value, expire_of(expire, key), now)
+        self._sweep(self.sweep_batch)
+        self._evict()
 
     async def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
         """
@@ -44,15 +274,31 @@ class MemoryCache(BaseCache):
         :param default: 如果键不存在返回的默认值
         :return: 缓存值或默认值
         """
-        async with self._lock:
-            data = self._store.get(key)
-            if not data:
-                return default
-            # 检查是否过期
-            if data["expire_at"] and data["expire_at"] < time.time():
-                await self.delete(key)  # 删除过期缓存
-                return default
-            return data["value"]
+        entry = self._get_entry(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._store.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """
+        批量获取缓存
+        :param keys: 缓存键列表
+        :return: {缓存键: 缓存值}, 只包含存在的键
+        """
+        result = {}
+        store = self._store
+        for key in keys:
+            entry = self._get_entry(key)
+            if entry is None:
+                self.misses += 1
+                continue
+            store.move_to_end(key)
+            self.hits += 1
+            result[key] = entry.value
+        return result
 
     async def get_keys(self, prefix: str) -> list[str]:
         """
@@ -60,27 +306,49 @@ class MemoryCache(BaseCache):
         :param prefix: 键前缀
         :return: 符合前缀的键列表
         """
-        async with self._lock:
-            return [key for key in self._store.keys() if key.startswith(prefix)]
+        now = time.monotonic()
+        store = self._store
+        return [key for key in self._keys.prefix(prefix) if not self._is_expired(store[key], now)]
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """
+        删除指定前缀的所有缓存
+        :param prefix: 键前缀
+        :return: 删除的键数量
+        """
+        keys = self._keys.pop_prefix(prefix)
+        for key in keys:
+            entry = self._store.pop(key)
+            self._bytes -= entry.size
+        return len(keys)
 
     async def delete(self, key: str | list[str]) -> None:
         """
         删除缓存
         :param key: 单个键或键列表
         """
-        async with self._lock:
-            if isinstance(key, str):
-                self._store.pop(key, None)
-            elif isinstance(key, list):
-                for k in key:
-                    self._store.pop(k, None)
+        if isinstance(key, str):
+            self._pop(key)
+        elif isinstance(key, list):
+            for k in key:
+                self._pop(k)
+
+    async def delete_many(self, keys: list[str]) -> None:
+        """
+        批量删除缓存
+        :param keys: 缓存键列表
+        """
+        for key in keys:
+            self._pop(key)
 
     async def clear(self) -> None:
         """
         清空所有缓存
         """
-        async with self._lock:
-            self._store.clear()
+        self._store.clear()
+        self._expire_heap.clear()
+        self._keys.clear()
+        self._bytes = 0
 
     async def ping(self) -> bool:
         """
@@ -88,3 +356,26 @@ class MemoryCache(BaseCache):
         :return: 总是返回 True，表示内存缓存可用
         """
         return True
+
+    async def sweep(self) -> int:
+        """
+        清理所有过期条目
+        :return: 清理的条目数
+        """
+        return self._sweep()
+
+    def stats(self) -> dict:
+        """
+        缓存统计
+        :return: 命中、未命中、淘汰、过期数以及当前容量
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._store),
+            "bytes": self._bytes,
+        }
@@ -8,15 +8,20 @@ Description: Redis 缓存实现类
 """
 import logging
 import asyncio
-from typing import Any, Optional
+import re
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
 
 from redis.asyncio import Redis
+from redis.exceptions import LockError
 from redis.asyncio.connection import ConnectionPool
 
-from faplus.cache.base_cache import BaseCache, FAP_CACHE_DEFAULT_EXPIRE
+from faplus.cache.base_cache import BaseCache, CachePipeline, FAP_CACHE_DEFAULT_EXPIRE, expire_of
 
 logger = logging.getLogger(__package__)
 
+_GLOB_SPECIAL_RE = re.compile(r"([*?\[\]\\])")
+
 
 class RedisCache(BaseCache):
     """
@@ -34,6 +39,8 @@ class RedisCache(BaseCache):
         if not options:
             raise ValueError("Redis Config Error: 'OPTIONS' field is missing.")
         self.pool: ConnectionPool = self._create_pool(options)
+        self.scan_count: int = options.get("SCAN_COUNT", 1000)  # SCAN 每批数量, 同时也是 UNLINK 每批数量
+        self._client = Redis(connection_pool=self.pool)  # 长期复用的客户端
 
     def _create_pool(self, config: dict) -> ConnectionPool:
         """
@@ -46,7 +53,8 @@ class RedisCache(BaseCache):
         port = config.get("PORT", 6379)
         db = config.get("DB", 0)
         password = config.get("PASSWORD", None)
-        decode_responses = config.get("DECODE_RESPONSES", True)
+        # 编码结果为 bytes 时不能解码响应
+        decode_responses = config.get("DECODE_RESPONSES", not self.codec.is_binary)
         max_connections = config.get("MAX_CONNECTIONS", 20)
         encoding = config.get("ENCODING", "utf-8")
 
@@ -70,8 +78,18 @@ class RedisCache(BaseCache):
 
         :return: Redis 客户端实例。
         """
-        return Redis(connection_pool=self.pool)
-    
+        return self._client
+
+    def pipeline(self, transaction: bool = True, prefix: str = "") -> "RedisCachePipeline":
+        """
+        创建 Redis 管道，所有命令在一次网络往返中发送。
+
+        :param transaction: 是否使用 MULTI/EXEC 事务。
+        :param prefix: 命令中key的前缀。
+        :return: 管道对象。
+        """
+        return RedisCachePipeline(self, transaction, prefix)
+
     async def ping(self) -> bool:
         
         return await self.client.ping()
@@ -107,26 +125,205 @@ class RedisCache(BaseCache):
             logger.error("Redis set operation failed", exc_info=True)
             return False
 
-    async def delete(self, key: str) -> bool:
+    async def delete(self, key: str | list[str]) -> bool:
         """
         删除缓存键。
 
-        :param key: 要删除的键。
+        :param key: 要删除的键或键列表。
         :return: 操作是否成功。
         """
         client = self.client
+        keys = key if isinstance(key, list) else [key]
+        if not keys:
+            return False
         try:
-            return await client.delete(key) > 0
+            return await client.delete(*keys) > 0
         except Exception as e:
             logger.error("Redis delete operation failed", exc_info=True)
             return False
 
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """
+        批量获取缓存（MGET）。
+
+        :param keys: 缓存键列表。
+        :return: {缓存键: 缓存值}，只包含存在的键。
+        """
+        if not keys:
+            return {}
+        try:
+            values = await self.client.mget(keys)
+        except Exception:
+            logger.error("Redis mget operation failed", exc_info=True)
+            return {}
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def set_many(
+        self, mapping: dict[str, Any], expire: Optional[int] | dict[str, Optional[int]] = FAP_CACHE_DEFAULT_EXPIRE
+    ) -> bool:
+        """
+        批量设置缓存（管道中的 SET EX，一次网络往返）。
+
+        :param mapping: {缓存键: 缓存值}。
+        :param expire: 过期时间（秒），或 {缓存键: 过期时间}。
+        :return: 操作是否成功。
+        """
+        if not mapping:
+            return True
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(key, value, ex=expire_of(expire, key))
+                await pipe.execute()
+            return True
+        except Exception:
+            logger.error("Redis set_many operation failed", exc_info=True)
+            return False
+
+    async def delete_many(self, keys: list[str]) -> bool:
+        """
+        批量删除缓存（DEL k1 k2 ...）。
+
+        :param keys: 缓存键列表。
+        :return: 操作是否成功。
+        """
+        return await self.delete(list(keys))
+
+    def _match_pattern(self, prefix: str) -> str:
+        """
+        生成 SCAN 的匹配模式，限定在后端 PREFIX 内。
+
+        :param prefix: 键前缀。
+        :return: 转义后的 glob 模式。
+        """
+        backend_prefix = self.perfix
+        if not prefix.startswith(backend_prefix):
+            prefix = f"{backend_prefix}{prefix}"
+        return _GLOB_SPECIAL_RE.sub(r"\\\1", prefix) + "*"
+
+    async def iter_keys(self, prefix: str) -> AsyncIterator[str]:
+        """
+        使用 SCAN 游标逐个返回指定前缀的键，不会一次性加载全部键。
+
+        :param prefix: 键前缀。
+        :return: 异步迭代器。
+        """
+        async for key in self.client.scan_iter(match=self._match_pattern(prefix), count=self.scan_count):
+            yield key.decode() if isinstance(key, bytes) else key
+
+    async def _unlink_iter(self, prefix: str) -> int:
+        """
+        按批 UNLINK 指定前缀的所有键。
+
+        :param prefix: 键前缀。
+        :return: 删除的键数量。
+        """
+        client = self.client
+        deleted = 0
+        batch = []
+        async for key in self.iter_keys(prefix):
+            batch.append(key)
+            if len(batch) >= self.scan_count:
+                deleted += await client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += await client.unlink(*batch)
+        return deleted
+
+    async def get_keys(self, prefix: str) -> list[str]:
+        """
+        获取指定前缀的所有键，大量键时请使用 iter_keys。
+
+        :param prefix: 键前缀。
+        :return: 键列表。
+        """
+        try:
+            return [key async for key in self.iter_keys(prefix)]
+        except Exception:
+            logger.error("Redis scan operation failed", exc_info=True)
+            return []
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """
+        删除指定前缀的所有键（SCAN + 批量 UNLINK）。
+
+        :param prefix: 键前缀。
+        :return: 删除的键数量。
+        """
+        try:
+            return await self._unlink_iter(prefix)
+        except Exception:
+            logger.error("Redis delete_prefix operation failed", exc_info=True)
+            return 0
+
+    async def clear(self) -> None:
+        """
+        清空该后端 PREFIX 下的所有键，不影响同一数据库中的其他键。
+        """
+        try:
+            await self._unlink_iter("")
+        except Exception:
+            logger.error("Redis clear operation failed", exc_info=True)
+
+    @asynccontextmanager
+    async def lock(self, key: str, timeout: float = 10) -> AsyncIterator[bool]:
+        """
+        Redis 分布式锁（SET NX PX）。
+
+        :param key: 锁的键。
+        :param timeout: 锁的过期时间以及等待时间（秒）。
+        :return: 是否获取成功，获取失败时调用方自行决定是否继续。
+        """
+        redis_lock = self.client.lock(key, timeout=timeout, blocking_timeout=timeout)
+        try:
+            acquired = await redis_lock.acquire()
+        except Exception:
+            logger.error("Redis lock acquire failed", exc_info=True)
+            acquired = False
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    await redis_lock.release()
+                except LockError:  # 锁已过期
+                    logger.warning(f"Redis lock {key} expired before release")
+                except Exception:
+                    logger.error("Redis lock release failed", exc_info=True)
+
     async def close(self):
         """
         关闭连接池，释放资源。
         """
         try:
+            await self._client.aclose(close_connection_pool=False)
             await self.pool.disconnect(inuse_connections=True)
         except Exception as e:
             logger.error(
                 "Failed to close Redis connection pool", exc_info=True)
+
+
+class RedisCachePipeline(CachePipeline):
+    """
+    Redis 管道，命令映射到 redis-py 的 Pipeline 上一次性执行。
+    """
+
+    async def _run(self, commands: list[tuple[str, tuple]]) -> list:
+        async with self.cache.client.pipeline(transaction=self.transaction) as pipe:
+            for method, args in commands:
+                if method == "set":
+                    key, value, expire = args
+                    pipe.set(key, value, ex=expire)
+                elif method == "get":
+                    pipe.get(*args)
+                elif method == "delete":
+                    key = args[0]
+                    pipe.delete(*(key if isinstance(key, list) else [key]))
+            raw_results = await pipe.execute()
+
+        results = []
+        for (method, _), result in zip(commands, raw_results):
+            if method == "delete":
+                result = result > 0
+            results.append(result)
+        return results
@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filename: tiered_cache.py
+Author: lvyuanxiang
+Date: 2025/04/10 14:21:37
+Description: 两级缓存实现类, 进程内 MemoryCache(L1) + RedisCache(L2), 通过 Redis pub/sub 同步各进程的 L1 失效
+"""
+import asyncio
+import json
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from redis.asyncio import Redis
+
+from faplus.cache.base_cache import BaseCache, FAP_CACHE_DEFAULT_EXPIRE
+from faplus.cache.backends.menory_cache import MemoryCache
+from faplus.cache.backends.redis_cache import RedisCache, RedisCachePipeline
+
+logger = logging.getLogger(__package__)
+
+
+class TieredCache(BaseCache):
+    """
+    两级缓存实现类
+
+    读: 先读 L1，未命中再读 L2 并回填 L1；写/删: 先写 L2，更新本进程 L1，再广播失效消息，
+    其他进程收到后删除各自 L1 中的对应键。L1 条目最多保存 L1_TTL 秒，
+    即使丢失失效消息(如订阅断开)，数据也只会在有限时间内不一致。
+
+    OPTIONS: 与 RedisCache 相同，另外支持:
+        L1_TTL: L1 条目最长保存时间(秒), 默认 60
+        L1_OPTIONS: L1(MemoryCache) 的 OPTIONS, 默认 {"MAX_ENTRIES": 100000}
+        CHANNEL: 失效消息频道, 默认 "{PREFIX}__invalidate__"
+    """
+
+    def __init__(self, cache_config: dict):
+        """
+        初始化两级缓存
+
+        :param cache_config: 缓存配置，OPTIONS 为 Redis 连接配置
+        """
+        super().__init__(cache_config)
+        options = cache_config.get("OPTIONS") or {}
+        self.l2 = RedisCache(cache_config)
+        l1_options = {"MAX_ENTRIES": 100000, **(options.get("L1_OPTIONS") or {})}  # L1 淘汰后从 L2 读取, 默认限制条目数
+        self.l1 = MemoryCache({"PREFIX": self.perfix, "OPTIONS": l1_options})
+        self.l1_ttl: int = options.get("L1_TTL", 60)
+        self.channel: str = options.get("CHANNEL") or f"{self.perfix}__invalidate__"
+
+        self._node_id = uuid.uuid4().hex  # 区分消息来源, 忽略本进程发出的消息
+        self._listener: Optional[asyncio.Task] = None
+        self._generation = 0  # 每次写入、删除或收到失效消息加1, 避免读 L2 期间被修改的数据回填 L1
+
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+    @property
+    def client(self) -> Redis:
+        """L2 的 Redis 客户端"""
+        return self.l2.client
+
+    # region ******************** 失效同步 start ******************** #
+    def _ensure_listener(self) -> None:
+        """第一次使用时在当前事件循环中启动订阅任务"""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """订阅失效消息, 断开后自动重连"""
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                # 订阅之前可能错过了失效消息
+                await self.l1.clear()
+                self._generation += 1
+                async for message in pubsub.listen():
+                    await self._on_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.error("Tiered cache invalidation listener failed, retrying", exc_info=True)
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def _on_message(self, message: dict) -> None:
+        try:
+            data = json.loads(message["data"])
+        except Exception:
+            logger.error(f"Invalid tiered cache invalidation message: {message}")
+            return
+        if data.get("node") == self._node_id:
+            return
+
+        self._generation += 1
+        op = data.get("op")
+        if op == "del":
+            await self.l1.delete_many(data.get("keys", []))
+        elif op == "prefix":
+            await self.l1.delete_prefix(data["prefix"])
+        elif op == "clear":
+            await self.l1.clear()
+
+    async def _publish(self, op: str, **kwargs) -> None:
+        """广播失效消息"""
+        message = json.dumps({"node": self._node_id, "op": op, **kwargs})
+        try:
+            await self.client.publish(self.channel, message)
+        except Exception:
+            logger.error("Tiered cache publish invalidation failed", exc_info=True)
+
+    def _l1_expire(self, expire: Optional[int]) -> int:
+        return min(expire, self.l1_ttl) if expire else self.l1_ttl
+    # endregion ****************** 失效同步 end ********************* #
+
+    async def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
+        """
+        获取缓存，L1 未命中时读取 L2 并回填 L1
+
+        :param key: 缓存键
+        :param default: 如果键不存在返回的默认值
+        :return: 缓存值或默认值
+        """
+        self._ensure_listener()
+        value = await self.l1.get(key)
+        if value is not None:
+            self.l1_hits += 1
+            return value
+
+        generation = self._generation
+        value = await self.l2.get(key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.l2_hits += 1
+        if generation == self._generation:
+            await self.l1.set(key, value, self.l1_ttl)
+        return value
+
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """
+        批量获取缓存，L1 未命中的键一次从 L2 读取
+
+        :param keys: 缓存键列表
+        :return: {缓存键: 缓存值}，只包含存在的键
+        """
+        self._ensure_listener()
+        result = await self.l1.get_many(keys)
+        self.l1_hits += len(result)
+        missing = [key for key in keys if key not in result]
+        if not missing:
+            return result
+
+        generation = self._generation
+        l2_result = await self.l2.get_many(missing)
+        self.l2_hits += len(l2_result)
+        self.misses += len(missing) - len(l2_result)
+        if l2_result and generation == self._generation:
+            await self.l1.set_many(l2_result, self.l1_ttl)
+        result.update(l2_result)
+        return result
+
+    async def set(self, key: str, value: Any, expire: Optional[int] = FAP_CACHE_DEFAULT_EXPIRE) -> None:
+        """
+        设置缓存
+
+        :param key: 缓存键
+        :param value: 缓存值
+        :param expire: 过期时间（秒）
+        """
+        self._ensure_listener()
+        self._generation += 1
+        await self.l2.set(key, value, expire)
+        await self.l1.set(key, value, self._l1_expire(expire))
+        await self._publish("del", keys=[key])
+
+    async def set_many(
+        self, mapping: dict[str, Any], expire: Optional[int] | dict[str, Optional[int]] = FAP_CACHE_DEFAULT_EXPIRE
+    ) -> None:
+        """
+        批量设置缓存
+
+        :param mapping: {缓存键: 缓存值}
+        :param expire: 过期时间（秒），或 {缓存键: 过期时间}
+        """
+        if not mapping:
+            return
+        self._ensure_listener()
+        self._generation += 1
+        await self.l2.set_many(mapping, expire)
+        # L1 只需要失效, 下次读取时从 L2 回填
+        await self.l1.delete_many(list(mapping))
+        await self._publish("del", keys=list(mapping))
+
+    async def delete(self, key: str | list[str]) -> None:
+        """
+        删除缓存
+
+        :param key: 单个键或键列表
+        """
+        keys = key if isinstance(key, list) else [key]
+        if not keys:
+            return
+        self._ensure_listener()
+        self._generation += 1
+        await self.l2.delete(keys)
+        await self.l1.delete_many(keys)
+        await self._publish("del", keys=keys)
+
+    async def delete_many(self, keys: list[str]) -> None:
+        """
+        批量删除缓存
+
+        :param keys: 缓存键列表
+        """
+        await self.delete(list(keys))
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """
+        删除指定前缀的所有缓存
+
+        :param prefix: 键前缀
+        :return: L2 中删除的键数量
+        """
+        self._ensure_listener()
+        self._generation += 1
+        deleted = await self.l2.delete_prefix(prefix)
+        await self.l1.delete_prefix(prefix)
+        await self._publish("prefix", prefix=prefix)
+        return deleted
+
+    async def get_keys(self, prefix: str) -> list[str]:
+        """
+        获取指定前缀的所有键（以 L2 为准）
+
+        :param prefix: 键前缀
+        :return: 键列表
+        """
+        return await self.l2.get_keys(prefix)
+
+    async def iter_keys(self, prefix: str) -> AsyncIterator[str]:
+        """
+        逐个返回指定前缀的键（以 L2 为准）
+
+        :param prefix: 键前缀
+        :return: 异步迭代器
+        """
+        async for key in self.l2.iter_keys(prefix):
+            yield key
+
+    async def clear(self) -> None:
+        """
+        清空该后端 PREFIX 下的所有缓存
+        """
+        self._ensure_listener()
+        self._generation += 1
+        await self.l2.clear()
+        await self.l1.clear()
+        await self._publish("clear")
+
+    async def ping(self) -> bool:
+        """
+        检查 L2 是否可用
+        """
+        return await self.l2.ping()
+
+    @asynccontextmanager
+    async def lock(self, key: str, timeout: float = 10) -> AsyncIterator[bool]:
+        """
+        使用 L2 的分布式锁
+
+        :param key: 锁的键
+        :param timeout: 锁的过期时间以及等待时间（秒）
+        """
+        async with self.l2.lock(key, timeout) as acquired:
+            yield acquired
+
+    def pipeline(self, transaction: bool = True, prefix: str = "") -> "TieredCachePipeline":
+        """
+        创建管道，命令在 L2 中一次性执行，执行后失效 L1 中被修改的键
+
+        :param transaction: 是否使用 MULTI/EXEC 事务
+        :param prefix: 命令中key的前缀
+        :return: 管道对象
+        """
+        return TieredCachePipeline(self, transaction, prefix)
+
+    async def close(self) -> None:
+        """
+        停止订阅并关闭 L2 连接
+        """
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+        await self.l2.close()
+
+    def stats(self) -> dict:
+        """
+        缓存统计
+        :return: L1、L2 命中数与命中率, 以及 L1 的统计
+        """
+        total = self.l1_hits + self.l2_hits + self.misses
+        l2_total = self.l2_hits + self.misses
+        return {
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "l1_hit_rate": self.l1_hits / total if total else 0.0,
+            "l2_hit_rate": self.l2_hits / l2_total if l2_total else 0.0,
+            "hit_rate": (self.l1_hits + self.l2_hits) / total if total else 0.0,
+            "l1": self.l1.stats(),
+        }
+
+
+class TieredCachePipeline(RedisCachePipeline):
+    """
+    两级缓存管道，在 L2 中执行命令后失效被修改的 L1 键并广播
+    """
+
+    async def execute(self) -> list:
+        keys = []
+        for method, args in self.commands:
+            if method in ("set", "delete"):
+                key = args[0]
+                keys.extend(key if isinstance(key, list) else [key])
+
+        if keys:
+            self.cache._generation += 1
+        results = await super().execute()
+        if keys:
+            await self.cache.l1.delete_many(keys)
+            await self.cache._publish("del", keys=keys)
+        return results
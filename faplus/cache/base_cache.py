@@ -7,16 +7,37 @@ Date: 2024/11/26 14:33:21
 Description: 缓存基类
 """
 
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
 from faplus.core import settings
+from faplus.cache.codec import BaseCodec, get_codec
+from faplus.utils.span_util import span
 
 FAP_CACHE_DEFAULT_EXPIRE = settings.FAP_CACHE_DEFAULT_EXPIRE
 
+logger = logging.getLogger(__package__)
+
+
+def expire_of(expire: Optional[int] | dict[str, Optional[int]], key: str) -> Optional[int]:
+    """set_many 中 key 对应的过期时间"""
+    if isinstance(expire, dict):
+        return expire.get(key, FAP_CACHE_DEFAULT_EXPIRE)
+    return expire
+
+
 class BaseCache(object):
-    """缓存基类"""
+    """缓存基类
+
+    后端方法读写的是编码后的数据, 由 CacheManager 和管道使用 codec 编解码
+    """
 
     def __init__(self, cache_config: dict):
         self.cache_config = cache_config
-        self._prefix = cache_config.get("PREFIX")
+        # 未配置时为空字符串, 所有读写路径共用(旧版本单key操作为 "None", 见 default_settings 中的升级说明)
+        self._prefix: str = cache_config.get("PREFIX") or ""
+        self.codec: BaseCodec = get_codec(cache_config)
 
     @property
     def perfix(self):
@@ -30,14 +51,47 @@ class BaseCache(object):
         """获取缓存"""
         raise NotImplementedError("cache get method must be implemented")
 
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """批量获取缓存, 只返回存在的key"""
+        result = {}
+        for key in keys:
+            value = await self.get(key)
+            if value is not None:
+                result[key] = value
+        return result
+
+    async def set_many(
+        self, mapping: dict[str, Any], expire: Optional[int] | dict[str, Optional[int]] = FAP_CACHE_DEFAULT_EXPIRE
+    ) -> None:
+        """批量设置缓存, expire 为字典时按key指定过期时间, 未指定的key使用默认过期时间"""
+        for key, value in mapping.items():
+            await self.set(key, value, expire_of(expire, key))
+
+    async def delete_many(self, keys: list[str]) -> None:
+        """批量删除缓存"""
+        if keys:
+            await self.delete(list(keys))
+
     async def get_keys(self, prefix: str) -> list[str]:
         """获取缓存key"""
         raise NotImplementedError("cahce get_keys method must be implemented")
 
+    async def iter_keys(self, prefix: str) -> AsyncIterator[str]:
+        """逐个返回指定前缀的缓存key, 默认基于 get_keys 实现"""
+        for key in await self.get_keys(prefix):
+            yield key
+
     async def delete(self, key: str | list[str]) -> None:
         """删除缓存"""
         raise NotImplementedError("cache delete method must be implemented")
 
+    async def delete_prefix(self, prefix: str) -> int:
+        """删除指定前缀的缓存, 返回删除的数量"""
+        keys = await self.get_keys(prefix)
+        if keys:
+            await self.delete(keys)
+        return len(keys)
+
     async def clear(self) -> None:
         """清空缓存"""
         raise NotImplementedError("cache clear method must be implemented")
@@ -45,3 +99,105 @@ class BaseCache(object):
     async def ping(self) -> bool:
         """检查缓存是否可用"""
         raise NotImplementedError("cache ping method must be implemented")
+
+    @asynccontextmanager
+    async def lock(self, key: str, timeout: float = 10) -> AsyncIterator[bool]:
+        """跨进程锁, 返回是否获取成功; 进程内缓存不需要跨进程锁, 默认直接成功
+
+        :param key: 锁的key
+        :param timeout: 锁的过期时间以及等待时间(秒)
+        """
+        yield True
+
+    async def close(self) -> None:
+        """释放资源, 关机时调用"""
+        return None
+
+    def pipeline(self, transaction: bool = True, prefix: str = "") -> "CachePipeline":
+        """创建缓存管道
+
+        :param transaction: 是否以事务方式执行
+        :param prefix: 命令中key的前缀
+        """
+        return CachePipeline(self, transaction, prefix)
+
+    def stats(self) -> dict:
+        """缓存统计, 后端不支持时返回空字典"""
+        return {}
+
+
+class CachePipeline(object):
+    """缓存管道
+
+    缓冲 set/get/delete 命令，execute 时一次性执行，结果按命令顺序返回。
+    set 的值与 get 的结果使用后端的 codec 编解码。
+    默认实现逐条调用后端方法，后端可以重写 _run 以减少网络往返。
+
+    用法::
+
+        async with cache.pipeline() as p:
+            p.get("a").set("b", "1").delete("c")
+        p.results  # [a的值, None, None]
+    """
+
+    def __init__(self, cache: BaseCache, transaction: bool = True, prefix: str = ""):
+        self.cache = cache
+        self.transaction = transaction
+        self.prefix = prefix
+        self.commands: list[tuple[str, tuple]] = []
+        self.results: Optional[list] = None
+
+    def _key(self, key: str) -> str:
+        assert key and isinstance(key, str), "key must be a string"
+        return f"{self.prefix}{key}"
+
+    def set(self, key: str, value: Any, expire: Optional[int] = FAP_CACHE_DEFAULT_EXPIRE) -> "CachePipeline":
+        self.commands.append(("set", (self._key(key), self.cache.codec.dumps(value), expire)))
+        return self
+
+    def get(self, key: str) -> "CachePipeline":
+        self.commands.append(("get", (self._key(key),)))
+        return self
+
+    def delete(self, key: str | list[str]) -> "CachePipeline":
+        if isinstance(key, list):
+            key = [self._key(k) for k in key]
+        else:
+            key = self._key(key)
+        self.commands.append(("delete", (key,)))
+        return self
+
+    async def execute(self) -> list:
+        """执行缓冲的命令
+
+        :return: 每条命令的结果
+        """
+        commands, self.commands = self.commands, []
+        results = []
+        if commands:
+            with span("cache"):
+                results = await self._run(commands)
+        codec = self.cache.codec
+        self.results = [
+            codec.loads(result) if method == "get" else result for (method, _), result in zip(commands, results)
+        ]
+        return self.results
+
+    async def _run(self, commands: list[tuple[str, tuple]]) -> list:
+        """执行命令, 返回未解码的结果"""
+        results = []
+        for method, args in commands:
+            results.append(await getattr(self.cache, method)(*args))
+        return results
+
+    async def __aenter__(self) -> "CachePipeline":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.commands = []
+            return
+        try:
+            await self.execute()
+        except Exception:
+            logger.error("Error executing cache pipeline", exc_info=True)
@@ -6,14 +6,31 @@ Author: lvyuanxiang
 Date: 2024/11/26 13:47:48
 Description: 缓存管理器
 """
+import asyncio
 import importlib
 import logging
+import math
+import random
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 
-from .base_cache import BaseCache, FAP_CACHE_DEFAULT_EXPIRE
+from .base_cache import BaseCache, CachePipeline, FAP_CACHE_DEFAULT_EXPIRE
 from faplus.core import settings
+from faplus.utils.span_util import span
 
 logger = logging.getLogger(__package__)
 
+FAP_CACHE_XFETCH_SIZE = settings.FAP_CACHE_XFETCH_SIZE
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+def _retrieve_exception(future: asyncio.Future) -> None:
+    """没有等待者时避免 "exception was never retrieved" 警告"""
+    if not future.cancelled():
+        future.exception()
+
 
 class CacheManager(object):
 
@@ -22,6 +39,8 @@ class CacheManager(object):
         for name, config in cache_config_dict.items():
             cache_backend = self.init_backend(config)
             self.cache_obj_dict[name] = cache_backend
+        self._flights: dict[tuple[str, str], asyncio.Future] = {}  # 进行中的加载
+        self._xfetch: OrderedDict[tuple[str, str], tuple[float, float]] = OrderedDict()  # (加载耗时, 过期时间)
 
     def all_backend(self) -> list[BaseCache]:
         return list(self.cache_obj_dict.values())
@@ -48,7 +67,8 @@ class CacheManager(object):
         try:
             method_func = getattr(cache, method)
             prefix = cache.perfix  # key前缀
-            result = await method_func(f"{prefix}{key}", *args)
+            with span("cache"):
+                result = await method_func(f"{prefix}{key}", *args)
             return result
         except Exception:
             logger.error(f"Error executing cache operation '{method}'", exc_info=True)
@@ -57,33 +77,91 @@ class CacheManager(object):
     async def set(
         self,
         key: str,
-        value: str,
+        value: Any,
         expire: int = FAP_CACHE_DEFAULT_EXPIRE,
         backend: str = "default",
     ) -> None:
         """保存
 
         :param key: 缓存的key
-        :param value: 缓存的值
+        :param value: 缓存的值, 支持的类型取决于后端的 CODEC, 默认 raw 只支持 str/bytes
         :param expire: 过期时间
-        :param nx: nx, defaults to False
+        :param backend: 缓存的backend, defaults to "default"
         """
-        if (
-            not isinstance(key, str)
-            or not isinstance(value, str)
-            or (expire and not isinstance(expire, int))
-        ):
+        if not isinstance(key, str) or (expire and not isinstance(expire, int)):
             raise ValueError("Invalid input types for key, value, or expire")
-        await self._execute_cache_operation("set", key, value, expire, backend=backend)
+        data = self.get_backend(backend).codec.dumps(value)
+        await self._execute_cache_operation("set", key, data, expire, backend=backend)
 
-    async def get(self, key: str, backend: str = "default") -> str | None:
+    async def get(self, key: str, backend: str = "default") -> Any:
         """获取缓存
 
         :param key: 缓存的key
         :param backend: 缓存的backend, defaults to "default"
         :return: 缓存的值
         """
-        return await self._execute_cache_operation("get", key, backend=backend)
+        data = await self._execute_cache_operation("get", key, backend=backend)
+        try:
+            return self.get_backend(backend).codec.loads(data)
+        except Exception:
+            logger.error(f"Error decoding cache value of '{key}'", exc_info=True)
+            return None
+
+    async def get_many(self, keys: list[str], backend: str = "default") -> dict[str, Any]:
+        """批量获取缓存
+
+        :param keys: 缓存的key列表
+        :param backend: 缓存的backend, defaults to "default"
+        :return: {key: 值}, 只包含存在的key
+        """
+        cache = self.get_backend(backend)
+        prefix = cache.perfix
+        try:
+            with span("cache"):
+                result = await cache.get_many([f"{prefix}{key}" for key in keys])
+            loads = cache.codec.loads
+            return {key[len(prefix):]: loads(value) for key, value in result.items()}
+        except Exception:
+            logger.error("Error executing cache operation 'get_many'", exc_info=True)
+            return {}
+
+    async def set_many(
+        self,
+        mapping: dict[str, Any],
+        expire: Optional[int] | dict[str, Optional[int]] = FAP_CACHE_DEFAULT_EXPIRE,
+        backend: str = "default",
+    ) -> None:
+        """批量保存
+
+        :param mapping: {key: 值}
+        :param expire: 过期时间, 或 {key: 过期时间}, 未指定的key使用默认过期时间
+        :param backend: 缓存的backend, defaults to "default"
+        """
+        cache = self.get_backend(backend)
+        prefix = cache.perfix
+        if isinstance(expire, dict):
+            expire = {f"{prefix}{key}": value for key, value in expire.items()}
+        dumps = cache.codec.dumps
+        data = {f"{prefix}{key}": dumps(value) for key, value in mapping.items()}
+        try:
+            with span("cache"):
+                await cache.set_many(data, expire)
+        except Exception:
+            logger.error("Error executing cache operation 'set_many'", exc_info=True)
+
+    async def delete_many(self, keys: list[str], backend: str = "default") -> None:
+        """批量删除缓存
+
+        :param keys: 缓存的key列表
+        :param backend: 缓存的backend, defaults to "default"
+        """
+        cache = self.get_backend(backend)
+        prefix = cache.perfix
+        try:
+            with span("cache"):
+                await cache.delete_many([f"{prefix}{key}" for key in keys])
+        except Exception:
+            logger.error("Error executing cache operation 'delete_many'", exc_info=True)
 
     async def get_keys(self, prefix: str, backend: str = "default") -> list[str]:
         """获取缓存key
@@ -94,6 +172,17 @@ class CacheManager(object):
         """
         return await self._execute_cache_operation("get_keys", prefix, backend=backend)
 
+    async def iter_keys(self, prefix: str, backend: str = "default") -> AsyncIterator[str]:
+        """逐个返回缓存key, 适用于key数量很大的场景
+
+        :param prefix: 缓存key的前缀
+        :param backend: 缓存的backend, defaults to "default"
+        :return: 缓存key(带后端前缀, 与 get_keys 一致)的异步迭代器
+        """
+        cache = self.get_backend(backend)
+        async for key in cache.iter_keys(f"{cache.perfix}{prefix}"):
+            yield key
+
     async def delete(self, key: str, backend: str = "default") -> None:
         """删除缓存
 
@@ -102,12 +191,160 @@ class CacheManager(object):
         """
         await self._execute_cache_operation("delete", key, backend=backend)
 
+    async def delete_prefix(self, prefix: str, backend: str = "default") -> int:
+        """删除指定前缀的所有缓存
+
+        :param prefix: 缓存key的前缀
+        :param backend: 缓存的backend, defaults to "default"
+        :return: 删除的数量
+        """
+        return await self._execute_cache_operation("delete_prefix", prefix, backend=backend)
+
     async def clear(self, backend: str = "default") -> None:
         """清空缓存
 
         :param backend: 缓存的backend, defaults to "default"
         """
-        await self._execute_cache_operation("clear", backend=backend)
+        cache = self.get_backend(backend)
+        try:
+            with span("cache"):
+                await cache.clear()
+        except Exception:
+            logger.error("Error executing cache operation 'clear'", exc_info=True)
+
+    async def close(self) -> None:
+        """关闭所有缓存后端, 释放连接"""
+        for name, cache in self.cache_obj_dict.items():
+            try:
+                await cache.close()
+            except Exception:
+                logger.error(f"Error closing cache backend '{name}'", exc_info=True)
+
+    def pipeline(self, transaction: bool = True, backend: str = "default") -> CachePipeline:
+        """缓存管道, 命令中的key会自动加上前缀
+
+        用法::
+
+            async with cache.pipeline() as p:
+                p.delete("a").set("b", "1")
+
+        :param transaction: 是否以事务方式执行, defaults to True
+        :param backend: 缓存的backend, defaults to "default"
+        :return: 管道对象, 退出上下文时执行, 结果保存在 results 中
+        """
+        cache = self.get_backend(backend)
+        return cache.pipeline(transaction=transaction, prefix=cache.perfix)
+
+    async def single_flight(self, key: str, loader: Loader, backend: str = "default") -> Any:
+        """进程内合并相同key的并发调用, 只有一个调用执行 loader, 其余调用等待并共享其结果(包括异常)
+
+        :param key: 合并的key
+        :param loader: 无参数的异步函数
+        :param backend: 缓存的backend, 与 key 一起区分调用, defaults to "default"
+        :return: loader 的结果
+        """
+        flight_key = (backend, key)
+        while True:
+            future = self._flights.get(flight_key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # 执行 loader 的调用被取消时, 由当前调用重新执行
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_retrieve_exception)
+        self._flights[flight_key] = future
+        try:
+            result = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._flights.pop(flight_key, None)
+
+    def _should_refresh(self, flight_key: tuple[str, str], beta: float) -> bool:
+        """XFetch: 越接近过期、加载越慢, 提前刷新的概率越大"""
+        meta = self._xfetch.get(flight_key)
+        if meta is None or beta <= 0:
+            return False
+        delta, expire_at = meta
+        return time.monotonic() - delta * beta * math.log(1.0 - random.random()) >= expire_at
+
+    async def _load(self, key: str, loader: Loader, expire: Optional[int], backend: str) -> Any:
+        start = time.monotonic()
+        value = await loader()
+        now = time.monotonic()
+        if value is None:
+            return None
+        await self.set(key, value, expire, backend=backend)
+
+        if expire:
+            flight_key = (backend, key)
+            self._xfetch[flight_key] = (now - start, now + expire)
+            self._xfetch.move_to_end(flight_key)
+            while len(self._xfetch) > FAP_CACHE_XFETCH_SIZE:
+                self._xfetch.popitem(last=False)
+        return value
+
+    async def _load_with_lock(
+        self, key: str, loader: Loader, expire: Optional[int], backend: str, lock_timeout: float, stale: Any
+    ) -> Any:
+        cache = self.get_backend(backend)
+        async with cache.lock(f"{cache.perfix}{key}:lock", lock_timeout) as acquired:
+            if not acquired:
+                logger.warning(f"acquire cache lock of '{key}' timeout, load without lock")
+            elif stale is None:
+                # 等待锁期间其他进程可能已经加载
+                value = await self.get(key, backend=backend)
+                if value is not None:
+                    return value
+            return await self._load(key, loader, expire, backend)
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Loader,
+        expire: Optional[int] = FAP_CACHE_DEFAULT_EXPIRE,
+        backend: str = "default",
+        lock: bool = False,
+        lock_timeout: float = 10,
+        beta: float = 1.0,
+    ) -> Any:
+        """获取缓存, 不存在时调用 loader 加载并保存
+
+        进程内相同key的并发加载只执行一次; lock 为 True 时加载前获取后端锁(RedisCache 为分布式锁),
+        多进程也只加载一次; beta 大于 0 时使用 XFetch 算法在过期前随机提前刷新, 避免同时过期。
+        loader 返回 None 时不缓存。
+
+        :param key: 缓存的key
+        :param loader: 无参数的异步函数, 返回缓存的值
+        :param expire: 过期时间
+        :param backend: 缓存的backend, defaults to "default"
+        :param lock: 是否使用后端锁, defaults to False
+        :param lock_timeout: 锁的过期时间以及等待时间(秒), defaults to 10
+        :param beta: XFetch 提前刷新系数, 0 表示不提前刷新, defaults to 1.0
+        :return: 缓存的值
+        """
+        value = await self.get(key, backend=backend)
+        if value is not None and not self._should_refresh((backend, key), beta):
+            return value
+
+        if lock:
+            return await self.single_flight(
+                key, lambda: self._load_with_lock(key, loader, expire, backend, lock_timeout, value), backend
+            )
+        return await self.single_flight(key, lambda: self._load(key, loader, expire, backend), backend)
 
     async def ping(self, backend: str = "default") -> bool:
         """检查缓存是否可用
@@ -0,0 +1,173 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filename: codec.py
+Author: lvyuanxiang
+Date: 2025/04/11 09:47:20
+Description: 缓存值编解码器, 后端通过 CODEC / COMPRESS_THRESHOLD 配置
+"""
+import json
+import pickle
+import zlib
+from typing import Any, Optional
+
+# 开启压缩后, 每个值前面加一个字节的标记
+_PLAIN = b"\x00"
+_ZLIB = b"\x01"
+
+
+class BaseCodec(object):
+    """编解码器基类
+
+    子类实现 encode / decode。compress_threshold 不为 None 时，
+    编码结果不小于该字节数的值使用 zlib 压缩，此时所有值都以 bytes 保存。
+    """
+
+    name = ""
+    binary = False  # encode 的结果是否为 bytes
+
+    def __init__(self, compress_threshold: Optional[int] = None, compress_level: int = 6) -> None:
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    @property
+    def is_binary(self) -> bool:
+        """保存的值是否为 bytes, 为 True 时 Redis 不能使用 decode_responses"""
+        return self.binary or self.compress_threshold is not None
+
+    def encode(self, value: Any) -> str | bytes:
+        raise NotImplementedError("codec encode method must be implemented")
+
+    def decode(self, data: str | bytes) -> Any:
+        raise NotImplementedError("codec decode method must be implemented")
+
+    def dumps(self, value: Any) -> str | bytes:
+        """
+        编码缓存值
+        :param value: 缓存值
+        :return: 保存到后端的数据
+        """
+        data = self.encode(value)
+        if self.compress_threshold is None:
+            return data
+        if isinstance(data, str):
+            data = data.encode()
+        if len(data) >= self.compress_threshold:
+            return _ZLIB + zlib.compress(data, self.compress_level)
+        return _PLAIN + data
+
+    def loads(self, data: Optional[str | bytes]) -> Any:
+        """
+        解码缓存值
+        :param data: 后端保存的数据
+        :return: 缓存值, data 为 None 时返回 None
+        """
+        if data is None:
+            return None
+        if self.compress_threshold is not None:
+            if isinstance(data, str):
+                data = data.encode()
+            flag, data = data[:1], data[1:]
+            if flag == _ZLIB:
+                data = zlib.decompress(data)
+        return self.decode(data)
+
+
+class RawCodec(BaseCodec):
+    """原样保存 str / bytes, 默认的编解码器
+
+    开启压缩后值都以 bytes 保存，前面再加一个字节记录原来的类型，解码时还原为 str 或 bytes。
+    """
+
+    name = "raw"
+
+    _STR = b"s"
+    _BYTES = b"b"
+
+    def encode(self, value: Any) -> str | bytes:
+        if not isinstance(value, (str, bytes)):
+            raise ValueError(f"raw codec only supports str or bytes, got {type(value).__name__}")
+        if self.compress_threshold is None:
+            return value
+        if isinstance(value, str):
+            return self._STR + value.encode()
+        return self._BYTES + value
+
+    def decode(self, data: str | bytes) -> Any:
+        if self.compress_threshold is None:
+            return data
+        kind, data = data[:1], data[1:]
+        return data.decode() if kind == self._STR else data
+
+
+class JsonCodec(BaseCodec):
+    """json"""
+
+    name = "json"
+
+    def encode(self, value: Any) -> str | bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    def decode(self, data: str | bytes) -> Any:
+        return json.loads(data)
+
+
+class PickleCodec(BaseCodec):
+    """pickle, 支持任意可序列化的 python 对象, 只能用于可信的缓存"""
+
+    name = "pickle"
+    binary = True
+
+    def encode(self, value: Any) -> str | bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data: str | bytes) -> Any:
+        return pickle.loads(data)
+
+
+class MsgpackCodec(BaseCodec):
+    """msgpack, 需要安装 msgpack"""
+
+    name = "msgpack"
+    binary = True
+
+    def __init__(self, compress_threshold: Optional[int] = None, compress_level: int = 6) -> None:
+        super().__init__(compress_threshold, compress_level)
+        try:
+            import msgpack
+        except ImportError:
+            raise RuntimeError("msgpack codec requires msgpack, please run `pip install msgpack`")
+        self._msgpack = msgpack
+
+    def encode(self, value: Any) -> str | bytes:
+        return self._msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, data: str | bytes) -> Any:
+        return self._msgpack.unpackb(data, raw=False)
+
+
+CODECS: dict[str, type[BaseCodec]] = {
+    codec.name: codec for codec in (RawCodec, JsonCodec, PickleCodec, MsgpackCodec)
+}
+
+
+def get_codec(cache_config: dict) -> BaseCodec:
+    """
+    根据缓存配置创建编解码器
+
+    配置项:
+        CODEC: raw(默认) / json / msgpack / pickle
+        COMPRESS_THRESHOLD: 压缩阈值(字节), 默认 None 不压缩
+        COMPRESS_LEVEL: zlib 压缩等级, 默认 6
+
+    :param cache_config: 缓存配置
+    :return: 编解码器
+    """
+    name = cache_config.get("CODEC") or "raw"
+    codec_clazz = CODECS.get(name)
+    if codec_clazz is None:
+        raise ValueError(f"cache codec {name} not found, available: {list(CODECS)}")
+    return codec_clazz(
+        compress_threshold=cache_config.get("COMPRESS_THRESHOLD"),
+        compress_level=cache_config.get("COMPRESS_LEVEL", 6),
+    )
@@ -0,0 +1,192 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filename: decorators.py
+Author: lvyuanxiang
+Date: 2025/04/14 10:08:51
+Description: 函数结果缓存装饰器
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+from fastapi import BackgroundTasks, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response as FAResponse
+from starlette.requests import HTTPConnection
+
+from faplus import const
+from faplus.schema import ResponseSchema
+from .base_cache import FAP_CACHE_DEFAULT_EXPIRE
+from .cache_manager import cache
+
+logger = logging.getLogger(__package__)
+
+# 不参与生成缓存key的参数类型(Request、WebSocket 都是 HTTPConnection)
+_IGNORED_ARG_TYPES = (HTTPConnection, UploadFile, BackgroundTasks)
+
+# 方法的第一个参数, 不参与生成缓存key
+_BOUND_ARG_NAMES = ("self", "cls")
+
+KeyBuilder = str | Callable[..., str]
+
+_background_tasks: set[asyncio.Task] = set()  # 后台刷新任务, 保存引用避免被回收
+
+
+def _bind_arguments(signature: inspect.Signature, args: tuple, kwargs: dict, skip: Optional[str] = None) -> dict:
+    """绑定参数, 去掉 skip(方法的 self/cls) 以及 Request 等不参与生成key的参数"""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return {
+        name: value
+        for name, value in bound.arguments.items()
+        if name != skip and not isinstance(value, _IGNORED_ARG_TYPES)
+    }
+
+
+def _format(builder: KeyBuilder, arguments: dict) -> str:
+    if callable(builder):
+        return builder(**arguments)
+    return builder.format(**arguments)
+
+
+def _default_key(name: str, arguments: dict) -> str:
+    try:
+        data = json.dumps(jsonable_encoder(arguments), sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"arguments of cached function {name} can not be converted to json, please pass key=") from e
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def _cacheable(result: Any) -> bool:
+    """失败的响应(ResponseSchema、ErrorResponse)以及原生 Response 不缓存"""
+    return result is not None and not isinstance(result, (ResponseSchema, FAResponse))
+
+
+async def invalidate_tag(*tags: str, backend: str = "default") -> None:
+    """使带有指定标签的所有缓存失效
+
+    :param tags: 标签, 如 "user:42"
+    :param backend: 缓存的backend, defaults to "default"
+    """
+    if tags:
+        await cache.delete_many([const.CACHE_TAG_CK.format(tag=tag) for tag in tags], backend=backend)
+
+
+def cached(
+    ttl: Optional[int] = FAP_CACHE_DEFAULT_EXPIRE,
+    key: Optional[KeyBuilder] = None,
+    backend: str = "default",
+    stale_ttl: int = 0,
+    tags: Optional[list[KeyBuilder]] = None,
+):
+    """缓存异步函数的结果, 也可以用于视图的 api 方法
+
+    结果以 JSON 保存, 命中缓存时返回 JSON 兼容的数据(如 pydantic 模型会变为字典)。
+    None、ResponseSchema 以及原生 Response(包括 make_code 返回的 ErrorResponse) 不缓存。
+
+    用法::
+
+        @cached(ttl=60, key="{uid}", tags=["user:{uid}"])
+        async def get_user_orders(uid: int): ...
+
+        await invalidate_tag("user:42")
+
+    :param ttl: 结果保持新鲜的时间(秒)
+    :param key: key模板(使用函数参数格式化)或返回key的函数, 默认使用所有参数的摘要,
+        方法的 self/cls 以及 Request、WebSocket 等参数不参与; 参数无法转换为json时必须指定
+    :param backend: 缓存的backend, defaults to "default"
+    :param stale_ttl: 过期后仍可返回旧结果的时间(秒), 期间返回旧结果并在后台刷新, 0 表示不使用
+    :param tags: 标签模板列表, invalidate_tag 可以使同一标签的所有结果失效
+    """
+
+    def decorator(func):
+        target = func.__func__ if isinstance(func, (staticmethod, classmethod)) else func
+        signature = inspect.signature(target)
+        name = f"{target.__module__}.{target.__qualname__}"
+        params = list(signature.parameters)
+        # 类方法以及第一个参数名为 self/cls 的方法, 第一个参数不参与生成key
+        skip = params[0] if params and (isinstance(func, classmethod) or params[0] in _BOUND_ARG_NAMES) else None
+        expire = ttl + stale_ttl if ttl else None
+
+        async def load(cache_key: str, tag_keys: list[str], tag_versions: dict, args, kwargs) -> Any:
+            result = await target(*args, **kwargs)
+            if not _cacheable(result):
+                return result
+
+            # 第一次使用的标签创建版本
+            versions = {tag_key: tag_versions.get(tag_key) for tag_key in tag_keys}
+            new_versions = {tag_key: uuid.uuid4().hex for tag_key, version in versions.items() if not version}
+            if new_versions:
+                await cache.set_many(new_versions, None, backend=backend)
+                versions.update(new_versions)
+
+            entry = {
+                "v": jsonable_encoder(result),
+                "t": time.time() + ttl if ttl else None,
+                "g": versions,
+            }
+            await cache.set(cache_key, json.dumps(entry, ensure_ascii=False), expire, backend=backend)
+            return result
+
+        def refresh_in_background(cache_key, tag_keys, tag_versions, args, kwargs) -> None:
+            async def do():
+                try:
+                    await cache.single_flight(
+                        cache_key, lambda: load(cache_key, tag_keys, tag_versions, args, kwargs), backend
+                    )
+                except Exception:
+                    logger.error(f"refresh cached result of {name} failed", exc_info=True)
+
+            task = asyncio.get_running_loop().create_task(do())
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+        @functools.wraps(target)
+        async def wrapper(*args, **kwargs):
+            arguments = _bind_arguments(signature, args, kwargs, skip)
+            suffix = _format(key, arguments) if key is not None else _default_key(name, arguments)
+            cache_key = const.CACHED_CK.format(name=name, args=suffix)
+            tag_keys = [const.CACHE_TAG_CK.format(tag=_format(tag, arguments)) for tag in tags or []]
+
+            # 结果与标签版本一次读取
+            async with cache.pipeline(transaction=False, backend=backend) as p:
+                p.get(cache_key)
+                for tag_key in tag_keys:
+                    p.get(tag_key)
+            results = p.results or [None] * (len(tag_keys) + 1)
+            raw, tag_versions = results[0], dict(zip(tag_keys, results[1:]))
+
+            if raw is not None:
+                try:
+                    entry = json.loads(raw)
+                except Exception:
+                    logger.error(f"invalid cached result of {name}", exc_info=True)
+                    entry = None
+                if entry is not None and all(
+                    tag_versions.get(tag_key) and entry["g"].get(tag_key) == tag_versions[tag_key]
+                    for tag_key in tag_keys
+                ):
+                    if entry["t"] is None or entry["t"] > time.time():
+                        return entry["v"]
+                    # 已过期但在 stale_ttl 内, 返回旧结果并在后台刷新
+                    refresh_in_background(cache_key, tag_keys, tag_versions, args, kwargs)
+                    return entry["v"]
+
+            return await cache.single_flight(
+                cache_key, lambda: load(cache_key, tag_keys, tag_versions, args, kwargs), backend
+            )
+
+        if isinstance(func, staticmethod):
+            return staticmethod(wrapper)
+        if isinstance(func, classmethod):
+            return classmethod(wrapper)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,124 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filename: response_cache.py
+Author: lvyuanxiang
+Date: 2025/04/15 15:32:06
+Description: GET 视图的 HTTP 响应缓存, 支持 ETag / 304
+"""
+import hashlib
+import json
+import logging
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from faplus import const
+from faplus.utils import StatusCodeEnum
+from .cache_manager import cache
+
+logger = logging.getLogger(__package__)
+
+_SUCCESS_CODE = StatusCodeEnum.请求成功.value
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否与 etag 匹配(忽略弱校验前缀 W/)"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _is_success(response: Response) -> bool:
+    """只缓存成功的 json 响应"""
+    if response.status_code != 200 or not getattr(response, "body", None):
+        return False
+    if not (response.media_type or "").startswith("application/json"):
+        return False
+    try:
+        return json.loads(response.body).get("code") == _SUCCESS_CODE
+    except Exception:
+        return False
+
+
+async def invalidate_response_cache(path: str, backend: str = "default") -> int:
+    """使指定路径(前缀)的响应缓存失效
+
+    :param path: 请求路径, 以该路径开头的所有响应缓存都会失效
+    :param backend: 缓存的backend, defaults to "default"
+    :return: 删除的数量
+    """
+    return await cache.delete_prefix(const.RESPONSE_PREFIX_CK.format(path=path), backend=backend)
+
+
+def response_cache_route(view) -> type[APIRoute]:
+    """生成视图的路由类, 在调用视图之前查询响应缓存
+
+    缓存 key 由路径、查询参数以及(可选)用户id组成, 保存序列化后的响应体与 ETag;
+    请求头 If-None-Match 与 ETag 匹配时直接返回 304。只处理 GET 请求。
+
+    :param view: 开启了 response_cache 的视图类
+    :return: APIRoute 子类
+    """
+    ttl: int = view.response_cache
+    vary_user: bool = view.response_cache_vary_user
+    backend: str = view.response_cache_backend
+    cache_control = view.response_cache_control or f"{'private' if vary_user else 'public'}, no-cache"
+
+    class ResponseCacheRoute(APIRoute):
+
+        def get_route_handler(self) -> Callable:
+            handler = super().get_route_handler()
+
+            async def cached_handler(request: Request) -> Response:
+                if request.method != "GET":
+                    return await handler(request)
+
+                query = request.scope.get("query_string", b"")
+                args = hashlib.sha1(query).hexdigest() if query else ""
+                if vary_user:
+                    args = f"{args}:{getattr(request.state, 'uid', '')}"
+                key = const.RESPONSE_CK.format(path=request.url.path, args=args)
+                if_none_match = request.headers.get("if-none-match")
+
+                entry = await cache.get(key, backend=backend)
+                if entry is not None:
+                    try:
+                        entry = json.loads(entry)
+                    except Exception:
+                        logger.error(f"invalid response cache of {key}", exc_info=True)
+                        entry = None
+                if entry is not None:
+                    headers = {"ETag": entry["e"], "Cache-Control": cache_control}
+                    if _etag_matches(if_none_match, entry["e"]):
+                        return Response(status_code=304, headers=headers)
+                    return Response(content=entry["b"], media_type=entry["m"], headers=headers)
+
+                response = await handler(request)
+                if not _is_success(response):
+                    return response
+
+                etag = _etag(response.body)
+                try:
+                    entry = {"e": etag, "b": response.body.decode(), "m": response.media_type}
+                    await cache.set(key, json.dumps(entry, ensure_ascii=False), ttl, backend=backend)
+                except UnicodeDecodeError:
+                    logger.warning(f"response of {key} is not utf-8, skip response cache")
+                response.headers["ETag"] = etag
+                response.headers["Cache-Control"] = cache_control
+                if _etag_matches(if_none_match, etag):
+                    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+                return response
+
+            return cached_handler
+
+    return ResponseCacheRoute
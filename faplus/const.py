@@ -1,8 +1,10 @@
-from enum import IntEnum, StrEnum
+from enum import IntEnum, IntFlag, StrEnum
 
 ACTIVATE_TOKEN_CK = "activate_token:{tk}"
-WHITELIST_CK = "whitelist:{url}"
-STATIC_CK = "static:{url}"
+CACHED_CK = "cached:{name}:{args}"  # @cached 函数结果
+CACHE_TAG_CK = "cache_tag:{tag}"  # @cached 标签版本
+RESPONSE_PREFIX_CK = "response:{path}"  # 视图响应缓存
+RESPONSE_CK = RESPONSE_PREFIX_CK + ":{args}"
 
 
 class TokenSourceEnum(IntEnum):
@@ -22,3 +24,14 @@ class ViewStatusEnum(StrEnum):
     test = "🧪"
     success = "✅"
     
+
+
+class PathCategoryEnum(IntFlag):
+    """请求路径分类(可组合的位掩码)"""
+
+    none = 0
+    whitelist = 1   # jwt白名单(包含登录地址)
+    static = 2      # 静态资源
+    docs = 4        # 在线文档
+    media = 8       # 媒体文件
+    guest_login = 16  # 访客登录
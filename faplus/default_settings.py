@@ -119,6 +119,18 @@ FAP_SHUTDOWN_FUNCS = []
 # 中间件
 FAP_MIDDLEWARE_CLASSES = []
 
+# 是否将连续的请求预处理中间件(静态资源、白名单、jwt、访客登录、日志等)融合为单一管道
+FAP_FUSED_PIPELINE = False
+
+# 融合管道按路径缓存执行计划的数量
+FAP_FUSED_PIPELINE_PLAN_SIZE = 1024
+
+# 视图成功的结果按 response_model 校验后直接序列化为json bytes(安装orjson时使用orjson), 跳过 fastapi 的二次序列化
+FAP_FAST_JSON_RESPONSE = False
+
+# 路径分类器缓存最近路径的数量(白名单、静态资源等判断), 0表示不缓存
+FAP_PATH_CLASSIFIER_CACHE_SIZE = 4096
+
 
 # 数据库相关
 DB_USERNAME = "root"
@@ -140,8 +152,14 @@ PROJECT_APP_PACKAGES = []
 LOG_LEVEL = "DEBUG"
 LOG_DIR = "logs"
 LOGGING = None
+FAP_ACCESS_LOG = True  # 每个请求输出一行json格式的访问日志(faplus.access, INFO 级别, 写入 {LOG_DIR}/{日期}-access.log)
+FAP_LOG_QUEUE = True  # 日志文件在后台线程中批量写入
+FAP_LOG_BATCH_SIZE = 256  # 后台线程每批最多写入的日志条数
+FAP_LOG_MAX_LENGTH = 2000  # 使用 lazy 输出的日志参数最大长度, 超出部分截断, None 表示不截断
 
 # 缓存相关
+# 升级说明: 未配置 PREFIX 时, 旧版本单key操作写入的key为 "None<key>", 现在为 "<key>", 已有的缓存(如 token)会失效;
+# 需要继续读取旧的key时配置 "PREFIX": "None", 或等待旧的key过期
 FAP_CACHE_CONFIG = {
     "default": {
         "BACKEND": "faplus.cache.backends.menory_cache.MemoryCache",
@@ -152,11 +170,20 @@ FAP_CACHE_CONFIG = {
 FAP_WS_CLASSES = []
 
 FAP_TOKEN_EXPIRE = 60 * 60 * 24 * 7  # token过期时间
+FAP_PRINCIPAL_CACHE_TTL = 10  # 进程内认证主体缓存时间(秒), 0表示不缓存
+FAP_PRINCIPAL_CACHE_SIZE = 10000  # 进程内认证主体缓存的最大数量
 FAP_CACHE_DEFAULT_EXPIRE = 60 * 60 * 24 * 7  # 默认缓存过期时间
+FAP_CACHE_XFETCH_SIZE = 10000  # get_or_set 提前刷新记录加载耗时的key数量
 
 # 媒体
 FAP_MEDIA_DIR = None
 FAP_MEDIA_URL = "/media"
+FAP_UPLOAD_CHUNK_SIZE = 1024 * 1024  # 保存上传文件时每次读取的字节数
+FAP_UPLOAD_CONCURRENCY = 4  # 同时上传多个文件时, 最多同时保存的文件数
+FAP_MEDIA_DELETE_CONCURRENCY = 8  # 批量删除文件时, 备份并删除文件的线程数
+FAP_SN_WORKER_ID = None  # sn码生成器的机器 id(0 ~ 255), 与进程 pid 的低 8 位组成 worker id, 多机部署时建议每台机器配置不同的值, None 表示由主机名与 pid 计算
+# 注意: sn码最低长度由 16 位改为 18 位, generate_sn(16) 返回 18 位的sn码, 数据库字段长度需要至少 18 位
+FAP_SN_RECORD = False  # 是否仍将sn码写入 SNRecord 表, 仅在与旧版本进程混合部署期间开启
 
 FAP_TEMP_DIR = None
 
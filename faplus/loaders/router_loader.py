@@ -18,8 +18,9 @@ from fastapi import FastAPI, APIRouter
 from fastapi.staticfiles import StaticFiles
 from pydantic.main import BaseModel
 from faplus.core import settings
-from faplus.utils import data_util
+from faplus.utils import data_util, api_util
 from faplus.schema import ErrorResponseSchema
+from faplus.cache.response_cache import response_cache_route
 from fastapi.openapi.docs import (
     get_redoc_html,
     get_swagger_ui_html,
@@ -180,6 +181,9 @@ def loader(app: Union[FastAPI, None] = None) -> Union[FastAPI, None]:
     # 初始化app
     app = init_app()
 
+    # 预先序列化通用状态码的错误响应体
+    api_util.register_status_codes()
+
     for version_tag in VERSION_CONFIG:
         assert version_tag != "default" and version_tag != "debug", "version tag not allowed to use default or debug"
 
@@ -231,6 +235,8 @@ def loader(app: Union[FastAPI, None] = None) -> Union[FastAPI, None]:
                 )
                 api_module.View.api_code = api_code
                 api_module.View.code_dict = code_dict
+                for code, msg in code_dict.items():
+                    api_util.register_error(code, msg)
                 
                 # region ******************** 遍历View中的所有方法 start ******************** #
                 for name, attr in inspect.getmembers(view_endpoint, predicate=inspect.isfunction):
@@ -253,6 +259,8 @@ def loader(app: Union[FastAPI, None] = None) -> Union[FastAPI, None]:
                             "operation_id": f"{api_code}_{api_module.__name__}_{uuid.uuid4().hex}",
                             "responses": responses,
                         }
+                        if view_endpoint.response_cache:
+                            api_cfg["route_class_override"] = response_cache_route(view_endpoint)
                         
                         api_tags = [gtag] + tags
                         if version_tag == "default":
@@ -1 +1,2 @@
-from .logger import init_logging
\ No newline at end of file
+from .logger import init_logging
+from .lazy import lazy
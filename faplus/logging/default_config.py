@@ -31,6 +31,9 @@ LOGGING = {
         "simple": {
             "format": "[%(asctime)s][%(filename)s:%(lineno)d][%(funcName)s][%(levelname)s] - %(message)s"
         },
+        "message": {  # 访问日志每行就是一个json
+            "format": "%(message)s"
+        },
     },
     "filters": {
         "aiomysql_filter": {
@@ -80,6 +83,15 @@ LOGGING = {
             "encoding": "utf-8",
             "filters": ["aiomysql_filter"],
         },
+        "access": {  # 访问日志, 始终在后台线程中写入
+            "level": "INFO",
+            "class": "faplus.logging.log_handler.MultiprocessTimeHandler",
+            "file_path": log_dir,
+            "suffix": "%Y-%m-%d-access",
+            "formatter": "message",
+            "backup_count": 30,
+            "encoding": "utf-8",
+        },
         "console": {
             "level": "DEBUG",
             "class": "logging.StreamHandler",
@@ -98,5 +110,10 @@ LOGGING = {
             "level": log_level,
             "propagate": True,
         },
+        "faplus.access": {  # 访问日志, 不受 LOG_LEVEL 影响, 只写入单独的文件, 不输出到控制台
+            "handlers": ["access"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
@@ -0,0 +1,48 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : lazy.py
+# Time       : 2025-04-17 10:12:36
+# Author     : lyx
+# version    : python 3.11
+# Description: 延迟格式化的日志参数
+
+用法: logger.debug("result: %s", lazy(result))
+logging 只有在日志级别开启时才会调用 str(), 关闭时只有创建 LazyStr 的开销;
+较大的对象(如 pydantic 模型)格式化后超过 FAP_LOG_MAX_LENGTH 的部分会被截断。
+"""
+from typing import Any, Optional
+
+from faplus.core import settings
+
+FAP_LOG_MAX_LENGTH = settings.FAP_LOG_MAX_LENGTH
+
+
+class LazyStr(object):
+    """在日志真正输出时才格式化的对象"""
+
+    __slots__ = ("obj", "limit")
+
+    def __init__(self, obj: Any, limit: Optional[int]) -> None:
+        self.obj = obj
+        self.limit = limit
+
+    def __str__(self) -> str:
+        obj = self.obj
+        text = obj if isinstance(obj, str) else str(obj)
+        limit = self.limit
+        if limit is not None and len(text) > limit:
+            return f"{text[:limit]}...({len(text) - limit} more chars)"
+        return text
+
+    __repr__ = __str__
+
+
+def lazy(obj: Any, limit: Optional[int] = FAP_LOG_MAX_LENGTH) -> LazyStr:
+    """延迟格式化日志参数
+
+    :param obj: 需要输出的对象
+    :param limit: 最大长度, 超出部分截断, None 表示不截断, defaults to FAP_LOG_MAX_LENGTH
+    :return: LazyStr
+    """
+    return LazyStr(obj, limit)
@@ -1,10 +1,37 @@
 # -*- coding: utf-8 -*-
 
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 from logging.handlers import WatchedFileHandler
 
 
+def _rollover_interval(suffix: str) -> str:
+    """根据文件名格式中最小的时间单位确定切分周期"""
+    if "%S" in suffix:
+        return "S"
+    if "%M" in suffix:
+        return "M"
+    if "%H" in suffix or "%I" in suffix:
+        return "H"
+    return "D"
+
+
+def _next_rollover(now: float, interval: str) -> float:
+    """计算下一次切分日志文件的时间戳"""
+    current = datetime.fromtimestamp(now)
+    if interval == "S":
+        start, delta = current.replace(microsecond=0), timedelta(seconds=1)
+    elif interval == "M":
+        start, delta = current.replace(second=0, microsecond=0), timedelta(minutes=1)
+    elif interval == "H":
+        start, delta = current.replace(minute=0, second=0, microsecond=0), timedelta(hours=1)
+    else:
+        start, delta = current.replace(hour=0, minute=0, second=0, microsecond=0), timedelta(days=1)
+    return (start + delta).timestamp()
+
+
 class MultiprocessTimeHandler(WatchedFileHandler):
     def __init__(self, file_path, mode='a', encoding=None, delay=False, errors=None, backup_count=30, suffix="%Y-%m-%d"):
         # 如果日志文件夹不存在就创建日志文件夹
@@ -14,42 +41,54 @@ class MultiprocessTimeHandler(WatchedFileHandler):
         self.file_path = file_path
         self.suffix = suffix
         self.backup_count = backup_count
+        self._interval = _rollover_interval(suffix)
 
         # 日志文件名
-        self.file_name = "{}.log".format(datetime.now().strftime(suffix))
+        now = time.time()
+        self.file_name = "{}.log".format(datetime.fromtimestamp(now).strftime(suffix))
+        self.rollover_at = _next_rollover(now, self._interval)  # 下一次切分日志文件的时间戳
 
         # 日志文件路径
         file_path_name = os.path.join(self.file_path, self.file_name)
         super().__init__(file_path_name, mode, encoding, delay)
 
-    def emit(self, record):
-        # 获取当前文件名
-        current_file_name = "{}.log".format(datetime.now().strftime(self.suffix))
+    def _rollover(self, now: float):
+        """切换到当前时间对应的日志文件"""
+        self.rollover_at = _next_rollover(now, self._interval)
+        current_file_name = "{}.log".format(datetime.fromtimestamp(now).strftime(self.suffix))
 
         # 判断当前文件名是否与日志文件名相同
-        if current_file_name != self.file_name:
+        if current_file_name == self.file_name:
+            return
 
-            self.file_name = current_file_name
+        self.file_name = current_file_name
 
-            # 重新赋值日志文件路径
-            self.baseFilename = os.path.abspath(os.path.join(self.file_path, self.file_name))
+        # 重新赋值日志文件路径
+        self.baseFilename = os.path.abspath(os.path.join(self.file_path, self.file_name))
 
-            if self.stream:
-                self.flush()
-                self.stream.close()
-            self.stream = self._open()
-
-            """
-                重新获取当前文件信息
-                    def _statstream(self):
-                        if self.stream:
-                            sres = os.fstat(self.stream.fileno())
-                            self.dev, self.ino = sres[ST_DEV], sres[ST_INO]
-                sres[ST_DEV], sres[ST_INO] 这两个参数如果发生改变，表示原来的日志被删除，修改，或者重命名等操作，此时就无法写入日志文件
-                所以需要重新获取这两个参数，来判断日志文件是否发生改变
-            """
-            self._statstream()
-            self._clean_old_logs()
+        if self.stream:
+            self.flush()
+            self.stream.close()
+        self.stream = self._open()
+
+        """
+            重新获取当前文件信息
+                def _statstream(self):
+                    if self.stream:
+                        sres = os.fstat(self.stream.fileno())
+                        self.dev, self.ino = sres[ST_DEV], sres[ST_INO]
+            sres[ST_DEV], sres[ST_INO] 这两个参数如果发生改变，表示原来的日志被删除，修改，或者重命名等操作，此时就无法写入日志文件
+            所以需要重新获取这两个参数，来判断日志文件是否发生改变
+        """
+        self._statstream()
+
+        # 清理旧日志需要遍历目录, 放到后台线程中执行
+        threading.Thread(target=self._clean_old_logs, name="log-cleaner", daemon=True).start()
+
+    def emit(self, record):
+        # 只比较时间戳, 到达切分时间后才重新计算文件名
+        if record.created >= self.rollover_at:
+            self._rollover(record.created)
 
         """
             父类的emit方法，会判断日志文件是否发生改变，如果发生改变，会重新打开日志文件
@@ -58,7 +97,34 @@ class MultiprocessTimeHandler(WatchedFileHandler):
         """
         super().emit(record)
 
-    
+    def emit_batch(self, records):
+        """批量写入日志, 整批只检查一次文件状态、只 flush 一次
+
+        :param records: 日志记录列表, 已按 handler 的级别和过滤器筛选
+        """
+        if not records:
+            return
+        self.acquire()
+        try:
+            if self.stream is not None:
+                self.reopenIfNeeded()
+            for record in records:
+                try:
+                    if record.created >= self.rollover_at:
+                        self._rollover(record.created)
+                    if self.stream is None:
+                        self.stream = self._open()
+                        self._statstream()
+                    self.stream.write(self.format(record) + self.terminator)
+                except Exception:
+                    self.handleError(record)
+            try:
+                self.flush()
+            except Exception:
+                self.handleError(records[-1])
+        finally:
+            self.release()
+
     def _clean_old_logs(self):
         thirty_days_ago = datetime.now() - timedelta(days=self.backup_count)
         
@@ -72,6 +138,6 @@ class MultiprocessTimeHandler(WatchedFileHandler):
                 if file_date < thirty_days_ago:
                     file_path = os.path.join(self.file_path, log_file)
                     os.remove(file_path)
-            except ValueError:
-                # 忽略解析失败的文件
-                continue
\ No newline at end of file
+            except (ValueError, OSError):
+                # 忽略解析失败或已被其他进程删除的文件
+                continue
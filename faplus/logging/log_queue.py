@@ -0,0 +1,126 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : log_queue.py
+# Time       : 2025-04-17 15:26:41
+# Author     : lyx
+# version    : python 3.11
+# Description: 后台线程写日志文件
+
+事件循环线程中 LazyQueueHandler 只把日志记录放入队列, 由 BatchQueueListener 在后台线程中格式化并批量写入文件;
+MultiprocessTimeHandler 整批只 flush 一次。
+"""
+import atexit
+import copy
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from .log_handler import MultiprocessTimeHandler
+
+_listeners: list[QueueListener] = []
+_exc_formatter = logging.Formatter()
+
+
+class LazyQueueHandler(QueueHandler):
+    """放入队列前不格式化日志, 由后台线程中的 handler 格式化
+
+    标准库的 QueueHandler.prepare 会在调用线程(事件循环)中格式化消息, 这里只复制记录,
+    保留 msg/args; 有异常信息时只生成 traceback 文本(traceback 对象不能跨线程保留)。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class BatchQueueListener(QueueListener):
+    """每次从队列中取出一批日志记录再交给 handler 处理"""
+
+    def __init__(self, q: queue.Queue, *handlers: logging.Handler, batch_size: int = 256):
+        super().__init__(q, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def _drain(self) -> tuple[list, bool]:
+        """阻塞取出第一条记录, 再尽量取出队列中已有的记录
+
+        :return: (日志记录列表, 是否收到停止信号)
+        """
+        records = [self.dequeue(True)]
+        while len(records) < self.batch_size:
+            try:
+                records.append(self.dequeue(False))
+            except queue.Empty:
+                break
+        stop = False
+        if self._sentinel in records:
+            records = records[: records.index(self._sentinel)]
+            stop = True
+        return records, stop
+
+    def handle_batch(self, records: list) -> None:
+        records = [self.prepare(record) for record in records]
+        for handler in self.handlers:
+            if isinstance(handler, MultiprocessTimeHandler):
+                handler.emit_batch(
+                    [record for record in records if record.levelno >= handler.level and handler.filter(record)]
+                )
+                continue
+            for record in records:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def _monitor(self) -> None:
+        has_task_done = hasattr(self.queue, "task_done")
+        while True:
+            records, stop = self._drain()
+            try:
+                self.handle_batch(records)
+            except Exception:
+                pass  # handler 内部已经通过 handleError 输出错误
+            if has_task_done:
+                for _ in range(len(records) + stop):
+                    self.queue.task_done()
+            if stop:
+                break
+
+
+def enable_queue_logging(batch_size: int = 256, names: list[str] = None) -> None:
+    """将已配置的 logger 中的 MultiprocessTimeHandler 移到后台线程中
+
+    每个 logger 的文件 handler 替换为一个 QueueHandler, 其他 handler(如控制台)保持不变。
+    进程退出时停止后台线程并写完队列中剩余的日志。
+
+    :param batch_size: 每批最多写入的日志条数, defaults to 256
+    :param names: 只处理指定名称的 logger, defaults to None 处理所有 logger
+    """
+    if names is None:
+        loggers = [logging.getLogger()] + [
+            logger for logger in logging.Logger.manager.loggerDict.values() if isinstance(logger, logging.Logger)
+        ]
+    else:
+        loggers = [logging.getLogger(name) for name in names]
+    for logger in loggers:
+        handlers = [handler for handler in logger.handlers if isinstance(handler, MultiprocessTimeHandler)]
+        if not handlers:
+            continue
+        q = queue.SimpleQueue()
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(LazyQueueHandler(q))
+        listener = BatchQueueListener(q, *handlers, batch_size=batch_size)
+        listener.start()
+        _listeners.append(listener)
+
+
+def stop_queue_logging() -> None:
+    """停止后台写日志线程, 写完队列中剩余的日志"""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_queue_logging)
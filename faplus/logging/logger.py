@@ -24,3 +24,10 @@ def init_logging():
 
     # 加载配置
     logging.config.dictConfig(load_logging_cfg())
+
+    # 日志文件在后台线程中写入, 访问日志每个请求都会输出, 始终在后台线程中写入
+    from .log_queue import enable_queue_logging
+    if settings.FAP_LOG_QUEUE:
+        enable_queue_logging(settings.FAP_LOG_BATCH_SIZE)
+    else:
+        enable_queue_logging(settings.FAP_LOG_BATCH_SIZE, names=["faplus.access"])
@@ -6,14 +6,17 @@ Author: lvyuanxiang
 Date: 2025/01/03 17:11:15
 Description: 媒体管理
 """
+import asyncio
 import logging
 import os
+from collections import Counter
 from typing import Dict, List
 from faplus.core import settings
 
 from fastapi import UploadFile
 from .utils import file_util
 from .models import FileRecord
+from tortoise.functions import Count
 from tortoise.transactions import in_transaction
 from . import const
 
@@ -21,6 +24,7 @@ BASE_DIR = settings.BASE_DIR
 MEDIA_ROOT = getattr(settings, "FAP_MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
 MEDIA_URL = settings.FAP_MEDIA_URL
 FAP_TEMP_DIR = getattr(settings, "FAP_TEMP_DIR", os.path.join(MEDIA_ROOT, "temp"))
+FAP_UPLOAD_CONCURRENCY = settings.FAP_UPLOAD_CONCURRENCY
 
 logger = logging.getLogger("media")
 
@@ -75,28 +79,37 @@ class MediaManager:
         os.makedirs(target_dir, exist_ok=True)
 
         rename_map = rename_map or {}
-        sn_lst = []
 
         try:
-            for idx, file in enumerate(files):
-                # 保存文件
-                file_hash = await self.save_manager.save(file, target_dir)
-                save_name = rename_map.get(idx)
-                sn = await file_util.generate_sn()
-                
-                # 创建文件记录
-                file_record = await FileRecord.create(
+            # 并发保存文件, 全部完成后再处理异常, 保证已保存的文件都能回滚
+            semaphore = asyncio.Semaphore(FAP_UPLOAD_CONCURRENCY)
+
+            async def save(file: UploadFile) -> str:
+                async with semaphore:
+                    return await self.save_manager.save(file, target_dir)
+
+            file_hashes = await asyncio.gather(*(save(file) for file in files), return_exceptions=True)
+            for file_hash in file_hashes:
+                if isinstance(file_hash, BaseException):
+                    raise file_hash
+
+            # 批量生成sn并创建文件记录
+            sn_lst = await file_util.generate_sns(len(files))
+            file_records = [
+                FileRecord(
                     original_name=file.filename,
-                    save_name=save_name,
+                    save_name=rename_map.get(idx),
                     sn=sn,
                     file_hash=file_hash,
                     file_path=target_dir,
                     file_type=file.content_type,
                     source=source,
                 )
-                sn_lst.append(sn)
-                logger.info(f"File Upload Success -> {file_record}")
-            
+                for idx, (file, file_hash, sn) in enumerate(zip(files, file_hashes, sn_lst))
+            ]
+            await FileRecord.bulk_create(file_records)
+            logger.info("File Upload Success -> %s", sn_lst)
+
             self.sn_lst = sn_lst  # 保存成功的sn
         except Exception as e:
             logger.error(f"File upload failed, rolling back: {e}", exc_info=True)
@@ -105,28 +118,41 @@ class MediaManager:
         return sn_lst
 
     async def remove(self, sn_lst: List[str]):
-        """根据sn删除文件和文件记录"""
+        """根据sn删除文件和文件记录
+
+        一次分组查询统计文件的引用数, 一次删除所有记录, 不再被引用的文件在线程池中并发备份并删除
+        """
         if not sn_lst:
             return []
 
-        file_manager = FileRecord.filter(sn__in=sn_lst)
-        file_data_lst = await file_manager.values("file_path", "file_hash", "sn", "original_name")
-        sn_lst = []
+        file_data_lst = await FileRecord.filter(sn__in=sn_lst).values("file_path", "file_hash", "sn", "original_name")
+        if not file_data_lst:
+            return []
 
         try:
-            # 删除文件记录
-            for item in file_data_lst:
-                file_path = item["file_path"]
-                file_hash = item["file_hash"]
-                original_name = item["original_name"]
-                sn = item["sn"]
-                manager = FileRecord.filter(file_path=file_path, file_hash=file_hash)
-                print("*"  *  100)
-                print(await manager.count())
-                if await manager.count() == 1: # 如果文件记录唯一，则删除文件
-                    await self.delete_manager.delete(file_path, file_hash, original_name)
-                await manager.filter(sn=sn).delete()
-                sn_lst.append(sn)
+            # 同一个文件(目录 + hash + 文件名)在本次删除的记录数
+            removing = Counter(
+                (item["file_path"], item["file_hash"], item["original_name"]) for item in file_data_lst
+            )
+
+            # 这些文件的总引用数
+            ref_counts = await (
+                FileRecord.filter(file_hash__in=list({item["file_hash"] for item in file_data_lst}))
+                .annotate(count=Count("id"))
+                .group_by("file_path", "file_hash", "original_name")
+                .values_list("file_path", "file_hash", "original_name", "count")
+            )
+            unreferenced = [
+                (file_path, file_hash, original_name)
+                for file_path, file_hash, original_name, count in ref_counts
+                if removing.get((file_path, file_hash, original_name)) == count
+            ]
+
+            sn_lst = [item["sn"] for item in file_data_lst]
+            await FileRecord.filter(sn__in=sn_lst).delete()
+
+            # 删除不再被引用的文件
+            await self.delete_manager.delete_many(unreferenced)
 
         except Exception as e:
             logger.error(f"File removal failed, rolling back: {e}", exc_info=True)
@@ -134,11 +160,31 @@ class MediaManager:
 
         return sn_lst
 
+    @classmethod
+    async def get_files(cls, sn_lst: List[str]) -> list[tuple[str, str, str, str]]:
+        """获取文件路径, 不读取文件内容, 用于 Response.file
+
+        :param sn_lst: sn列表
+        :return: [(文件路径, 文件名, 文件类型, 文件hash)], 不包含文件已不存在的记录
+        """
+        file_records = await FileRecord.filter(sn__in=sn_lst).values(
+            "file_path", "file_hash", "original_name", "save_name", "file_type"
+        )
+        rst = []
+        for item in file_records:
+            file_path = await asyncio.to_thread(
+                file_util.get_file_path, item["file_path"], item["file_hash"], item["original_name"]
+            )
+            if not file_path:
+                logger.warning("文件不存在: %s", item)
+                continue
+            rst.append((file_path, item["save_name"] or item["original_name"], item["file_type"], item["file_hash"]))
+        return rst
+
     @classmethod
     async def download(cls, sn_lst: List[str]) -> tuple[bytes, str, str]:
-        """下载文件"""
+        """下载文件, 文件内容会读取到内存中, 大文件请使用 get_files"""
         file_records = await FileRecord.filter(sn__in=sn_lst)
-        print(file_records)
         rst = []
         for file_record in file_records:
             file_hash = file_record.file_hash
@@ -9,39 +9,34 @@
 """
 
 import logging
+from typing import Optional
 
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
 from faplus.utils import settings, Response as ApiResponse, StatusCodeEnum
 from faplus.media import MediaManager
+from faplus.utils.path_util import path_classifier, PathCategoryEnum
+from faplus.middlewares.base_middleware import BaseMiddleware
 
 logger = logging.getLogger(__package__)
 
 MEDIA_URL = settings.FAP_MEDIA_URL
 
 
-class FileDownloadMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
+class FileDownloadMiddleware(BaseMiddleware):
+    def match(self, path: str) -> bool:
+        return PathCategoryEnum.media in path_classifier.classify(path)
+
+    async def process_request(self, request: Request) -> Optional[Response]:
         # 获取url
-        path = request.url.path
-        if not path.startswith(MEDIA_URL):
-            return await call_next(request)
+        path = request.scope["path"]
 
         # 获取文件的sn（url的最后一截）
         sn = path.split("/")[-1]
 
-        rst = await MediaManager.download([sn])
+        rst = await MediaManager.get_files([sn])
         if not rst:
-            return Response(
-                ApiResponse.fail(StatusCodeEnum.请求不存在.value, StatusCodeEnum.请求不存在.name).json(),
-                headers={"Content-Type": "application/json"},
-            )
-        
-        file, file_name, file_type = rst[0]
-        if file_type.startswith("image"):
-            return ApiResponse.img(file, file_type)
-        else:
-            return ApiResponse.download(file, file_name)
+            return ApiResponse.error(StatusCodeEnum.请求不存在.value, StatusCodeEnum.请求不存在.name)
+
+        file_path, file_name, file_type, file_hash = rst[0]
+        return ApiResponse.file(file_path, file_hash, file_name, file_type)
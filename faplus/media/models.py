@@ -14,6 +14,7 @@ from faplus.utils import time_util
 
 
 class SNRecord(Model):
+    """sn码占用记录, 已不再使用; 仅在 FAP_SN_RECORD 开启时写入, 所有进程升级后可删除该表"""
 
     id = fields.IntField(pk=True, description="自增主键")
     sn = fields.CharField(unique=True, max_length=64, description="sn码")
@@ -9,45 +9,53 @@ Description: 文件操作相关工具, 只用于文件操作，不记录数据
 import os
 import hashlib
 import logging
-import secrets
-import string
 import asyncio
 import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
 
 from fastapi import UploadFile
 import aiofiles
 
+from faplus.core import settings
 from faplus.media.models import SNRecord
+from faplus.media.utils.sn_util import sn_generator
 
 
 logger = logging.getLogger("media")
 
+FAP_UPLOAD_CHUNK_SIZE = settings.FAP_UPLOAD_CHUNK_SIZE
+FAP_SN_RECORD = settings.FAP_SN_RECORD
+FAP_MEDIA_DELETE_CONCURRENCY = settings.FAP_MEDIA_DELETE_CONCURRENCY
 
-async def generate_sn(len: int = 18, retry: int = 0) -> str:
-    """生成唯一的指定长度的sn码（包含字母数字）
 
-    :param len: sn码长度, 最低长度为16位
+async def generate_sn(len: int = 18) -> str:
+    """生成唯一的指定长度的sn码（包含字母数字）, 按时间排序, 不需要访问数据库
+
+    :param len: sn码长度, 最低长度为18位(旧版本最低为16位, generate_sn(16) 现在返回18位)
     :return: sn码
     """
-    if retry > 5:
-        logger.error("生成sn码失败，重试次数过多")
-        raise Exception("生成sn码失败")
-    len = max(16, len)
+    sn = sn_generator.generate(len)
+    if FAP_SN_RECORD:  # 与旧版本混合部署期间占用sn
+        await SNRecord.create(sn=sn)
+    return sn
 
-    # 定义字符集：包括大小写字母和数字
-    characters = string.ascii_letters + string.digits
 
-    # 使用 secrets.choice 从字符集中随机选择字符以构建 SN 码
-    sn = "".join(secrets.choice(characters) for _ in range(len))
+async def generate_sns(n: int, length: int = 18) -> list[str]:
+    """批量生成唯一的sn码, 不需要访问数据库
 
-    if await SNRecord.exists(sn=sn):  # 如果生成的 SN 码已经存在，则重新生成
-        return await generate_sn(len, retry + 1)
-    else:
-        # 占用sn
-        await SNRecord.create(sn=sn)
+    :param n: 数量
+    :param length: sn码长度, 最低长度为18位(旧版本最低为16位)
+    :return: sn码列表, 按生成顺序排列
+    """
+    if n <= 0:
+        return []
+    sns = sn_generator.generate_many(n, length)
+    if FAP_SN_RECORD:  # 与旧版本混合部署期间占用sn
+        await SNRecord.bulk_create([SNRecord(sn=sn) for sn in sns])
+    return sns
 
-    return sn
-        
 
 class FileSaveManager:
     def __init__(self):
@@ -73,31 +81,80 @@ class FileSaveManager:
     async def _remove_file(self, file: str):
         try:
             await asyncio.to_thread(os.remove, file)
-            logger.debug(f"Rolled back file successfully: {file}")
+            logger.debug("Rolled back file successfully: %s", file)
         except Exception as e:
             logger.error(f"Error rolling back file: {file}.", exc_info=True)
 
-    async def save(self, file: UploadFile, target_dir: str) -> str:
+    @staticmethod
+    def _stream_save(src: BinaryIO, target_dir: str, original_name: str, chunk_size: int) -> tuple[str, str, bool]:
+        """分块写入临时文件并计算Hash, 完成后原子地创建 {hash}_{name}, 在工作线程中执行
+
+        :return: (文件Hash, 目标路径, 是否新保存的文件)
+        """
+        tmp_path = os.path.join(target_dir, f".{uuid.uuid4().hex}.uploading")
+        sha256 = hashlib.sha256()
+        try:
+            with open(tmp_path, "xb") as dst:
+                while chunk := src.read(chunk_size):
+                    sha256.update(chunk)
+                    dst.write(chunk)
+            file_hash = sha256.hexdigest()
+            target_path = os.path.join(target_dir, f"{file_hash}_{original_name}")
+            # 原子地创建目标文件, 并发保存内容相同的文件时只有一个调用返回 True
+            return file_hash, target_path, FileSaveManager._create_target(tmp_path, target_path)
+        finally:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _create_target(tmp_path: str, target_path: str) -> bool:
+        """将临时文件发布为目标文件, 目标已存在时不覆盖
+
+        :return: 是否新创建了目标文件
+        """
+        try:
+            os.link(tmp_path, target_path)
+            return True
+        except FileExistsError:  # 内容相同的文件已存在
+            return False
+        except OSError:
+            pass
+
+        # 文件系统不支持硬链接: 先以 O_EXCL 占位, 再替换为临时文件
+        try:
+            os.close(os.open(target_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        os.replace(tmp_path, target_path)
+        return True
+
+    async def save(self, file: UploadFile, target_dir: str, chunk_size: int = FAP_UPLOAD_CHUNK_SIZE) -> str:
+        """流式保存上传文件, 内存占用只与 chunk_size 有关
+
+        :param file: 上传的文件
+        :param target_dir: 保存的文件夹
+        :param chunk_size: 每次读取的字节数, defaults to FAP_UPLOAD_CHUNK_SIZE
+        :return: 文件Hash(sha256)
+        """
         if not file:
             raise ValueError("No file provided")
 
         # 判断目标文件夹是否存在，不存在则创建
         os.makedirs(target_dir, exist_ok=True)
 
-        # 计算Hash，判断文件是否重复
-        content = await file.read()
-        original_name = file.filename
-        file_hash = hashlib.sha256(content).hexdigest()
-        target_path = os.path.join(target_dir, f"{file_hash}_{original_name}")
-
-        if not os.path.exists(target_path):
-            # 保存文件
-            async with aiofiles.open(target_path, "wb") as f:
-                await f.write(content)
-            self.save_files.append(target_path)
-            logger.info(f"File saved successfully: {target_path}")
+        # 读取、计算Hash、写入都在工作线程中完成, 不阻塞事件循环
+        file_hash, target_path, created = await asyncio.to_thread(
+            self._stream_save, file.file, target_dir, file.filename, chunk_size
+        )
+
+        if created:
+            if target_path not in self.save_files:
+                self.save_files.append(target_path)
+            logger.info("File saved successfully: %s", target_path)
         else:
-            logger.info(f"File already exists: {target_path}")
+            logger.info("File already exists: %s", target_path)
 
         # 重置指针
         await file.seek(0)
@@ -137,7 +194,7 @@ class FileDeleteManager:
         file_name = f"{file_hash}_{original_name}"
         file_path = os.path.join(dir_path, file_name)
         if not os.path.exists(file_path):
-            logger.warning(f"文件不存在，跳过删除: {file_path}")
+            logger.warning("文件不存在，跳过删除: %s", file_path)
             return
 
         try:
@@ -148,11 +205,55 @@ class FileDeleteManager:
             # 删除文件
             await asyncio.to_thread(os.remove, file_path)
             self.deleted_files.append((file_path, backup_path))
-            logger.info(f"文件已删除并备份: {file_path} -> {backup_path}")
+            logger.info("文件已删除并备份: %s -> %s", file_path, backup_path)
         except Exception as e:
             logger.error(f"删除文件失败: {file_path}. 错误: {e}", exc_info=True)
             raise
 
+    def _backup_and_remove(self, file_path: str) -> str | None:
+        """将文件移动到备份目录, 在工作线程中执行
+
+        :return: 备份文件路径, 文件不存在时返回 None
+        """
+        if not os.path.exists(file_path):
+            logger.warning("文件不存在，跳过删除: %s", file_path)
+            return None
+        backup_path = os.path.join(self.backup_dir, os.path.basename(file_path))
+        # 同一文件系统内直接重命名, 否则复制后删除
+        shutil.move(file_path, backup_path)
+        return backup_path
+
+    async def delete_many(self, files: list[tuple[str, str, str]], concurrency: int = FAP_MEDIA_DELETE_CONCURRENCY):
+        """
+        并发删除多个文件并备份以便回滚, 全部完成后再抛出异常, 保证已删除的文件都能回滚。
+
+        :param files: [(文件所在目录, 文件hash, 文件原始名称)]
+        :param concurrency: 最多同时处理的文件数, defaults to FAP_MEDIA_DELETE_CONCURRENCY
+        """
+        file_paths = list(dict.fromkeys(
+            os.path.join(dir_path, f"{file_hash}_{original_name}") for dir_path, file_hash, original_name in files
+        ))
+        if not file_paths:
+            return
+
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(file_paths))), thread_name_prefix="media-delete") as pool:
+            results = await asyncio.gather(
+                *(loop.run_in_executor(pool, self._backup_and_remove, file_path) for file_path in file_paths),
+                return_exceptions=True,
+            )
+
+        error = None
+        for file_path, result in zip(file_paths, results):
+            if isinstance(result, BaseException):
+                logger.error(f"删除文件失败: {file_path}. 错误: {result}", exc_info=result)
+                error = error or result
+            elif result is not None:
+                self.deleted_files.append((file_path, result))
+        logger.info("文件已删除并备份: %s 个", len(self.deleted_files))
+        if error is not None:
+            raise error
+
     async def rollback(self):
         """
         恢复所有已删除并备份的文件。
@@ -184,7 +285,7 @@ class FileDeleteManager:
         try:
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
             await asyncio.to_thread(shutil.copy, backup_path, file_path)
-            logger.info(f"文件已恢复: {file_path}")
+            logger.info("文件已恢复: %s", file_path)
         except Exception as e:
             logger.error(f"恢复文件失败: {file_path}. 错误: {e}", exc_info=True)
             raise
@@ -198,11 +299,24 @@ class FileDeleteManager:
         try:
             if os.path.exists(backup_path):
                 await asyncio.to_thread(os.remove, backup_path)
-                logger.info(f"备份文件已删除: {backup_path}")
+                logger.info("备份文件已删除: %s", backup_path)
         except Exception as e:
             logger.error(f"删除备份文件失败: {backup_path}. 错误: {e}", exc_info=True)
 
 
+def get_file_path(dir_path: str, file_hash: str, original_name: str) -> str | None:
+    """
+    获取文件路径。
+
+    :param dir_path: 文件所在目录路径
+    :param file_hash: 文件的哈希值，用作文件名
+    :param original_name: 文件的原始名称
+    :return: 文件路径或 None 如果文件不存在
+    """
+    file_path = os.path.join(dir_path, f"{file_hash}_{original_name}")
+    return file_path if os.path.isfile(file_path) else None
+
+
 async def get_file(dir_path: str, file_hash: str, original_name: str):
     """
     获取文件内容。
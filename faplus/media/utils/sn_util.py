@@ -0,0 +1,137 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filename: sn_util.py
+Author: lvyuanxiang
+Date: 2025/04/21 10:05:42
+Description: 按时间排序的sn码生成器, 不需要访问数据库
+
+sn码为 18 位 [0-9A-Za-z] 字符, 由以下字段组成(共 106 位, 按 62 进制定长编码, 字符串顺序即生成顺序):
+    毫秒时间戳(48 位) | 进程号 worker(16 位) | 同一毫秒内的序号(16 位) | 随机数(26 位)
+同一进程内由时间戳 + 序号保证唯一; 不同进程通过 worker 区分:
+    配置了 FAP_SN_WORKER_ID(机器 id, 0 ~ 255)时, worker 为 机器 id(高 8 位) | pid 的低 8 位,
+    同一台机器上 --workers N 启动的多个进程共用同一配置也不会相同;
+    未配置时由主机名与 pid 计算。极小概率相同时还有 26 位随机数避免重复。
+
+旧版本的sn码最低 16 位, 现在最低 18 位, generate_sn(16) 返回 18 位的sn码。
+"""
+import hashlib
+import os
+import secrets
+import socket
+import string
+import threading
+import time
+from typing import Optional
+
+from faplus.core import settings
+
+FAP_SN_WORKER_ID: Optional[int] = settings.FAP_SN_WORKER_ID
+
+# 按 ASCII 顺序排列, 定长编码后字符串顺序与数值顺序一致
+ALPHABET = string.digits + string.ascii_uppercase + string.ascii_lowercase
+SN_LENGTH = 18
+
+TIMESTAMP_BITS = 48
+WORKER_BITS = 16
+SEQUENCE_BITS = 16
+RANDOM_BITS = 26
+
+MAX_WORKER = (1 << WORKER_BITS) - 1
+PID_BITS = 8  # 配置了 worker id 时, worker 中来自 pid 的位数
+MAX_WORKER_ID = (1 << (WORKER_BITS - PID_BITS)) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+def _encode(value: int, length: int) -> str:
+    """定长 62 进制编码"""
+    chars = []
+    for _ in range(length):
+        value, rem = divmod(value, 62)
+        chars.append(ALPHABET[rem])
+    return "".join(reversed(chars))
+
+
+def _default_worker_id() -> int:
+    """由主机名与 pid 计算 worker id"""
+    digest = hashlib.sha1(f"{socket.gethostname()}:{os.getpid()}".encode()).digest()
+    return int.from_bytes(digest[:2], "big")
+
+
+def _configured_worker(worker_id: int, pid: int) -> int:
+    """配置的机器 id 作为高位, pid 的低位作为低位"""
+    return (worker_id << PID_BITS) | (pid & ((1 << PID_BITS) - 1))
+
+
+class SNGenerator(object):
+    """sn码生成器, 线程安全; fork 后自动重新计算 worker id"""
+
+    def __init__(self, worker_id: Optional[int] = FAP_SN_WORKER_ID) -> None:
+        """
+        :param worker_id: 机器 id, 0 ~ 255, 与 pid 的低 8 位组成 worker,
+            defaults to FAP_SN_WORKER_ID, None 表示由主机名与 pid 计算
+        """
+        if worker_id is not None and not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}, but got {worker_id}")
+        self._worker_id = worker_id
+        self._lock = threading.Lock()
+        self._pid = None
+        self._worker = 0
+        self._last_ms = 0
+        self._sequence = 0
+
+    def _next(self) -> tuple[int, int]:
+        """下一个 (毫秒时间戳, 序号), 需要在锁内调用"""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            if self._worker_id is None:
+                self._worker = _default_worker_id()
+            else:
+                self._worker = _configured_worker(self._worker_id, pid)
+            self._last_ms = 0
+            self._sequence = 0
+
+        now = time.time_ns() // 1_000_000
+        if now > self._last_ms:  # 时钟回拨时继续使用上一次的时间戳
+            self._last_ms = now
+            self._sequence = 0
+        else:
+            self._sequence += 1
+            if self._sequence > MAX_SEQUENCE:  # 同一毫秒内序号用完, 借用下一毫秒
+                self._last_ms += 1
+                self._sequence = 0
+        return self._last_ms, self._sequence
+
+    def _make(self, timestamp: int, sequence: int, length: int) -> str:
+        value = (timestamp << WORKER_BITS) | self._worker
+        value = (value << SEQUENCE_BITS) | sequence
+        value = (value << RANDOM_BITS) | secrets.randbits(RANDOM_BITS)
+        sn = _encode(value, SN_LENGTH)
+        if length > SN_LENGTH:  # 超出部分使用随机字符
+            sn += "".join(secrets.choice(ALPHABET) for _ in range(length - SN_LENGTH))
+        return sn
+
+    def generate(self, length: int = SN_LENGTH) -> str:
+        """生成一个sn码
+
+        :param length: sn码长度, 最低 18 位
+        :return: sn码
+        """
+        with self._lock:
+            timestamp, sequence = self._next()
+            return self._make(timestamp, sequence, max(SN_LENGTH, length))
+
+    def generate_many(self, n: int, length: int = SN_LENGTH) -> list[str]:
+        """批量生成sn码, 结果按生成顺序排列
+
+        :param n: 数量
+        :param length: sn码长度, 最低 18 位
+        :return: sn码列表
+        """
+        length = max(SN_LENGTH, length)
+        with self._lock:
+            return [self._make(*self._next(), length) for _ in range(n)]
+
+
+sn_generator = SNGenerator()
@@ -39,12 +39,9 @@ class View(GetView):
         tk: str = Header(None, description="登录token", alias=FAP_TOKEN_TAG),
         sn: str = Path(..., description="文件sn码"),
     ):
-        rst = await MediaManager.download([sn])
+        rst = await MediaManager.get_files([sn])
         if not rst:
             return View.make_code(StatusCodeEnum.请求不存在)
-        file_byte, file_name, file_type = rst[0]
-        
-        if file_type.startswith("image"):
-            return Response.img(file_byte, file_type)
-        else:
-            return Response.download(file_byte, file_name)
\ No newline at end of file
+        file_path, file_name, file_type, file_hash = rst[0]
+
+        return Response.file(file_path, file_hash, file_name, file_type)
\ No newline at end of file
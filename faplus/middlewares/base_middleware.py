@@ -0,0 +1,56 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : base_middleware.py
+# Time       : 2025-04-02 10:12:45
+# Author     : lyx
+# version    : python 3.11
+# Description: 纯ASGI中间件基类
+"""
+from typing import Optional
+
+from fastapi import Request, Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class BaseMiddleware(object):
+    """纯ASGI(scope/receive/send)中间件基类
+
+    与 BaseHTTPMiddleware 不同，不会为每个请求创建额外的任务，也不会包装响应体流。
+    子类实现 process_request 即可：返回 Response 时直接响应，返回 None 时继续向下调用。
+    match 用于声明哪些路径需要执行 process_request，只能依赖路径本身。
+    需要处理响应的中间件可以直接重写 __call__。
+    非 http 请求(websocket, lifespan)直接透传。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        response = await self.process_request(request)
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    def match(self, path: str) -> bool:
+        """该路径是否需要执行 process_request
+
+        :param path: 请求路径
+        :return: 默认所有路径都需要执行
+        """
+        return True
+
+    async def process_request(self, request: Request) -> Optional[Response]:
+        """请求预处理
+
+        :param request: 请求对象, request.state 与后续中间件以及视图共享
+        :return: Response 直接响应; None 继续调用下一个中间件
+        """
+        return None
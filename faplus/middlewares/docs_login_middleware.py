@@ -9,16 +9,18 @@
 """
 import logging
 import base64
+from typing import Optional
 
 from fastapi import Request, Response, HTTPException
 from fastapi.responses import RedirectResponse
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.responses import JSONResponse
 from starlette.status import HTTP_401_UNAUTHORIZED
 
 from faplus.core import settings
 from faplus.auth.utils import user_util
 from faplus.utils import token_util
+from faplus.utils.path_util import path_classifier, PathCategoryEnum
+from faplus.middlewares.base_middleware import BaseMiddleware
 
 FAP_DOCS_URL = settings.FAP_DOCS_URL
 FAP_REDOC_URL = settings.FAP_REDOC_URL
@@ -28,17 +30,15 @@ FAP_TOKEN_TAG = settings.FAP_TOKEN_TAG
 
 logger = logging.getLogger(__package__)
 
-class DocsLoginMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        path = request.url.path
-        if not path.startswith(FAP_DOCS_URL) and not path.startswith(FAP_REDOC_URL) and not path.startswith(FAP_OPENAPI_URL):
-            return await call_next(request)
-        
+class DocsLoginMiddleware(BaseMiddleware):
+    def match(self, path: str) -> bool:
+        return PathCategoryEnum.docs in path_classifier.classify(path)
+
+    async def process_request(self, request: Request) -> Optional[Response]:
+        path = request.scope["path"]
         tk = request.cookies.get(FAP_TOKEN_TAG)
         if tk and await token_util.verify_token(tk):
-            return await call_next(request)
+            return None
         
         # 提取Authorization头部
         auth_header = request.headers.get("Authorization")
@@ -8,44 +8,77 @@ Description: 日志中间件
 """
 
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from fastapi import Response
+from starlette.types import Message, Receive, Scope, Send
 import logging
 
 from faplus.utils import StatusCodeEnum, Response as ApiResponse
-from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_422_UNPROCESSABLE_ENTITY, HTTP_200_OK
+from faplus.middlewares.base_middleware import BaseMiddleware
+from starlette.status import (
+    HTTP_401_UNAUTHORIZED,
+    HTTP_422_UNPROCESSABLE_ENTITY,
+    HTTP_200_OK,
+    HTTP_206_PARTIAL_CONTENT,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+)
 
 logger = logging.getLogger(__package__)
 
+# 不需要转换的状态码, 206/416 用于文件的 Range 请求
+PASS_STATUS_CODES = frozenset({
+    HTTP_200_OK,
+    HTTP_206_PARTIAL_CONTENT,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+    HTTP_422_UNPROCESSABLE_ENTITY,
+})
+
+
+_CODE_MEMBERS = {member.value: member for member in StatusCodeEnum}  # {状态码: 枚举}
+
 
 def get_by_code(code: str):
     """根据状态码获取状态码名称
     :param code: 状态码
     :return: 枚举
     """
+    return _CODE_MEMBERS.get(code)
+
+
+def error_response(status_code: int) -> Response:
+    """将非正常的状态码转换为json响应
+
+    :param status_code: http状态码
+    :return: Response
+    """
+    error_enum = get_by_code(str(status_code))
+    if error_enum:
+        return ApiResponse.error(error_enum.value, error_enum.name)
+    return ApiResponse.error(str(status_code), "服务器错误")
+
+
+class ErrorStatusCodeMiddleware(BaseMiddleware):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        replaced = False  # 原响应是否已被替换
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal replaced
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if status_code in PASS_STATUS_CODES:
+                    await send(message)
+                    return
+                logger.error(f"Response: {status_code}")
+                replaced = True
+                await error_response(status_code)(scope, receive, send)
+                return
+            if replaced:  # 丢弃原响应的响应体
+                return
+            await send(message)
 
-    for _, member in StatusCodeEnum.__members__.items():
-        if member.value == code:
-            return member
-    return None
-
-
-class ErrorStatusCodeMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        res = await call_next(request)
-        status_code = res.status_code
-        if status_code in [HTTP_200_OK, HTTP_422_UNPROCESSABLE_ENTITY]:
-            return res
-        else:
-            logger.error(f"Response: {status_code}")
-            error_enum = get_by_code(str(status_code))
-            if error_enum:
-                data = ApiResponse.fail(error_enum.value, error_enum.name)
-            else:
-                data = ApiResponse.fail(str(status_code), "服务器错误")
-            return Response(
-                data.json(),
-                headers={"Content-Type": "application/json"},
-            )
+        await self.app(scope, receive, send_wrapper)
@@ -8,33 +8,46 @@ Description: 异常转json数据
 """
 
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.types import Message, Receive, Scope, Send
 import logging
 from fastapi.exceptions import ResponseValidationError
 from fastapi.responses import JSONResponse
 from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
 from faplus.view import Response as ApiResponse
+from faplus.middlewares.base_middleware import BaseMiddleware
 
 
 logger = logging.getLogger(__package__)
 
 
-class ExceptionToJsonResponseMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
+class ExceptionToJsonResponseMiddleware(BaseMiddleware):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_wrapper)
+            return
         except ResponseValidationError as e:
+            if response_started:  # 响应已经开始发送，无法再转换
+                raise
             logger.error("HTTP_422_UNPROCESSABLE_ENTITY", exc_info=True)
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=HTTP_422_UNPROCESSABLE_ENTITY,
                 content={"detail": e.errors()},
             )
         except Exception as e:
+            if response_started:
+                raise
             logger.error(f"", exc_info=True)
-            return Response(
-                ApiResponse.fail("500", "服务器错误").json(),
-                headers={"Content-Type": "application/json"},
-            )
+            response = ApiResponse.error("500", "服务器错误")
+        await response(scope, receive, send)
@@ -0,0 +1,123 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : fused_pipeline.py
+# Time       : 2025-04-03 09:41:27
+# Author     : lyx
+# version    : python 3.11
+# Description: 融合请求管道, 将多个只做请求预处理的中间件合并为一个ASGI调用
+"""
+import logging
+from functools import lru_cache
+from typing import Optional, Type
+
+from fastapi import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from faplus.core import settings
+from faplus.middlewares.base_middleware import BaseMiddleware
+from faplus.middlewares.logging_middleware import LoggingMiddleware, log_access
+
+logger = logging.getLogger(__package__)
+
+FAP_FUSED_PIPELINE_PLAN_SIZE = settings.FAP_FUSED_PIPELINE_PLAN_SIZE
+
+# 中间件配置: (中间件类, 初始化参数)
+MiddlewareItem = tuple[Type, Optional[dict]]
+
+
+def is_stage(middleware_cls: Type) -> bool:
+    """中间件是否可以作为管道的阶段: 继承 BaseMiddleware 且没有重写 __call__"""
+    return (
+        isinstance(middleware_cls, type)
+        and issubclass(middleware_cls, BaseMiddleware)
+        and middleware_cls.__call__ is BaseMiddleware.__call__
+    )
+
+
+class FusedPipelineMiddleware(object):
+    """融合请求管道
+
+    路径只读取一次、Request 只创建一次，根据路径计算出需要执行的阶段(结果按路径缓存)，
+    依次执行各阶段的 process_request，行为与逐个串联的中间件一致。
+    """
+
+    def __init__(self, app: ASGIApp, stages: list[MiddlewareItem], timer: bool = False) -> None:
+        """
+        :param app: 下游ASGI应用
+        :param stages: 阶段列表, 按执行顺序排列
+        :param timer: 是否输出访问日志(替代 LoggingMiddleware)
+        """
+        self.app = app
+        self.stages: tuple[BaseMiddleware, ...] = tuple(
+            middleware_cls(app, **(kwargs or {})) for middleware_cls, kwargs in stages
+        )
+        self.timer = timer
+        self.plan = lru_cache(maxsize=FAP_FUSED_PIPELINE_PLAN_SIZE)(self._plan)
+
+    def _plan(self, path: str) -> tuple[BaseMiddleware, ...]:
+        """路径需要执行的阶段"""
+        return tuple(stage for stage in self.stages if stage.match(path))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self.timer:
+            await log_access(self.run, scope, receive, send)
+            return
+        await self.run(scope, receive, send)
+
+    async def run(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stages = self.plan(scope["path"])
+        if stages:
+            request = Request(scope, receive)
+            for stage in stages:
+                response = await stage.process_request(request)
+                if response is not None:
+                    await response(scope, receive, send)
+                    return
+
+        await self.app(scope, receive, send)
+
+
+def fuse(middlewares: list[MiddlewareItem]) -> list[MiddlewareItem]:
+    """将连续的阶段中间件合并为 FusedPipelineMiddleware
+
+    middlewares 与 FAP_MIDDLEWARE_CLASSES 顺序相同(越靠后越先执行)，
+    无法合并的中间件保持原位置。连续段中的 LoggingMiddleware 由管道的访问日志代替，
+    计时范围为整个管道及其下游。
+
+    :param middlewares: [(中间件类, 初始化参数)]
+    :return: 合并后的中间件列表
+    """
+    fused: list[MiddlewareItem] = []
+    run: list[MiddlewareItem] = []
+
+    def flush():
+        if not run:
+            return
+        stages = [item for item in run if is_stage(item[0])]
+        timer = len(stages) != len(run)
+        if len(stages) == 1 and not timer:  # 只有一个阶段, 无需合并
+            fused.append(stages[0])
+        elif stages:
+            # 注册顺序与执行顺序相反
+            fused.append((FusedPipelineMiddleware, {"stages": stages[::-1], "timer": timer}))
+            logger.debug("fused pipeline: %s, timer: %s", [cls.__name__ for cls, _ in stages[::-1]], timer)
+        else:
+            fused.extend(run)
+        run.clear()
+
+    for middleware_cls, kwargs in middlewares:
+        if is_stage(middleware_cls) or (
+            isinstance(middleware_cls, type) and issubclass(middleware_cls, LoggingMiddleware) and not kwargs
+        ):
+            run.append((middleware_cls, kwargs))
+        else:
+            flush()
+            fused.append((middleware_cls, kwargs))
+    flush()
+
+    return fused
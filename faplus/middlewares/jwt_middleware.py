@@ -7,20 +7,21 @@ Date: 2024/11/19 15:56:19
 Description: 登录中间件
 """
 import logging
-from typing import Union, Callable, Dict
+from typing import Union, Callable, Dict, Optional
 
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
 from faplus.utils import (
     StatusCodeEnum,
     settings,
     Response as ApiResponse
 )
-from faplus.utils import token_util
+from faplus.utils import token_util, span_util
+from faplus.utils.principal_util import principal_cache
 from faplus.auth.utils import user_util, guest_util
 from faplus.cache import cache
 from faplus import const
+from faplus.middlewares.base_middleware import BaseMiddleware
 
 logger = logging.getLogger(__package__)
 
@@ -56,50 +57,53 @@ def get_token(request: Request) -> str | None:
         logger.error("token获取失败", exc_info=True)
 
 
-class JwtMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
+class JwtMiddleware(BaseMiddleware):
+    async def process_request(self, request: Request) -> Optional[Response]:
         state = request.state
-        if not state.is_static and not state.is_whitelist:            
-            # 获取header中的token
-            token = get_token(request)
-            payload = await token_util.verify_token(token)
-            if not payload:
-                logger.error("token验证失败")
-                error_code = StatusCodeEnum.用户未登录
-                return Response(
-                    ApiResponse.fail(error_code.value, error_code.name).json(),
-                    headers={"Content-Type": "application/json"},
-                )
+        if not state.is_static and not state.is_whitelist:
+            with span_util.span("auth"):
+                return await self.authenticate(request)
 
-            is_gest = payload.get("is_gest")
-            if is_gest:
-                gest_username = payload.get("username")
-                user = GUEST_USER_DICT.get(gest_username)
-                if not user:
-                    logger.error(f"GestUser:{gest_username}不存在")
-                    error_code = StatusCodeEnum.TOKEN无效
-                    return Response(
-                        ApiResponse.fail(error_code.value, error_code.name).json(),
-                        headers={"Content-Type": "application/json"},
-                    )
-                user_dict = user.to_dict()
-            else:
-                try:
-                    user_dict = await user_util.get_user_info(id=payload.get("uid"))
-                except Exception:
-                    logger.debug("", exc_info=True)
-                    user_dict = None
-                if not user_dict:
-                    logger.error("TOKEN无效")
-                    error_code = StatusCodeEnum.TOKEN无效
-                    return Response(
-                        ApiResponse.fail(error_code.value, error_code.name).json(),
-                        headers={"Content-Type": "application/json"},
-                    )
+    async def authenticate(self, request: Request) -> Optional[Response]:
+        """校验token并将用户信息保存到 request.state"""
+        # 获取header中的token
+        token = get_token(request)
+
+        # 进程内缓存命中时无需访问缓存以及解密
+        principal = principal_cache.get(token) if token else None
+        if principal:
+            payload, user_dict = principal
             request.state.user_info = user_dict
             request.state.uid = user_dict["id"]
-            request.state.is_gest = is_gest
+            request.state.is_gest = payload.get("is_gest")
+            return None
+
+        payload = await token_util.verify_token(token)
+        if not payload:
+            logger.error("token验证失败")
+            error_code = StatusCodeEnum.用户未登录
+            return ApiResponse.error(error_code.value, error_code.name)
 
-        return await call_next(request)
+        is_gest = payload.get("is_gest")
+        if is_gest:
+            gest_username = payload.get("username")
+            user = GUEST_USER_DICT.get(gest_username)
+            if not user:
+                logger.error(f"GestUser:{gest_username}不存在")
+                error_code = StatusCodeEnum.TOKEN无效
+                return ApiResponse.error(error_code.value, error_code.name)
+            user_dict = user.to_dict()
+        else:
+            try:
+                user_dict = await user_util.get_user_info(id=payload.get("uid"))
+            except Exception:
+                logger.debug("", exc_info=True)
+                user_dict = None
+            if not user_dict:
+                logger.error("TOKEN无效")
+                error_code = StatusCodeEnum.TOKEN无效
+                return ApiResponse.error(error_code.value, error_code.name)
+        principal_cache.set(token, payload, user_dict)
+        request.state.user_info = user_dict
+        request.state.uid = user_dict["id"]
+        request.state.is_gest = is_gest
@@ -8,25 +8,64 @@ Description: 日志中间件
 """
 
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 import logging
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from faplus.core import settings
-from faplus.utils import app_util
+from faplus.utils import json_util, span_util
+from faplus.middlewares.base_middleware import BaseMiddleware
 
 logger = logging.getLogger(__package__)
+access_logger = logging.getLogger("faplus.access")
+
+FAP_ACCESS_LOG = settings.FAP_ACCESS_LOG
+
+
+async def log_access(app: ASGIApp, scope: Scope, receive: Receive, send: Send) -> None:
+    """调用 app 并输出一行 json 格式的访问日志
+
+    包含请求方法、路径、状态码、响应体字节数、总耗时以及各阶段(auth、cache、db 等)的累计耗时与次数, 耗时单位为毫秒。
+    状态码与字节数为实际发送给客户端的响应, 下游抛出异常且未发送响应时状态码记为 500。
+    """
+    if not FAP_ACCESS_LOG or not access_logger.isEnabledFor(logging.INFO):
+        await app(scope, receive, send)
+        return
+
+    status = 500
+    sent = 0
+
+    async def send_wrapper(message: Message) -> None:
+        nonlocal status, sent
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+        await send(message)
+
+    token = span_util.start()
+    start = time.perf_counter()
+    try:
+        await app(scope, receive, send_wrapper)
+    finally:
+        duration = time.perf_counter() - start
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "bytes": sent,
+            "duration_ms": round(duration * 1000, 3),
+        }
+        for name, (total, count) in span_util.finish(token).items():
+            record[f"{name}_ms"] = round(total * 1000, 3)
+            record[f"{name}_count"] = count
+        access_logger.info(json_util.dumps(record).decode())
+
 
-DEBUG = getattr(settings, "DEBUG", True)
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        # 请求前的日志记录
-        method = request.method
-        path = request.url.path
-        if DEBUG:
-            with app_util.Timer(f"{method} {path}"):
-                return await call_next(request)
-        return await call_next(request)
+class LoggingMiddleware(BaseMiddleware):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            await log_access(self.app, scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -9,39 +9,23 @@
 """
 import logging
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from fastapi import Request
 
-from faplus import const
-from faplus.core import settings
-from faplus.cache import cache
+from faplus.middlewares.base_middleware import BaseMiddleware
+from faplus.utils.path_util import path_classifier, PathCategoryEnum
 
 
 logger = logging.getLogger(__package__)
 
 
-FAP_STATIC_URL = settings.FAP_STATIC_URL
-
-
 async def is_static(url: str) -> bool:
-    """判断是否在白名单中"""
-    if await cache.get(url):
-        # 增加对过期时间的缓存
-        await cache.set(const.STATIC_CK.format(url=url), "1", 60 * 60 * 24)
-        return True
-    if url.startswith(FAP_STATIC_URL):
-        await cache.set(const.STATIC_CK.format(url=url), "1", 60 * 60 * 24)
-        return True
-    return False
-
+    """判断是否是静态资源(纯内存判断, 不访问缓存)"""
+    return PathCategoryEnum.static in path_classifier.classify(url)
 
-class StaticMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
 
-        path = request.url.path
+class StaticMiddleware(BaseMiddleware):
+    async def process_request(self, request: Request) -> None:
 
-        request.state.is_static = await is_static(path)
+        path = request.scope["path"]
 
-        return await call_next(request)
+        request.state.is_static = PathCategoryEnum.static in path_classifier.classify(path)
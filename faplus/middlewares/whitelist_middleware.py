@@ -9,45 +9,23 @@
 """
 import logging
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from fastapi import Request
 
-from faplus import const
-from faplus.core import settings
-from faplus.cache import cache
+from faplus.middlewares.base_middleware import BaseMiddleware
+from faplus.utils.path_util import path_classifier, PathCategoryEnum
 
 
 logger = logging.getLogger(__package__)
 
-FAP_JWT_WHITES = settings.FAP_JWT_WHITES
-FAP_LOGIN_URL = settings.FAP_LOGIN_URL
-
-# 白名单 + 登录地址
-whitelist = FAP_JWT_WHITES + [
-    FAP_LOGIN_URL
-]
-
 
 async def is_whitelist(url: str) -> bool:
-    """判断是否在白名单中"""
-    if await cache.get(url):
-        # 增加对过期时间的缓存
-        await cache.set(const.WHITELIST_CK.format(url=url), "1", 60 * 60 * 24)
-        return True
-    for w in whitelist:
-        if w == url or (w.endswith("*") and url.startswith(w[:-1])):
-            await cache.set(const.WHITELIST_CK.format(url=url), "1", 60 * 60 * 24)
-            return True
-    return False
-
+    """判断是否在白名单中(纯内存判断, 不访问缓存)"""
+    return PathCategoryEnum.whitelist in path_classifier.classify(url)
 
-class WhitelistMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
 
-        path = request.url.path
+class WhitelistMiddleware(BaseMiddleware):
+    async def process_request(self, request: Request) -> None:
 
-        request.state.is_whitelist = await is_whitelist(path)
+        path = request.scope["path"]
 
-        return await call_next(request)
+        request.state.is_whitelist = PathCategoryEnum.whitelist in path_classifier.classify(path)
@@ -11,8 +11,10 @@ import inspect
 import logging
 
 from tortoise import Model
+from tortoise.backends.base.client import BaseDBAsyncClient
 
 from faplus.core import settings
+from faplus.utils import span_util
 
 logger = logging.getLogger("FAPlus")
 
@@ -64,6 +66,26 @@ def get_models():
     return models
 
 
+# 需要统计耗时的数据库操作
+DB_SPAN_METHODS = ("execute_insert", "execute_many", "execute_query", "execute_query_dict", "execute_script")
+
+
+def instrument_client(client_cls: type[BaseDBAsyncClient]):
+    """数据库操作的耗时计入请求的 db 阶段
+
+    包装 client 类及其子类(如事务)中定义的数据库操作, 重复调用不会重复包装
+    :param client_cls: 数据库 client 类
+    """
+    classes = [client_cls]
+    for cls in classes:
+        classes.extend(sub for sub in cls.__subclasses__() if sub not in classes)
+        for name in DB_SPAN_METHODS:
+            method = cls.__dict__.get(name)
+            if method is None or hasattr(method, "__fap_span__"):
+                continue
+            setattr(cls, name, span_util.traced("db")(method))
+
+
 # Tortoise ORM 配置
 TORTOISE_ORM = {
     "connections": {
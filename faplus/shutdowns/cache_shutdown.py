@@ -0,0 +1,17 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filename: cache_shutdown.py
+Author: lvyuanxiang
+Date: 2025/04/09 11:06:14
+Description: 关闭所有缓存后端的连接
+"""
+from faplus.cache import cache
+
+
+def cache_close_event(**kwargs):
+
+    async def do():
+        await cache.close()
+
+    return do
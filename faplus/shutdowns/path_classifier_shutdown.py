@@ -0,0 +1,25 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : path_classifier_shutdown.py
+# Time       : 2025-04-03 17:25:48
+# Author     : lyx
+# version    : python 3.11
+# Description: 关机时输出路径分类器的缓存命中率
+"""
+import logging
+
+logger = logging.getLogger(__package__)
+
+
+def path_classifier_stats_event(**kwargs):
+
+    async def do():
+        from faplus.utils.path_util import path_classifier
+
+        stats = path_classifier.stats()
+        logger.info(
+            "path classifier: hits={hits}, misses={misses}, size={size}/{max_size}, hit_rate={hit_rate:.2%}".format(**stats)
+        )
+
+    return do
@@ -6,9 +6,9 @@ Author: lvyuanxiang
 Date: 2025/01/03 14:33:22
 Description: tortoise orm启动器
 """
-from tortoise import Tortoise
+from tortoise import Tortoise, connections
 
-from faplus.orm.tortoise import GENERATE_SCHEMAS, TORTOISE_ORM, ENGINE
+from faplus.orm.tortoise import GENERATE_SCHEMAS, TORTOISE_ORM, ENGINE, instrument_client
 
 
 def tortoise_orm_init_event(**kwargs):
@@ -19,6 +19,10 @@ def tortoise_orm_init_event(**kwargs):
             # 初始化 Tortoise ORM
             await Tortoise.init(config=TORTOISE_ORM)
 
+            # 数据库耗时计入访问日志
+            for conn in connections.all():
+                instrument_client(type(conn))
+
             # 生成数据库表（如果需要）
             if GENERATE_SCHEMAS:
                 await Tortoise.generate_schemas()
@@ -1,10 +1,119 @@
 import io
+import mimetypes
+import os
 import urllib.parse
+from email.utils import parsedate_to_datetime
 from typing import Any
 
-from fastapi.responses import StreamingResponse, Response as FAResponse
+from fastapi.responses import FileResponse, StreamingResponse, Response as FAResponse
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
 from faplus.utils.config_util import StatusCodeEnum
+from faplus.utils import json_util
 from faplus.schema import ResponseSchema
+from pydantic import BaseModel
+
+
+_error_bodies: dict[tuple[str, str], bytes] = {}  # 预先序列化的错误响应体
+_INLINE_TYPES = ("image", "video", "audio")  # 在浏览器中直接显示/播放的文件类型
+
+
+def _error_body(code: str, msg: str) -> bytes:
+    return json_util.dumps({"code": code, "msg": msg, "data": None})
+
+
+def register_error(code: str, msg: str) -> None:
+    """预先序列化错误响应体, 启动时由 router_loader 调用
+
+    :param code: 状态码
+    :param msg: 状态信息
+    """
+    _error_bodies[(code, msg)] = _error_body(code, msg)
+
+
+def register_status_codes() -> None:
+    """预先序列化 StatusCodeEnum 中所有状态码的错误响应体"""
+    for member in StatusCodeEnum:
+        value = member.value
+        if isinstance(value, str):
+            register_error(value, member.name)
+        else:
+            register_error(*value)
+
+
+class ErrorResponse(FAResponse):
+    """错误响应, 响应体为 {code, msg, data} 格式的json, 已注册的状态码直接使用预先序列化的响应体"""
+
+    media_type = "application/json"
+
+    def __init__(self, code: str, msg: str) -> None:
+        self.code = code
+        self.msg = msg
+        body = _error_bodies.get((code, msg))
+        if body is None:  # 带参数的消息或未注册的状态码
+            body = _error_body(code, msg)
+        super().__init__(content=body)
+
+
+class HashFileResponse(FileResponse):
+    """按路径发送文件的响应, ETag 为文件内容的 hash
+
+    支持 Range/206 断点续传, If-None-Match / If-Modified-Since 命中时返回 304;
+    服务器支持 ASGI pathsend 扩展时由服务器直接发送文件(如 sendfile), 否则分块读取发送。
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, file_hash: str, stat_result: os.stat_result = None, **kwargs) -> None:
+        """
+        :param path: 文件路径
+        :param file_hash: 文件内容的 hash, 作为 ETag
+        :param stat_result: 文件的 os.stat 结果, defaults to None 在初始化时获取
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        headers["etag"] = f'"{file_hash}"'
+        super().__init__(path, headers=headers, stat_result=stat_result or os.stat(path), **kwargs)
+
+    def _not_modified(self, headers: Headers) -> bool:
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            etag = self.headers["etag"]
+            return any(tag.strip() in ("*", etag, f"W/{etag}") for tag in if_none_match.split(","))
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(self.stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _is_full(self, scope: Scope, headers: Headers) -> bool:
+        """是否返回完整的文件内容"""
+        if scope["method"].upper() == "HEAD":
+            return False
+        http_range = headers.get("range")
+        http_if_range = headers.get("if-range")
+        return http_range is None or (http_if_range is not None and not self._should_use_range(http_if_range))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers = Headers(scope=scope)
+        if self._not_modified(headers):
+            not_modified = FAResponse(
+                status_code=304,
+                headers={key: self.headers[key] for key in ("etag", "last-modified") if key in self.headers},
+            )
+            await not_modified(scope, receive, send)
+            return
+
+        # 完整响应时交给服务器发送文件
+        if "http.response.pathsend" in scope.get("extensions", {}) and self._is_full(scope, headers):
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            if self.background is not None:
+                await self.background()
+            return
+
+        await super().__call__(scope, receive, send)
 
 
 class Response(object):
@@ -18,6 +127,35 @@ class Response(object):
         """
         return ResponseSchema(code=StatusCodeEnum.请求成功, msg=msg, data=data)
 
+    @staticmethod
+    def fast_ok(msg: str = None, data: Any = None, response_model: type[BaseModel] = None) -> FAResponse:
+        """返回正常响应, 直接序列化为 json bytes, 不再经过 fastapi 的 response_model 处理
+
+        :param msg: 消息, defaults to None
+        :param data: 响应的数据, defaults to None
+        :param response_model: 响应模型, 指定时按模型校验并输出(过滤未声明的字段、使用别名),
+            不一致时抛出 pydantic.ValidationError, defaults to None 原样输出
+        :return: FAResponse
+        """
+        content = {"code": StatusCodeEnum.请求成功.value, "msg": msg, "data": data}
+        if response_model is None:
+            body = json_util.dumps(content)
+        else:
+            # pydantic-core 直接输出 json bytes, 与 model_dump(mode="json", by_alias=True) 的结果一致
+            model = response_model.model_validate(content, from_attributes=True)
+            body = response_model.__pydantic_serializer__.to_json(model, by_alias=True)
+        return FAResponse(content=body, media_type="application/json")
+
+    @staticmethod
+    def error(code: str, msg: str) -> ErrorResponse:
+        """返回错误响应, 使用预先序列化的响应体
+
+        :param code: 状态码
+        :param msg: 状态信息
+        :return: ErrorResponse
+        """
+        return ErrorResponse(code, msg)
+
     @staticmethod
     def fail(code: str, msg: str, data: Any = None):
         return ResponseSchema(code=code, msg=msg, data=data)
@@ -38,3 +176,24 @@ class Response(object):
     @staticmethod
     def img(file: bytes, content_type: str):
         return FAResponse(content=file, media_type=content_type)
+
+    @staticmethod
+    def file(path: str, file_hash: str, file_name: str = None, content_type: str = None) -> HashFileResponse:
+        """按路径返回文件, 不读取文件内容到内存, 支持 Range 断点续传
+
+        :param path: 文件路径
+        :param file_hash: 文件内容的 hash, 作为 ETag
+        :param file_name: 下载的文件名, defaults to None
+        :param content_type: 文件类型, 图片、视频、音频在浏览器中直接显示/播放, 其他类型作为附件下载,
+            defaults to None 根据文件名推断
+        :return: HashFileResponse
+        """
+        media_type = content_type or mimetypes.guess_type(file_name or path)[0] or "application/octet-stream"
+        inline = media_type.split("/", 1)[0] in _INLINE_TYPES
+        return HashFileResponse(
+            path,
+            file_hash,
+            media_type=media_type,
+            filename=file_name,
+            content_disposition_type="inline" if inline else "attachment",
+        )
@@ -26,7 +26,7 @@ class Timer:
         # 在退出 with 代码块时计算执行时间
         self.end_time = time.time()
         self.duration = self.end_time - self.start_time
-        logger.debug(f"{self.target} Execution time: {self.duration} seconds")
+        logger.debug("%s Execution time: %s seconds", self.target, self.duration)
         return False
 
 def timer(func):
@@ -36,7 +36,7 @@ def timer(func):
         result = func(*args, **kwargs)  # 执行原始函数
         end_time = time.time()  # 记录结束时间
         duration = end_time - start_time
-        logger.debug(f"Execution time of {func.__name__}: {duration:.4f} seconds")
+        logger.debug("Execution time of %s: %.4f seconds", func.__name__, duration)
         return result
     return wrapper
 
@@ -0,0 +1,36 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filename: json_util.py
+Author: lvyuanxiang
+Date: 2025/04/16 10:41:27
+Description: json序列化工具, 安装了 orjson 时使用 orjson, 否则使用标准库 json
+"""
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """无法直接序列化的对象(pydantic模型、Decimal等)交给 fastapi 的 jsonable_encoder"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return jsonable_encoder(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化为 json bytes, 格式与 fastapi JSONResponse 一致(不转义非ASCII字符, 无多余空格)
+
+    :param obj: 需要序列化的对象
+    :return: json bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
@@ -0,0 +1,136 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filename: path_util.py
+Author: lvyuanxiang
+Date: 2025/04/03 15:02:36
+Description: 请求路径分类工具, 启动时根据配置构建前缀树, 一次遍历得到路径的所有分类
+"""
+from functools import lru_cache
+
+from faplus import const
+from faplus.core import settings
+
+PathCategoryEnum = const.PathCategoryEnum
+
+FAP_PATH_CLASSIFIER_CACHE_SIZE = settings.FAP_PATH_CLASSIFIER_CACHE_SIZE
+
+
+class _TrieNode(object):
+    __slots__ = ("children", "prefix_mask", "exact_mask")
+
+    def __init__(self) -> None:
+        self.children: dict[str, "_TrieNode"] = {}
+        self.prefix_mask = 0  # 以该节点为前缀的路径具有的分类
+        self.exact_mask = 0  # 恰好在该节点结束的路径具有的分类
+
+
+class PathClassifier(object):
+    """路径分类器
+
+    前缀、完全匹配规则存放在前缀树中，后缀规则存放在反向前缀树中，
+    分类耗时与路径长度成正比，不涉及任何缓存I/O；最近的路径结果保存在有界LRU中，
+    cache_size 为 0 时不缓存。
+    """
+
+    def __init__(self, cache_size: int = FAP_PATH_CLASSIFIER_CACHE_SIZE) -> None:
+        self._prefix_root = _TrieNode()
+        self._suffix_root = _TrieNode()
+        self.cache_size = cache_size or 0
+        self.classify = lru_cache(maxsize=self.cache_size)(self._classify)
+
+    @staticmethod
+    def _insert(root: _TrieNode, key: str) -> _TrieNode:
+        node = root
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+        return node
+
+    def add_prefix(self, prefix: str, category: PathCategoryEnum) -> None:
+        """以 prefix 开头的路径属于 category, 空字符串匹配所有路径(保存在根节点)"""
+        if prefix is None:
+            return
+        self._insert(self._prefix_root, prefix).prefix_mask |= category
+        self.classify.cache_clear()
+
+    def add_exact(self, path: str, category: PathCategoryEnum) -> None:
+        """与 path 完全相同的路径属于 category"""
+        if path is None:
+            return
+        self._insert(self._prefix_root, path).exact_mask |= category
+        self.classify.cache_clear()
+
+    def add_suffix(self, suffix: str, category: PathCategoryEnum) -> None:
+        """以 suffix 结尾的路径属于 category, 空字符串匹配所有路径(保存在根节点)"""
+        if suffix is None:
+            return
+        self._insert(self._suffix_root, suffix[::-1]).prefix_mask |= category
+        self.classify.cache_clear()
+
+    def _classify(self, path: str) -> PathCategoryEnum:
+        mask = self._prefix_root.prefix_mask | self._suffix_root.prefix_mask  # 空前缀/后缀
+
+        node = self._prefix_root
+        for ch in path:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            mask |= node.prefix_mask
+        else:
+            mask |= node.exact_mask
+
+        node = self._suffix_root
+        for ch in reversed(path):
+            node = node.children.get(ch)
+            if node is None:
+                break
+            mask |= node.prefix_mask
+
+        return PathCategoryEnum(mask)
+
+    def cache_info(self):
+        """LRU命中统计, 与 functools.lru_cache 的 cache_info 相同
+
+        :return: CacheInfo(hits, misses, maxsize, currsize)
+        """
+        return self.classify.cache_info()
+
+    def stats(self) -> dict:
+        """LRU命中统计, 运行时可随时调用(如在监控接口中返回 path_classifier.stats())
+
+        :return: {"hits", "misses", "size", "max_size", "hit_rate"}
+        """
+        info = self.cache_info()
+        total = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+            "hit_rate": info.hits / total if total else 0.0,
+        }
+
+
+def build_classifier() -> PathClassifier:
+    """根据配置构建路径分类器"""
+    classifier = PathClassifier()
+
+    # 白名单 + 登录地址
+    for url in settings.FAP_JWT_WHITES + [settings.FAP_LOGIN_URL]:
+        if url.endswith("*"):
+            classifier.add_prefix(url[:-1], PathCategoryEnum.whitelist)
+        else:
+            classifier.add_exact(url, PathCategoryEnum.whitelist)
+
+    classifier.add_prefix(settings.FAP_STATIC_URL, PathCategoryEnum.static)
+
+    for url in (settings.FAP_DOCS_URL, settings.FAP_REDOC_URL, settings.FAP_OPENAPI_URL):
+        classifier.add_prefix(url, PathCategoryEnum.docs)
+
+    classifier.add_prefix(settings.FAP_MEDIA_URL, PathCategoryEnum.media)
+    classifier.add_suffix(settings.FAP_GEST_USERS_LOGIN_URL, PathCategoryEnum.guest_login)
+
+    return classifier
+
+
+path_classifier = build_classifier()
@@ -0,0 +1,136 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filename: principal_util.py
+Author: lvyuanxiang
+Date: 2025/04/07 10:16:52
+Description: 进程内认证主体缓存(L1), 缓存 token 解析结果与用户信息, 避免每个请求访问远程缓存和解密
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from faplus.core import settings
+
+FAP_PRINCIPAL_CACHE_TTL = settings.FAP_PRINCIPAL_CACHE_TTL
+FAP_PRINCIPAL_CACHE_SIZE = settings.FAP_PRINCIPAL_CACHE_SIZE
+
+
+class _Principal(object):
+    __slots__ = ("expire_at", "payload", "user_dict", "uid")
+
+    def __init__(self, expire_at: float, payload: dict, user_dict: dict) -> None:
+        self.expire_at = expire_at
+        self.payload = payload
+        self.user_dict = user_dict
+        self.uid = user_dict.get("id")
+
+
+class PrincipalCache(object):
+    """认证主体缓存
+
+    key 为 token 的 sha256 摘要，有效期取 ttl 与 token 剩余有效期中较小者，
+    超过 max_size 时淘汰最久未使用的条目。只在当前进程有效，
+    其他进程的数据最多在 ttl 秒后失效，因此 ttl 应设置得较短。
+    """
+
+    def __init__(self, ttl: int = FAP_PRINCIPAL_CACHE_TTL, max_size: int = FAP_PRINCIPAL_CACHE_SIZE) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._store: OrderedDict[bytes, _Principal] = OrderedDict()
+        self._uid_index: dict[str, set[bytes]] = {}  # uid -> token摘要
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.ttl and self.max_size)
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[tuple[dict, dict]]:
+        """获取缓存的认证主体
+
+        :param token: token
+        :return: (payload, user_dict) 或 None
+        """
+        if not self.enabled:
+            return None
+        key = self._digest(token)
+        principal = self._store.get(key)
+        if principal is None:
+            self.misses += 1
+            return None
+        if principal.expire_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._store.move_to_end(key)
+        self.hits += 1
+        return principal.payload, dict(principal.user_dict)
+
+    def set(self, token: str, payload: dict, user_dict: dict) -> None:
+        """缓存认证主体
+
+        :param token: token
+        :param payload: token解析结果
+        :param user_dict: 用户信息
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = min(ttl, exp - time.time())
+            if ttl <= 0:
+                return
+
+        key = self._digest(token)
+        self._remove(key)
+        principal = _Principal(time.monotonic() + ttl, payload, dict(user_dict))
+        self._store[key] = principal
+        self._uid_index.setdefault(str(principal.uid), set()).add(key)
+
+        while len(self._store) > self.max_size:
+            self._remove(next(iter(self._store)))
+
+    def _remove(self, key: bytes) -> None:
+        principal = self._store.pop(key, None)
+        if principal is None:
+            return
+        uid = str(principal.uid)
+        keys = self._uid_index.get(uid)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._uid_index[uid]
+
+    def invalidate_token(self, token: str) -> None:
+        """token被注销时调用"""
+        if token:
+            self._remove(self._digest(token))
+
+    def invalidate_uid(self, uid) -> None:
+        """用户信息变更或登出时调用, 删除该用户的所有缓存"""
+        for key in list(self._uid_index.get(str(uid), ())):
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._store.clear()
+        self._uid_index.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._store),
+            "max_size": self.max_size,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+principal_cache = PrincipalCache()
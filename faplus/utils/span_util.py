@@ -0,0 +1,108 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Filename: span_util.py
+Author: lvyuanxiang
+Date: 2025/04/18 09:37:15
+Description: 请求内各阶段(认证、缓存、数据库等)的耗时统计, 通过 contextvar 在同一请求内共享
+
+用法::
+
+    with span_util.span("cache"):
+        await backend.get(key)
+
+不在请求内(没有调用 start)时 span 不做任何统计。同名阶段的耗时与次数累加, 同一任务内嵌套的同名阶段只统计最外层;
+不同阶段之间可能重叠(如认证阶段中访问缓存的耗时同时计入 auth 与 cache)。
+"""
+import functools
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+# {阶段名称: [累计耗时(秒), 次数]}, 同一请求内的所有任务共享同一个字典
+_spans: ContextVar[Optional[dict[str, list]]] = ContextVar("fap_spans", default=None)
+# 当前任务中正在统计的阶段
+_active: ContextVar[frozenset] = ContextVar("fap_active_spans", default=frozenset())
+
+
+class Span(object):
+    """统计一个阶段的耗时"""
+
+    __slots__ = ("name", "spans", "start", "token")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.spans = None
+        self.start = 0.0
+        self.token = None
+
+    def __enter__(self) -> "Span":
+        spans = _spans.get()
+        if spans is None:
+            return self
+        active = _active.get()
+        if self.name in active:  # 嵌套的同名阶段
+            return self
+        self.spans = spans
+        self.token = _active.set(active | {self.name})
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        spans = self.spans
+        if spans is not None:
+            duration = time.perf_counter() - self.start
+            _active.reset(self.token)
+            item = spans.get(self.name)
+            if item is None:
+                spans[self.name] = [duration, 1]
+            else:
+                item[0] += duration
+                item[1] += 1
+        return False
+
+
+def span(name: str) -> Span:
+    """统计阶段耗时的上下文管理器
+
+    :param name: 阶段名称, 如 auth, cache, db
+    :return: Span
+    """
+    return Span(name)
+
+
+def traced(name: str):
+    """统计异步函数耗时的装饰器
+
+    :param name: 阶段名称
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with Span(name):
+                return await func(*args, **kwargs)
+
+        wrapper.__fap_span__ = name
+        return wrapper
+
+    return decorator
+
+
+def start() -> Token:
+    """开始统计当前请求
+
+    :return: 用于 finish 的 token
+    """
+    return _spans.set({})
+
+
+def finish(token: Token) -> dict[str, list]:
+    """结束统计当前请求
+
+    :param token: start 返回的 token
+    :return: {阶段名称: [累计耗时(秒), 次数]}
+    """
+    spans = _spans.get()
+    _spans.reset(token)
+    return spans or {}
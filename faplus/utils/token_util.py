@@ -16,6 +16,8 @@ from faplus import const
 from faplus.core import settings
 from faplus.utils import time_util
 from faplus.cache import cache
+from faplus.cache.base_cache import CachePipeline
+from faplus.utils.principal_util import principal_cache
 
 
 SECRET_KEY = settings.FAP_SECRET_KEY
@@ -26,7 +28,14 @@ FAP_TOKEN_EXPIRE = settings.FAP_TOKEN_EXPIRE
 logger = logging.getLogger(__package__)
 
 
-async def create_token(data: dict, exp_seconds: Optional[int] = None):
+async def create_token(data: dict, exp_seconds: Optional[int] = None, pipe: Optional[CachePipeline] = None):
+    """创建token
+
+    :param data: token数据
+    :param exp_seconds: 过期时间(秒), 默认 FAP_TOKEN_EXPIRE
+    :param pipe: 缓存管道, 传入时激活命令加入管道, 由调用方统一执行
+    :return: token
+    """
     to_encode = data.copy()
     if exp_seconds:
         expire = time_util.add_seconds(time_util.now(), exp_seconds)
@@ -34,13 +43,14 @@ async def create_token(data: dict, exp_seconds: Optional[int] = None):
         expire = time_util.add_seconds(time_util.now(), FAP_TOKEN_EXPIRE)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    await cache.set(const.ACTIVATE_TOKEN_CK.format(tk=encoded_jwt), "1")
+    if pipe is not None:
+        pipe.set(const.ACTIVATE_TOKEN_CK.format(tk=encoded_jwt), "1")
+    else:
+        await cache.set(const.ACTIVATE_TOKEN_CK.format(tk=encoded_jwt), "1")
     return encoded_jwt
 
 
-async def verify_token(token: str | None) -> dict | None:
-    if not token:
-        return
+async def _verify_token(token: str) -> dict | None:
     if not await cache.get(const.ACTIVATE_TOKEN_CK.format(tk=token)):  # token 失效了
         return
     try:
@@ -48,3 +58,29 @@ async def verify_token(token: str | None) -> dict | None:
     except Exception:
         logger.error("", exc_info=True)
         return
+
+
+async def verify_token(token: str | None) -> dict | None:
+    """验证token, 同一token的并发验证只访问一次缓存
+
+    :param token: token
+    :return: token解析结果, 无效时返回 None
+    """
+    if not token:
+        return
+    return await cache.single_flight(const.ACTIVATE_TOKEN_CK.format(tk=token), lambda: _verify_token(token))
+
+
+async def revoke_token(token: str | None, pipe: Optional[CachePipeline] = None) -> None:
+    """注销token, 同时清除进程内的认证主体缓存
+
+    :param token: token
+    :param pipe: 缓存管道, 传入时删除命令加入管道, 由调用方统一执行
+    """
+    if not token:
+        return
+    principal_cache.invalidate_token(token)
+    if pipe is not None:
+        pipe.delete(const.ACTIVATE_TOKEN_CK.format(tk=token))
+    else:
+        await cache.delete(const.ACTIVATE_TOKEN_CK.format(tk=token))
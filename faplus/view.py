@@ -13,15 +13,18 @@ from enum import Enum
 
 from fastapi import Header, Request, Body, Query, Path, Form, File, UploadFile
 from fastapi.responses import Response as FAResponse
+from pydantic import ValidationError
 from tortoise.queryset import QuerySet
 
 from faplus.exceptions import FAPStatusCodeException
 from faplus.core import settings, StatusCodeEnum
+from faplus.logging import lazy
 from faplus.schema import ResponseSchema, ResponsePageSchema
-from faplus.utils.api_util import Response
+from faplus.utils.api_util import Response, ErrorResponse
 from .const import ViewStatusEnum
 
 FAP_TOKEN_TAG = settings.FAP_TOKEN_TAG
+FAP_FAST_JSON_RESPONSE = settings.FAP_FAST_JSON_RESPONSE
 
 logger = logging.getLogger(__package__)
 
@@ -63,10 +66,20 @@ class BaseView:
     status_codes = []  # 接口异常状态码(<code>, <msg>)
     view_status = ViewStatusEnum.define
 
+    # 响应缓存, 只对 GET 请求生效, 命中时不调用 api, 并支持 ETag / 304
+    response_cache = None  # 缓存时间(秒), None 表示不缓存
+    response_cache_vary_user = True  # 是否按用户区分缓存
+    response_cache_backend = "default"  # 缓存的backend
+    response_cache_control = None  # Cache-Control 响应头, 默认 "private, no-cache"(不区分用户时为 public)
+
+    # 快速json响应: 成功的结果按 response_model 校验后直接序列化为 json bytes(未声明的字段不输出),
+    # 不再经过 fastapi 的二次序列化; 与 response_model 不一致时记录错误并使用原来的方式
+    fast_json_response = FAP_FAST_JSON_RESPONSE
+
     @classmethod
     def make_code(
         cls, code: Union[str, Enum], msg_dict: Dict = None
-    ) -> ResponseSchema:
+    ) -> ErrorResponse:
         if isinstance(code, str):
             code = f"{cls.api_code}{code}"
             if code not in cls.code_dict:
@@ -84,14 +97,23 @@ class BaseView:
 
         if msg_dict:
             msg = msg.format(**msg_dict)
-        logger.warning(f"[make_code error]: {code}, msg: {msg}")
-        return Response.fail(code=code, msg=msg)
+        logger.warning("[make_code error]: %s, msg: %s", code, msg)
+        return Response.error(code=code, msg=msg)
 
     @staticmethod
     async def api():
         """抽象方法，需在子类中实现"""
         raise NotImplementedError("Subclasses should implement this method")
 
+    @classmethod
+    def _fast_response(cls, result) -> FAResponse | None:
+        """按 response_model 输出快速json响应, 数据与 response_model 不一致时返回 None, 交给 fastapi 处理"""
+        try:
+            return Response.fast_ok(data=result, response_model=cls.response_model)
+        except ValidationError:
+            logger.error(f"{cls.__module__} result does not match response_model, fast json response skipped", exc_info=True)
+            return None
+
     @classmethod
     def _api_wrapper(cls, code: Enum | tuple[str, str] = None):
         """api装饰器，能够帮助处理异常，以及返回值的处理"""
@@ -105,37 +127,41 @@ class BaseView:
 
                     # region ******************** 如果返回的是ResponseSchema直接返回 start ******************** #
                     if isinstance(result, ResponseSchema): 
-                        logger.debug(f"result: {result}")
+                        logger.debug("result: %s", lazy(result))
                         return result
                     # endregion ****************** 如果返回的是ResponseSchema直接返回 end ********************* #
 
                     # region ******************** 如果返回的是原生Response也直接返回 start ******************** #
                     if isinstance(result, FAResponse):
-                        logger.debug(f"result: {result}")
+                        logger.debug("result: %s", lazy(result))
                         return result
                     # endregion ****************** 如果返回的是原生Response也直接返回 end ********************* #
                     
                     # region ******************** 其他类型当OK处理 start ******************** #
+                    if cls.fast_json_response:
+                        response = cls._fast_response(result)
+                        if response is not None:
+                            return response
                     return Response.ok(data=result)
                     # endregion ****************** 其他类型OK处理 end ********************* #
                     
                 except FAPStatusCodeException as e:  # 通过异常类终止程序
-                    result = Response.fail(code=e.code, msg=e.msg)
-                    logger.error(f"[FAPStatusCodeException] result: {result}")
+                    result = Response.error(code=e.code, msg=e.msg)
+                    logger.error("[FAPStatusCodeException] code: %s, msg: %s", e.code, e.msg)
                     return result
                 except Exception as e:  # 其他异常终止的程序
                     if not code:
                         raise e  # 抛出异常的话，交给异常处理中间件处理，异常打印原则：**捕获自行打印，抛出上层打印**
 
                     if isinstance(code, StatusCodeEnum):
-                        result = Response.fail(code=code.value, msg=code.name)
+                        result = Response.error(code=code.value, msg=code.name)
                     elif isinstance(code, tuple):
                         result = cls.make_code(code=code[0])
                     else:
                         raise ValueError(
                             "code must be StatusCodeEnum or tuple(str, str)"
                         )
-                    logger.error(f"[Exception] result: {result}", exc_info=True)
+                    logger.error("[Exception] code: %s, msg: %s", result.code, result.msg, exc_info=True)
                     return result
 
             return wrapper
@@ -3,6 +3,8 @@ import json
 import logging
 from fastapi import WebSocket, WebSocketDisconnect
 
+from faplus.logging import lazy
+
 
 logger = logging.getLogger(__package__)
 
@@ -17,9 +19,9 @@ class UserBase:
             body = json.loads(msg)
             return body["code"], body["data"]
         except json.JSONDecodeError:
-            logger.error("[{user}] Invalid JSON msg: {msg}".format(user=self.user, msg=msg), exc_info=True)
+            logger.error("[%s] Invalid JSON msg: %s", self.user, lazy(msg), exc_info=True)
         except Exception:
-            logger.error("[{user}] ws load data error".format(user=self.user), exc_info=True)
+            logger.error("[%s] ws load data error", self.user, exc_info=True)
         
         return None, None
         
@@ -31,11 +33,11 @@ class UserBase:
     
     async def run(self, websocket: WebSocket):
         await self.join(websocket)
-        logger.info("[{user}] websocket connected".format(user=self.user))
+        logger.info("[%s] websocket connected", self.user)
         try:
             while True:
                 msg = await websocket.receive_text()
-                logger.debug("[{user}] Received message : {msg}".format(user=self.user, msg=msg))
+                logger.debug("[%s] Received message : %s", self.user, lazy(msg))
                 code, data = self._load_data(msg)
                 if not code or not data:
                     continue
@@ -43,7 +45,7 @@ class UserBase:
                 # 根据消息获取处理函数
                 code_func = getattr(self, f"handle_{code}", None)
                 if not code_func:
-                    logger.warn("[{user}]code: {code} not found".format(user=self.user, code=code))
+                    logger.warning("[%s]code: %s not found", self.user, code)
                     continue
                 try:
                     await code_func(websocket, data)
@@ -51,5 +53,5 @@ class UserBase:
                     logger.error("ws func code_%s error", code, exc_info=True)
                 
         except WebSocketDisconnect as e:
-            logger.info("[{user}] websocket closed".format(user=self.user))
+            logger.info("[%s] websocket closed", self.user)
             await self.exit(websocket)
\ No newline at end of file
@@ -37,6 +37,7 @@ setup(
     python_requires=">=3.11",
     install_requires=[
         "fastapi~=0.115.2",
+        "starlette>=0.39",  # FileResponse 支持 Range
         "Markdown~=3.7",
         "uvicorn[standard]~=0.32.0",
         "tortoise-orm~=0.21.7",
@@ -49,4 +50,8 @@ setup(
         "python-multipart~=0.0.20",
         "aiofiles~=24.1.0",
     ],
+    extras_require={
+        "msgpack": ["msgpack~=1.1.0"],
+        "orjson": ["orjson~=3.10"],
+    },
 )
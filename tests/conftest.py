@@ -0,0 +1,53 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : conftest.py
+# Time       : 2025-04-25 10:12:36
+# Author     : lyx
+# version    : python 3.11
+# Description: 测试公共配置: 在临时目录中生成faplus项目(使用默认配置), 异步测试使用 anyio 插件
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _setup_project() -> str:
+    """生成临时项目, 必须在导入 faplus.core 之前调用
+
+    :return: 项目根目录
+    """
+    from faplus.cli import generate_project
+
+    root = tempfile.mkdtemp(prefix="faplus_test_")
+    generate_project.startproject(root, "proj")
+    with open(os.path.join(root, "config.py"), "a", encoding="utf-8") as f:
+        f.write(f"\nLOG_LEVEL = 'WARNING'\nFAP_ACCESS_LOG = False\nLOG_DIR = {os.path.join(root, 'logs')!r}\n")
+
+    os.chdir(root)
+    sys.path.insert(0, root)
+    os.environ["FAP_SETTINGS_MODULE"] = "proj.settings"
+    return root
+
+
+PROJECT_ROOT = _setup_project()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    """内存 sqlite 数据库, 只包含媒体模型"""
+    from tortoise import Tortoise
+
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["faplus.media.models"]})
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
@@ -0,0 +1,129 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_access_log.py
+# Time       : 2025-04-28 14:05:37
+# Author     : lyx
+# version    : python 3.11
+# Description: 阶段耗时统计(span_util)与 json 格式的访问日志
+"""
+import asyncio
+import json
+import logging
+
+import pytest
+
+from faplus.logging.default_config import LOGGING
+from faplus.middlewares import logging_middleware
+from faplus.utils import span_util
+
+pytestmark = pytest.mark.anyio
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def access_log(monkeypatch) -> CaptureHandler:
+    monkeypatch.setattr(logging_middleware, "FAP_ACCESS_LOG", True)
+    handler = CaptureHandler()
+    logger = logging.getLogger("faplus.access")
+    old_level = logger.level
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+    logger.setLevel(old_level)
+
+
+def test_access_logger_config():
+    config = LOGGING["loggers"]["faplus.access"]
+    assert config["handlers"] == ["access"]
+    assert config["propagate"] is False
+    assert LOGGING["handlers"]["access"]["class"] == "faplus.logging.log_handler.MultiprocessTimeHandler"
+
+
+def test_span_outside_request_is_noop():
+    with span_util.span("cache"):
+        pass
+    token = span_util.start()
+    assert span_util.finish(token) == {}
+
+
+def test_span_accumulates_and_nested_same_name_counts_once():
+    token = span_util.start()
+    with span_util.span("cache"):
+        with span_util.span("cache"):
+            pass
+    with span_util.span("cache"):
+        with span_util.span("db"):
+            pass
+    spans = span_util.finish(token)
+    assert spans["cache"][1] == 2
+    assert spans["db"][1] == 1
+    assert spans["cache"][0] >= spans["db"][0] >= 0
+
+    # 结束后不再统计
+    with span_util.span("cache"):
+        pass
+    assert span_util._spans.get() is None
+
+
+async def test_traced_shares_spans_across_tasks():
+    @span_util.traced("db")
+    async def query():
+        await asyncio.sleep(0)
+        return 1
+
+    assert query.__fap_span__ == "db"
+    token = span_util.start()
+    assert await asyncio.gather(query(), query(), query()) == [1, 1, 1]
+    assert span_util.finish(token)["db"][1] == 3
+
+
+async def test_log_access_json_line(access_log: CaptureHandler):
+    async def app(scope, receive, send):
+        with span_util.span("cache"):
+            await asyncio.sleep(0)
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"hello", "more_body": True})
+        await send({"type": "http.response.body", "body": b"!"})
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "POST", "path": "/users"}
+    await logging_middleware.log_access(app, scope, None, send)
+
+    record, = [json.loads(message) for message in access_log.messages]
+    assert {key: record[key] for key in ("method", "path", "status", "bytes")} == {
+        "method": "POST", "path": "/users", "status": 201, "bytes": 6,
+    }
+    assert record["cache_count"] == 1
+    assert record["duration_ms"] >= record["cache_ms"] >= 0
+
+
+async def test_log_access_on_error(access_log: CaptureHandler):
+    async def app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await logging_middleware.log_access(app, {"type": "http", "method": "GET", "path": "/"}, None, None)
+    record = json.loads(access_log.messages[0])
+    assert (record["status"], record["bytes"]) == (500, 0)
+
+
+async def test_log_access_disabled(monkeypatch, access_log: CaptureHandler):
+    monkeypatch.setattr(logging_middleware, "FAP_ACCESS_LOG", False)
+
+    async def app(scope, receive, send):
+        pass
+
+    await logging_middleware.log_access(app, {"type": "http", "method": "GET", "path": "/"}, None, None)
+    assert access_log.messages == []
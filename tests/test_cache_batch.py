@@ -0,0 +1,49 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_cache_batch.py
+# Time       : 2025-04-25 10:41:52
+# Author     : lyx
+# version    : python 3.11
+# Description: 批量缓存操作与单key操作混用
+"""
+import pytest
+
+from faplus.cache.cache_manager import CacheManager
+
+pytestmark = pytest.mark.anyio
+
+MEMORY_BACKEND = "faplus.cache.backends.menory_cache.MemoryCache"
+
+
+@pytest.fixture(params=[None, "p:"], ids=["no_prefix", "prefix"])
+def cache(request) -> CacheManager:
+    config = {"BACKEND": MEMORY_BACKEND}
+    if request.param is not None:
+        config["PREFIX"] = request.param
+    return CacheManager({"default": config})
+
+
+async def test_set_many_then_get(cache: CacheManager):
+    await cache.set_many({"a": "1", "b": "2"}, 60)
+    assert await cache.get("a") == "1"
+    assert await cache.get("b") == "2"
+
+
+async def test_set_then_get_many(cache: CacheManager):
+    await cache.set("a", "1", 60)
+    assert await cache.get_many(["a", "missing"]) == {"a": "1"}
+
+
+async def test_set_many_then_delete(cache: CacheManager):
+    await cache.set_many({"a": "1", "b": "2"}, {"a": 60})
+    await cache.delete("a")
+    assert await cache.get_many(["a", "b"]) == {"b": "2"}
+
+
+async def test_set_then_delete_many(cache: CacheManager):
+    await cache.set("a", "1", 60)
+    await cache.set("b", "2", 60)
+    await cache.delete_many(["a", "b"])
+    assert await cache.get("a") is None
+    assert await cache.get("b") is None
@@ -0,0 +1,74 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_cache_codec.py
+# Time       : 2025-04-25 17:03:48
+# Author     : lyx
+# version    : python 3.11
+# Description: 缓存编解码器: 各编解码器在压缩开启/关闭时都能还原原值
+"""
+import importlib.util
+
+import pytest
+
+from faplus.cache.cache_manager import CacheManager
+from faplus.cache.codec import get_codec
+
+CODECS = ["raw", "json", "pickle"]
+if importlib.util.find_spec("msgpack"):
+    CODECS.append("msgpack")
+
+VALUES = {
+    "raw": ["", "text", "中文" * 100, b"", b"\x00\x01bytes" * 100],
+    "json": [None, 1, 1.5, "中文", [1, "a"], {"a": {"b": [1, 2]}}, {"big": "x" * 5000}],
+    "pickle": [None, 1, ("a", 1), {"a", "b"}, {"big": b"x" * 5000}],
+    "msgpack": [None, 1, "中文", b"bytes", [1, "a"], {"big": "x" * 5000}],
+}
+
+
+@pytest.mark.parametrize("threshold", [None, 0, 64], ids=["plain", "always", "threshold"])
+@pytest.mark.parametrize("name", CODECS)
+def test_round_trip(name: str, threshold):
+    codec = get_codec({"CODEC": name, "COMPRESS_THRESHOLD": threshold})
+    for value in VALUES[name]:
+        data = codec.dumps(value)
+        assert codec.loads(data) == value
+        assert type(codec.loads(data)) is type(value)
+
+
+def test_compress_large_values():
+    codec = get_codec({"CODEC": "raw", "COMPRESS_THRESHOLD": 64})
+    assert codec.is_binary
+    assert len(codec.dumps("x" * 10000)) < 200
+    assert codec.dumps("short") == b"\x00sshort"
+
+
+def test_loads_none():
+    for name in CODECS:
+        assert get_codec({"CODEC": name, "COMPRESS_THRESHOLD": 16}).loads(None) is None
+
+
+def test_raw_rejects_other_types():
+    with pytest.raises(ValueError):
+        get_codec({}).dumps(1)
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        get_codec({"CODEC": "xml"})
+
+
+@pytest.mark.anyio
+async def test_cache_manager_with_codec():
+    cache = CacheManager({
+        "default": {
+            "BACKEND": "faplus.cache.backends.menory_cache.MemoryCache",
+            "CODEC": "pickle",
+            "COMPRESS_THRESHOLD": 128,
+        }
+    })
+    value = {"uid": 1, "roles": ("admin",), "blob": b"x" * 1000}
+    await cache.set("user:1", value, 60)
+    assert await cache.get("user:1") == value
+    await cache.set_many({"user:2": value}, 60)
+    assert await cache.get_many(["user:2"]) == {"user:2": value}
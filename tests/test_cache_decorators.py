@@ -0,0 +1,138 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_cache_decorators.py
+# Time       : 2025-04-25 11:05:27
+# Author     : lyx
+# version    : python 3.11
+# Description: cached 装饰器: 命中缓存时不再执行函数, 失败响应不缓存
+"""
+import pytest
+from starlette.requests import Request
+
+from faplus.cache import decorators
+from faplus.cache.cache_manager import CacheManager
+from faplus.utils import Response
+
+pytestmark = pytest.mark.anyio
+
+MEMORY_BACKEND = "faplus.cache.backends.menory_cache.MemoryCache"
+
+
+@pytest.fixture(params=[None, "p:"], ids=["no_prefix", "prefix"])
+def cache(request, monkeypatch) -> CacheManager:
+    config = {"BACKEND": MEMORY_BACKEND}
+    if request.param is not None:
+        config["PREFIX"] = request.param
+    manager = CacheManager({"default": config})
+    monkeypatch.setattr(decorators, "cache", manager)
+    return manager
+
+
+async def test_cached_runs_once(cache: CacheManager):
+    calls = []
+
+    @decorators.cached(ttl=60)
+    async def load(uid: int):
+        calls.append(uid)
+        return {"uid": uid}
+
+    for _ in range(5):
+        assert await load(1) == {"uid": 1}
+    assert calls == [1]
+
+
+async def test_cached_invalidate_tag(cache: CacheManager):
+    calls = []
+
+    @decorators.cached(ttl=60, key="{uid}", tags=["user:{uid}"])
+    async def load(uid: int):
+        calls.append(uid)
+        return uid
+
+    await load(1)
+    await load(1)
+    await decorators.invalidate_tag("user:1")
+    await load(1)
+    assert calls == [1, 1]
+
+
+async def test_error_response_not_cached(cache: CacheManager):
+    calls = []
+
+    @decorators.cached(ttl=60)
+    async def load():
+        calls.append(1)
+        return Response.error("99999", "error")
+
+    await load()
+    await load()
+    assert len(calls) == 2
+
+
+class Service(object):
+    def __init__(self):
+        self.calls = 0
+
+    @decorators.cached(ttl=60)
+    async def instance_method(self, uid: int):
+        self.calls += 1
+        return uid
+
+    @decorators.cached(ttl=60)
+    @classmethod
+    async def class_method(cls, uid: int):
+        cls.class_calls += 1
+        return uid
+
+    class_calls = 0
+
+
+async def test_cached_methods(cache: CacheManager):
+    service = Service()
+    assert await service.instance_method(1) == 1
+    assert await Service().instance_method(1) == 1  # self 不参与生成key
+    assert await service.instance_method(2) == 2
+    assert service.calls == 2
+
+    Service.class_calls = 0
+    assert await Service.class_method(1) == 1
+    assert await Service.class_method(1) == 1
+    assert Service.class_calls == 1
+
+
+def make_request(path: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""})
+
+
+async def test_cached_view_api_ignores_request(cache: CacheManager):
+    calls = []
+
+    class View(object):
+        @staticmethod
+        @decorators.cached(ttl=60)
+        async def api(request: Request, page: int = 0):
+            calls.append(page)
+            return {"page": page}
+
+    assert await View.api(make_request("/a"), 1) == {"page": 1}
+    assert await View.api(make_request("/b"), 1) == {"page": 1}
+    assert calls == [1]
+
+
+async def test_cached_unencodable_argument_requires_key(cache: CacheManager):
+    class Unencodable(object):
+        __slots__ = ()
+
+    @decorators.cached(ttl=60)
+    async def load(value):
+        return 1
+
+    with pytest.raises(ValueError, match="key="):
+        await load(Unencodable())
+
+    @decorators.cached(ttl=60, key="fixed")
+    async def load_with_key(value):
+        return 1
+
+    assert await load_with_key(Unencodable()) == 1
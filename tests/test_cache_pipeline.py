@@ -0,0 +1,53 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_cache_pipeline.py
+# Time       : 2025-04-25 10:20:18
+# Author     : lyx
+# version    : python 3.11
+# Description: 缓存管道: 管道中的key与单key操作使用同一个前缀
+"""
+import pytest
+
+from faplus.cache.cache_manager import CacheManager
+
+pytestmark = pytest.mark.anyio
+
+MEMORY_BACKEND = "faplus.cache.backends.menory_cache.MemoryCache"
+
+
+@pytest.fixture(params=[None, "p:"], ids=["no_prefix", "prefix"])
+def cache(request) -> CacheManager:
+    config = {"BACKEND": MEMORY_BACKEND}
+    if request.param is not None:
+        config["PREFIX"] = request.param
+    return CacheManager({"default": config})
+
+
+async def test_pipeline_set_then_get(cache: CacheManager):
+    async with cache.pipeline() as p:
+        p.set("activate_token:1", "token", 60)
+    assert await cache.get("activate_token:1") == "token"
+
+
+async def test_get_then_pipeline_get_and_delete(cache: CacheManager):
+    await cache.set("a", "1", 60)
+    async with cache.pipeline() as p:
+        p.get("a").delete("a")
+    assert p.results[0] == "1"
+    assert await cache.get("a") is None
+
+
+async def test_default_prefix_is_empty():
+    cache = CacheManager({"default": {"BACKEND": MEMORY_BACKEND}})
+    assert cache.get_backend().perfix == ""
+    await cache.set("a", "1", 60)
+    assert await cache.get_keys("a") == ["a"]
+
+
+async def test_none_prefix_keeps_old_keys():
+    # 旧版本未配置 PREFIX 时单key操作的key为 "None<key>", 配置 "PREFIX": "None" 后仍可读取
+    cache = CacheManager({"default": {"BACKEND": MEMORY_BACKEND, "PREFIX": "None"}})
+    backend = cache.get_backend()
+    await backend.set("Noneactivate_token:1", backend.codec.encode("token"), 60)
+    assert await cache.get("activate_token:1") == "token"
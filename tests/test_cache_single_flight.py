@@ -0,0 +1,147 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_cache_single_flight.py
+# Time       : 2025-04-25 15:02:19
+# Author     : lyx
+# version    : python 3.11
+# Description: single_flight / get_or_set: 并发合并、执行者被取消、异常传播、XFetch 提前刷新
+"""
+import asyncio
+
+import pytest
+
+from faplus.cache.cache_manager import CacheManager
+
+pytestmark = pytest.mark.anyio
+
+MEMORY_BACKEND = "faplus.cache.backends.menory_cache.MemoryCache"
+
+
+@pytest.fixture
+def cache() -> CacheManager:
+    return CacheManager({"default": {"BACKEND": MEMORY_BACKEND}})
+
+
+class Loader(object):
+    """可控的 loader: 等待 release 后返回结果或抛出异常"""
+
+    def __init__(self, result="value", error: Exception = None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def test_concurrent_callers_load_once(cache: CacheManager):
+    loader = Loader()
+    tasks = [asyncio.create_task(cache.single_flight("k", loader)) for _ in range(50)]
+    await loader.started.wait()
+    loader.release.set()
+    assert await asyncio.gather(*tasks) == ["value"] * 50
+    assert loader.calls == 1
+    assert not cache._flights
+
+
+async def test_leader_cancel_does_not_poison_followers(cache: CacheManager):
+    loader = Loader()
+    leader = asyncio.create_task(cache.single_flight("k", loader))
+    await loader.started.wait()
+    followers = [asyncio.create_task(cache.single_flight("k", loader)) for _ in range(10)]
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    # 其中一个等待者重新执行 loader, 其余共享结果
+    await asyncio.sleep(0)
+    loader.release.set()
+    assert await asyncio.gather(*followers) == ["value"] * 10
+    assert loader.calls == 2
+    assert not cache._flights
+
+
+async def test_follower_cancel_does_not_cancel_leader(cache: CacheManager):
+    loader = Loader()
+    leader = asyncio.create_task(cache.single_flight("k", loader))
+    await loader.started.wait()
+    follower = asyncio.create_task(cache.single_flight("k", loader))
+    await asyncio.sleep(0)
+
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+    loader.release.set()
+    assert await leader == "value"
+    assert loader.calls == 1
+
+
+async def test_exception_propagates_to_all_waiters(cache: CacheManager):
+    loader = Loader(error=ValueError("boom"))
+    tasks = [asyncio.create_task(cache.single_flight("k", loader)) for _ in range(10)]
+    await loader.started.wait()
+    loader.release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, ValueError) and str(result) == "boom" for result in results)
+    assert loader.calls == 1
+
+    # 失败的加载不会留在进行中的记录里
+    retry = Loader()
+    retry.release.set()
+    assert await cache.single_flight("k", retry) == "value"
+
+
+async def test_get_or_set_loads_once_and_caches(cache: CacheManager):
+    loader = Loader()
+    tasks = [asyncio.create_task(cache.get_or_set("k", loader, 60, beta=0)) for _ in range(20)]
+    await loader.started.wait()
+    loader.release.set()
+    assert await asyncio.gather(*tasks) == ["value"] * 20
+    assert await cache.get("k") == "value"
+
+    assert await cache.get_or_set("k", loader, 60, beta=0) == "value"
+    assert loader.calls == 1
+
+
+async def test_get_or_set_does_not_cache_none(cache: CacheManager):
+    loader = Loader(result=None)
+    loader.release.set()
+    assert await cache.get_or_set("k", loader, 60) is None
+    assert await cache.get_or_set("k", loader, 60) is None
+    assert loader.calls == 2
+
+
+async def test_get_or_set_with_lock(cache: CacheManager):
+    loader = Loader()
+    loader.release.set()
+    assert await cache.get_or_set("k", loader, 60, lock=True) == "value"
+    assert await cache.get_or_set("k", loader, 60, lock=True, beta=0) == "value"
+    assert loader.calls == 1
+
+
+async def test_xfetch_refreshes_before_expiry(cache: CacheManager):
+    loader = Loader()
+    loader.release.set()
+    await cache.get_or_set("k", loader, 60)
+    assert loader.calls == 1
+
+    # 加载耗时相对剩余时间越大, 提前刷新的概率越大; 这里模拟加载耗时远大于过期时间
+    delta, expire_at = cache._xfetch[("default", "k")]
+    cache._xfetch[("default", "k")] = (1e6, expire_at)
+    assert await cache.get_or_set("k", loader, 60) == "value"
+    assert loader.calls == 2
+
+    # beta 为 0 时不提前刷新
+    cache._xfetch[("default", "k")] = (1e6, expire_at)
+    await cache.get_or_set("k", loader, 60, beta=0)
+    assert loader.calls == 2
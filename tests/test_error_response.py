@@ -0,0 +1,75 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_error_response.py
+# Time       : 2025-04-29 14:12:37
+# Author     : lyx
+# version    : python 3.11
+# Description: 预先序列化的错误响应体与 ResponseSchema 的 json 输出一致
+"""
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from faplus.core import StatusCodeEnum
+from faplus.schema import ResponseSchema
+from faplus.utils import api_util
+from faplus.utils.api_util import ErrorResponse
+from faplus.view import GetView
+
+
+def schema_body(code: str, msg: str) -> bytes:
+    """fastapi 输出 ResponseSchema 的响应体"""
+    return JSONResponse(jsonable_encoder(ResponseSchema(code=code, msg=msg, data=None))).body
+
+
+def status_codes() -> list[tuple[str, str]]:
+    codes = []
+    for member in StatusCodeEnum:
+        value = member.value
+        codes.append((value, member.name) if isinstance(value, str) else tuple(value))
+    return codes
+
+
+@pytest.mark.parametrize("code, msg", status_codes())
+def test_status_code_bodies(code, msg):
+    api_util.register_status_codes()
+    response = ErrorResponse(code, msg)
+    assert response.body is api_util._error_bodies[(code, msg)]
+    assert response.body == schema_body(code, msg)
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["content-length"] == str(len(response.body))
+
+
+@pytest.mark.parametrize("msg", ["用户未登录", 'quote " and \\ backslash', "emoji 😀", "tab\tnewline\n"])
+def test_registered_and_unregistered_bodies_match_schema(msg):
+    assert ErrorResponse("E9999", msg).body == schema_body("E9999", msg)  # 未注册
+    api_util.register_error("E9998", msg)
+    assert ErrorResponse("E9998", msg).body is api_util._error_bodies[("E9998", msg)]
+    assert ErrorResponse("E9998", msg).body == schema_body("E9998", msg)
+
+
+def test_make_code(monkeypatch):
+    class View(GetView):
+        @staticmethod
+        async def api():
+            return None
+
+    monkeypatch.setattr(View, "api_code", "101", raising=False)
+    monkeypatch.setattr(View, "code_dict", {"10101": "名称不能为空", "10102": "{name} 已存在"}, raising=False)
+    for code, msg in View.code_dict.items():
+        api_util.register_error(code, msg)
+
+    response = View.make_code("01")
+    assert response.body is api_util._error_bodies[("10101", "名称不能为空")]
+    assert response.body == schema_body("10101", "名称不能为空")
+
+    # 带参数的消息不使用预先序列化的响应体
+    response = View.make_code("02", {"name": "lyx"})
+    assert json.loads(response.body) == {"code": "10102", "msg": "lyx 已存在", "data": None}
+    assert response.body == schema_body("10102", "lyx 已存在")
+
+    with pytest.raises(ValueError):
+        View.make_code("99")
@@ -0,0 +1,85 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_file_response.py
+# Time       : 2025-04-28 16:47:23
+# Author     : lyx
+# version    : python 3.11
+# Description: 文件响应: 文件类型与 Content-Disposition、ETag/304、Range/206、超出范围 416
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from faplus.utils.api_util import Response
+
+CONTENT = bytes(range(256)) * 4
+FILE_HASH = "abc123"
+
+
+@pytest.fixture
+def client(tmp_path) -> TestClient:
+    path = tmp_path / "data.bin"
+    path.write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.get("/file")
+    async def download(name: str = "data.bin", content_type: str = None):
+        return Response.file(str(path), FILE_HASH, name, content_type)
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("name, content_type, expected_type, disposition", [
+    ("a.png", "image/png", "image/png", "inline"),
+    ("a.mp4", "video/mp4", "video/mp4", "inline"),
+    ("a.mp3", "audio/mpeg", "audio/mpeg", "inline"),
+    ("a.pdf", "application/pdf", "application/pdf", "attachment"),
+    ("a.txt", None, "text/plain", "attachment"),
+    ("a.unknown", None, "application/octet-stream", "attachment"),
+])
+def test_content_type_and_disposition(client, name, content_type, expected_type, disposition):
+    params = {"name": name}
+    if content_type:
+        params["content_type"] = content_type
+    r = client.get("/file", params=params)
+    assert r.status_code == 200
+    assert r.headers["content-type"].split(";")[0] == expected_type
+    assert r.headers["content-disposition"].startswith(f"{disposition}; filename=")
+    assert r.content == CONTENT
+
+
+def test_not_modified(client):
+    r = client.get("/file")
+    assert r.headers["etag"] == f'"{FILE_HASH}"'
+
+    r = client.get("/file", headers={"If-None-Match": f'"other", "{FILE_HASH}"'})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == f'"{FILE_HASH}"'
+
+    assert client.get("/file", headers={"If-None-Match": '"other"'}).status_code == 200
+    r = client.get("/file", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert r.status_code == 304
+
+
+def test_range(client):
+    r = client.get("/file", headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206
+    assert r.content == CONTENT[10:20]
+    assert r.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+
+    r = client.get("/file", headers={"Range": "bytes=-16"})
+    assert r.status_code == 206
+    assert r.content == CONTENT[-16:]
+
+    # If-Range 不匹配时返回完整文件
+    r = client.get("/file", headers={"Range": "bytes=10-19", "If-Range": '"other"'})
+    assert r.status_code == 200
+    assert r.content == CONTENT
+
+
+def test_range_not_satisfiable(client):
+    r = client.get("/file", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"].endswith(f"*/{len(CONTENT)}")
@@ -0,0 +1,62 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_file_util.py
+# Time       : 2025-04-25 14:16:44
+# Author     : lyx
+# version    : python 3.11
+# Description: 文件保存: 并发保存内容相同的文件时只创建一次, 回滚只删除新建的文件
+"""
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from faplus.media.utils import file_util
+
+pytestmark = pytest.mark.anyio
+
+HEADERS = Headers({"content-type": "application/octet-stream"})
+
+
+def upload_file(content: bytes, name: str = "a.bin") -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename=name, headers=HEADERS)
+
+
+async def save_concurrently(target_dir: str, n: int) -> file_util.FileSaveManager:
+    manager = file_util.FileSaveManager()
+    hashes = await asyncio.gather(*(manager.save(upload_file(b"same" * 1000), target_dir) for _ in range(n)))
+    assert len(set(hashes)) == 1
+    return manager
+
+
+async def test_concurrent_identical_saves(tmp_path):
+    manager = await save_concurrently(str(tmp_path), 16)
+    assert len(manager.save_files) == 1
+    assert os.listdir(tmp_path) == [os.path.basename(manager.save_files[0])]
+
+
+async def test_concurrent_identical_saves_without_link(tmp_path, monkeypatch):
+    def link(src, dst):
+        raise PermissionError("hard links are not supported")
+
+    monkeypatch.setattr(file_util.os, "link", link)
+    manager = await save_concurrently(str(tmp_path), 16)
+    assert len(manager.save_files) == 1
+    with open(manager.save_files[0], "rb") as f:
+        assert f.read() == b"same" * 1000
+    assert len(os.listdir(tmp_path)) == 1
+
+
+async def test_existing_file_not_rolled_back(tmp_path):
+    manager = file_util.FileSaveManager()
+    await manager.save(upload_file(b"old"), str(tmp_path))
+
+    manager = file_util.FileSaveManager()
+    await manager.save(upload_file(b"old"), str(tmp_path))
+    await manager.save(upload_file(b"new"), str(tmp_path))
+    await manager.rollback()
+    assert len(os.listdir(tmp_path)) == 1
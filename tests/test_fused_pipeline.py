@@ -0,0 +1,147 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_fused_pipeline.py
+# Time       : 2025-04-30 16:02:17
+# Author     : lyx
+# version    : python 3.11
+# Description: 融合请求管道: 合并规则、与逐个串联的中间件行为一致、按路径只执行需要的阶段
+"""
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from faplus.middlewares import fused_pipeline
+from faplus.middlewares.base_middleware import BaseMiddleware
+from faplus.middlewares.fused_pipeline import FusedPipelineMiddleware, fuse
+from faplus.middlewares.logging_middleware import LoggingMiddleware
+from faplus.middlewares.static_middleware import StaticMiddleware
+from faplus.middlewares.whitelist_middleware import WhitelistMiddleware
+
+calls: list[str] = []
+
+
+class AuthStage(BaseMiddleware):
+    """非白名单、非静态资源的请求需要 token"""
+
+    async def process_request(self, request: Request) -> Optional[Response]:
+        calls.append("auth")
+        state = request.state
+        if state.is_static or state.is_whitelist:
+            return None
+        if request.headers.get("token") != "ok":
+            return JSONResponse({"code": "401"}, status_code=401)
+        state.uid = 1
+        return None
+
+
+class ApiOnlyStage(BaseMiddleware):
+    def match(self, path: str) -> bool:
+        return path.startswith("/api/")
+
+    async def process_request(self, request: Request) -> Optional[Response]:
+        calls.append("api_only")
+        request.state.api = True
+        return None
+
+
+class WrappingMiddleware(object):
+    """重写 __call__ 的中间件, 不能作为阶段"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+
+
+# 与 FAP_MIDDLEWARE_CLASSES 相同的顺序: 越靠后越先执行
+MIDDLEWARES = [
+    (ApiOnlyStage, None),
+    (AuthStage, None),
+    (StaticMiddleware, None),
+    (WhitelistMiddleware, None),
+    (LoggingMiddleware, None),
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+def make_client(middlewares) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/{path:path}")
+    async def endpoint(request: Request):
+        state = request.state
+        return {
+            "static": state.is_static,
+            "white": state.is_whitelist,
+            "uid": getattr(state, "uid", None),
+            "api": getattr(state, "api", False),
+        }
+
+    for middleware_cls, kwargs in middlewares:
+        app.add_middleware(middleware_cls, **(kwargs or {}))
+    return TestClient(app)
+
+
+def test_fuse_merges_consecutive_stages():
+    fused = fuse(MIDDLEWARES)
+    assert len(fused) == 1
+    middleware_cls, kwargs = fused[0]
+    assert middleware_cls is FusedPipelineMiddleware
+    assert [cls for cls, _ in kwargs["stages"]] == [WhitelistMiddleware, StaticMiddleware, AuthStage, ApiOnlyStage]
+    assert kwargs["timer"] is True  # LoggingMiddleware 由管道的访问日志代替
+
+
+def test_fuse_keeps_non_stage_middlewares_in_place():
+    fused = fuse([(AuthStage, None), (WrappingMiddleware, None), (StaticMiddleware, None), (WhitelistMiddleware, None)])
+    assert fused[0] == (AuthStage, None)  # 只有一个阶段, 不合并
+    assert fused[1] == (WrappingMiddleware, None)
+    assert fused[2][0] is FusedPipelineMiddleware
+    assert fused[2][1] == {"stages": [(WhitelistMiddleware, None), (StaticMiddleware, None)], "timer": False}
+
+    assert fuse([(LoggingMiddleware, None)]) == [(LoggingMiddleware, None)]
+
+
+@pytest.mark.parametrize("path, headers", [
+    ("/static/a.css", {}),
+    ("/user/login", {}),
+    ("/secure/me", {}),
+    ("/secure/me", {"token": "ok"}),
+    ("/api/items", {"token": "ok"}),
+    ("/api/items", {"token": "bad"}),
+])
+def test_same_behavior_as_chained(path, headers):
+    chained = make_client(MIDDLEWARES).get(path, headers=headers)
+    chained_calls = list(calls)
+    calls.clear()
+    fused = make_client(fuse(MIDDLEWARES)).get(path, headers=headers)
+
+    assert (fused.status_code, fused.json()) == (chained.status_code, chained.json())
+    assert calls == chained_calls
+
+
+def test_plan_runs_only_matching_stages():
+    client = make_client(fuse(MIDDLEWARES))
+    client.get("/secure/me", headers={"token": "ok"})
+    assert calls == ["auth"]
+    calls.clear()
+    assert client.get("/api/items", headers={"token": "ok"}).json()["api"] is True
+    assert calls == ["auth", "api_only"]
+
+
+def test_plan_is_cached_by_path():
+    pipeline = FusedPipelineMiddleware(None, [(StaticMiddleware, None), (ApiOnlyStage, None)])
+    for _ in range(3):
+        assert [type(stage) for stage in pipeline.plan("/api/x")] == [StaticMiddleware, ApiOnlyStage]
+        assert [type(stage) for stage in pipeline.plan("/other")] == [StaticMiddleware]
+    info = pipeline.plan.cache_info()
+    assert (info.hits, info.misses) == (4, 2)
+    assert info.maxsize == fused_pipeline.FAP_FUSED_PIPELINE_PLAN_SIZE
@@ -0,0 +1,91 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_lazy_log.py
+# Time       : 2025-04-29 16:55:09
+# Author     : lyx
+# version    : python 3.11
+# Description: 延迟格式化的日志参数: 日志级别关闭时不格式化, 超长内容截断
+"""
+import logging
+
+import pytest
+from fastapi import Request
+
+from faplus.logging import lazy
+from faplus.schema import ResponseSchema
+from faplus.view import GetView
+
+
+class Counted(object):
+    calls = 0
+
+    def __str__(self):
+        Counted.calls += 1
+        return "x" * 50
+
+
+class CountedSchema(ResponseSchema):
+    def __str__(self):
+        Counted.calls += 1
+        return super().__str__()
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger("faplus.tests.lazy")
+    logger.propagate = False
+    handler = CaptureHandler()
+    logger.addHandler(handler)
+    logger.handler = handler
+    Counted.calls = 0
+    yield logger
+    logger.removeHandler(handler)
+
+
+def test_not_formatted_when_disabled(logger):
+    logger.setLevel(logging.INFO)
+    logger.debug("result: %s", lazy(Counted()))
+    assert Counted.calls == 0
+    assert logger.handler.messages == []
+
+
+def test_formatted_and_truncated(logger):
+    logger.setLevel(logging.DEBUG)
+    logger.debug("result: %s", lazy(Counted(), limit=10))
+    assert Counted.calls >= 1
+    assert logger.handler.messages == ["result: xxxxxxxxxx...(40 more chars)"]
+
+
+def test_no_limit_and_repr():
+    assert str(lazy("y" * 5000, limit=None)) == "y" * 5000
+    assert repr(lazy("abc", limit=2)) == "ab...(1 more chars)"
+    assert str(lazy({"a": 1})) == "{'a': 1}"
+
+
+@pytest.mark.anyio
+async def test_view_wrapper_does_not_format_result(anyio_backend):
+    class View(GetView):
+        @staticmethod
+        async def api(request: Request):
+            return CountedSchema(code="0", msg=None, data={"a": 1})
+
+    view_logger = logging.getLogger("faplus")
+    level = view_logger.level
+    view_logger.setLevel(logging.WARNING)
+    Counted.calls = 0
+    try:
+        result = await View.api(None)
+    finally:
+        view_logger.setLevel(level)
+    assert isinstance(result, CountedSchema)
+    assert Counted.calls == 0
@@ -0,0 +1,121 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_log_queue.py
+# Time       : 2025-04-28 15:32:08
+# Author     : lyx
+# version    : python 3.11
+# Description: 后台线程写日志: 入队时不格式化、异常信息、日志文件切分与旧日志清理
+"""
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from faplus.logging import log_queue
+from faplus.logging.log_handler import MultiprocessTimeHandler
+from faplus.logging.log_queue import LazyQueueHandler
+
+
+class Payload(object):
+    """记录被格式化的次数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "payload"
+
+
+def test_prepare_does_not_format():
+    def fail(record):
+        raise AssertionError("formatted in caller")
+
+    handler = LazyQueueHandler(None)
+    handler.format = fail
+    payload = Payload()
+    record = logging.LogRecord("t", logging.INFO, __file__, 1, "value: %s", (payload,), None)
+
+    prepared = handler.prepare(record)
+    assert prepared is not record
+    assert (prepared.msg, prepared.args) == ("value: %s", (payload,))
+    assert payload.calls == 0
+    assert prepared.getMessage() == "value: payload"
+
+
+def test_prepare_keeps_traceback_text():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("t", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+
+    prepared = LazyQueueHandler(None).prepare(record)
+    assert prepared.exc_info is None
+    assert "ValueError: boom" in prepared.exc_text
+    assert record.exc_info is not None  # 不修改原记录
+
+
+def test_queue_logging_formats_in_listener(tmp_path):
+    logger = logging.getLogger("faplus.tests.queue")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = MultiprocessTimeHandler(str(tmp_path), suffix="%Y-%m-%d")
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger.addHandler(handler)
+
+    log_queue.enable_queue_logging(names=["faplus.tests.queue"])
+    listener = log_queue._listeners.pop()
+    try:
+        assert [type(h) for h in logger.handlers] == [LazyQueueHandler]
+        payload = Payload()
+        logger.info("value: %s", payload)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+    finally:
+        listener.stop()
+        logger.handlers.clear()
+        handler.close()
+
+    with open(handler.baseFilename, encoding="utf-8") as f:
+        content = f.read()
+    assert content.startswith("INFO value: payload\nERROR failed\nTraceback")
+    assert "ValueError: boom" in content
+    assert payload.calls == 1
+
+
+def test_rollover_and_clean_old_logs(tmp_path):
+    old = tmp_path / "2000-01-01.log"
+    recent = tmp_path / "{}.log".format((datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d"))
+    other = tmp_path / "notes.log"
+    for path in (old, recent, other):
+        path.write_text("x")
+
+    handler = MultiprocessTimeHandler(str(tmp_path), suffix="%Y-%m-%d", backup_count=30)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    first = handler.baseFilename
+    try:
+        record = logging.LogRecord("t", logging.INFO, __file__, 1, "next day", (), None)
+        record.created = handler.rollover_at
+        handler.emit_batch([record])
+        assert handler.baseFilename != first
+        assert os.path.basename(handler.baseFilename) == "{}.log".format(
+            datetime.fromtimestamp(record.created).strftime("%Y-%m-%d")
+        )
+        assert handler.rollover_at > record.created
+    finally:
+        handler.close()
+
+    with open(handler.baseFilename, encoding="utf-8") as f:
+        assert f.read() == "next day\n"
+
+    # 旧日志在后台线程中清理
+    for _ in range(200):
+        if not old.exists():
+            break
+        time.sleep(0.01)
+    assert not old.exists()
+    assert recent.exists() and other.exists()
@@ -0,0 +1,88 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_media_remove.py
+# Time       : 2025-04-29 11:26:14
+# Author     : lyx
+# version    : python 3.11
+# Description: 批量删除: 仍被引用的文件不删除, 不再被引用的文件备份后删除, 失败时回滚记录与文件
+"""
+import os
+
+import pytest
+
+from faplus.media.media_manager import MediaManager, media_delete_opens
+from faplus.media.models import FileRecord
+from faplus.media.utils import file_util
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_records(target_dir, items: list[tuple[str, str]]) -> list[str]:
+    """创建文件与文件记录
+
+    :param items: [(文件hash, 文件名)], 相同的 (hash, 文件名) 共用同一个文件
+    :return: sn列表
+    """
+    sn_lst = await file_util.generate_sns(len(items))
+    for file_hash, name in set(items):
+        (target_dir / f"{file_hash}_{name}").write_bytes(file_hash.encode())
+    await FileRecord.bulk_create([
+        FileRecord(original_name=name, sn=sn, file_hash=file_hash, file_path=str(target_dir), file_type="text/plain")
+        for sn, (file_hash, name) in zip(sn_lst, items)
+    ])
+    return sn_lst
+
+
+async def test_shared_file_survives_remove(db, tmp_path):
+    media_dir, backup_dir = tmp_path / "media", tmp_path / "backup"
+    media_dir.mkdir()
+    shared_a, shared_b, single = await create_records(media_dir, [("h1", "a.txt"), ("h1", "a.txt"), ("h2", "b.txt")])
+
+    async with MediaManager(media_delete_opens, back_dir=str(backup_dir)) as manager:
+        removed = await manager.remove([shared_a, single, "missing"])
+
+    assert sorted(removed) == sorted([shared_a, single])
+    assert [record.sn for record in await FileRecord.all()] == [shared_b]
+    assert os.listdir(media_dir) == ["h1_a.txt"]  # 仍被 shared_b 引用
+    assert os.listdir(backup_dir) == ["h2_b.txt"]
+
+    async with MediaManager(media_delete_opens, back_dir=str(backup_dir)) as manager:
+        assert await manager.remove([shared_b]) == [shared_b]
+    assert os.listdir(media_dir) == []
+    assert await FileRecord.all().count() == 0
+
+
+async def test_same_hash_different_name_is_separate_file(db, tmp_path):
+    sn_a, sn_b = await create_records(tmp_path, [("h1", "a.txt"), ("h1", "b.txt")])
+
+    async with MediaManager(media_delete_opens, back_dir=str(tmp_path / "backup")) as manager:
+        await manager.remove([sn_a])
+    assert "h1_a.txt" not in os.listdir(tmp_path)
+    assert "h1_b.txt" in os.listdir(tmp_path)
+
+
+async def test_failed_remove_rolls_back(db, tmp_path, monkeypatch):
+    media_dir = tmp_path / "media"
+    media_dir.mkdir()
+    sn_lst = await create_records(media_dir, [(f"h{i}", "f.txt") for i in range(10)])
+    backup_and_remove = file_util.FileDeleteManager._backup_and_remove
+
+    def fail_one(self, file_path):
+        if file_path.endswith("h7_f.txt"):
+            raise OSError("disk error")
+        return backup_and_remove(self, file_path)
+
+    monkeypatch.setattr(file_util.FileDeleteManager, "_backup_and_remove", fail_one)
+    with pytest.raises(OSError, match="disk error"):
+        async with MediaManager(media_delete_opens, back_dir=str(tmp_path / "backup")) as manager:
+            await manager.remove(sn_lst)
+
+    assert await FileRecord.all().count() == 10
+    assert sorted(os.listdir(media_dir)) == sorted(f"h{i}_f.txt" for i in range(10))
+
+
+async def test_remove_nothing(db, tmp_path):
+    async with MediaManager(media_delete_opens, back_dir=str(tmp_path)) as manager:
+        assert await manager.remove([]) == []
+        assert await manager.remove(["missing"]) == []
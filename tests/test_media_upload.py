@@ -0,0 +1,67 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_media_upload.py
+# Time       : 2025-04-29 10:08:51
+# Author     : lyx
+# version    : python 3.11
+# Description: 批量上传: 并发保存、批量写入文件记录、失败时只回滚本次新建的文件
+"""
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from faplus.media.media_manager import MediaManager, media_upload_opens
+from faplus.media.models import FileRecord
+
+pytestmark = pytest.mark.anyio
+
+HEADERS = Headers({"content-type": "application/octet-stream"})
+
+
+class BrokenIO(io.BytesIO):
+    def read(self, size=-1):
+        raise OSError("broken upload")
+
+
+def upload_file(content: bytes, name: str) -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename=name, headers=HEADERS)
+
+
+async def test_upload_many(db, tmp_path):
+    files = [upload_file(f"file {i}".encode(), f"f{i}.bin") for i in range(20)]
+    files += [upload_file(b"same", "same.bin") for _ in range(3)]
+    async with MediaManager(media_upload_opens) as manager:
+        sn_lst = await manager.upload(files, str(tmp_path), rename_map={0: "first.bin"}, source="test")
+
+    assert len(set(sn_lst)) == 23
+    records = {record.sn: record for record in await FileRecord.all()}
+    assert set(records) == set(sn_lst)
+    assert records[sn_lst[0]].save_name == "first.bin"
+    assert {record.source for record in records.values()} == {"test"}
+    # 内容相同的文件只保存一份
+    assert len(os.listdir(tmp_path)) == 21
+
+
+async def test_failed_upload_rolls_back_only_new_files(db, tmp_path):
+    async with MediaManager(media_upload_opens) as manager:
+        await manager.upload([upload_file(b"existing", "a.bin")], str(tmp_path))
+    existing = set(os.listdir(tmp_path))
+
+    files = [upload_file(b"existing", "a.bin")]  # 与已有文件内容相同
+    files += [upload_file(f"new {i}".encode(), f"n{i}.bin") for i in range(5)]
+    files.append(UploadFile(BrokenIO(), filename="broken.bin", headers=HEADERS))
+    with pytest.raises(OSError, match="broken upload"):
+        async with MediaManager(media_upload_opens) as manager:
+            await manager.upload(files, str(tmp_path))
+
+    assert set(os.listdir(tmp_path)) == existing
+    assert await FileRecord.all().count() == 1
+
+
+async def test_upload_nothing(db, tmp_path):
+    async with MediaManager(media_upload_opens) as manager:
+        assert await manager.upload([], str(tmp_path)) == []
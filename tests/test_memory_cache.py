@@ -0,0 +1,153 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_memory_cache.py
+# Time       : 2025-04-25 16:18:05
+# Author     : lyx
+# version    : python 3.11
+# Description: MemoryCache: LRU/容量淘汰、过期清理、统计、有序键索引
+"""
+import random
+
+import pytest
+
+from faplus.cache.backends import menory_cache
+from faplus.cache.backends.menory_cache import MemoryCache
+
+pytestmark = pytest.mark.anyio
+
+
+def make_cache(**options) -> MemoryCache:
+    return MemoryCache({"OPTIONS": options})
+
+
+class Clock(object):
+    """替换 time.monotonic, 手动推进时间"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(menory_cache.time, "monotonic", clock)
+    return clock
+
+
+async def test_unbounded_by_default():
+    cache = make_cache()
+    assert cache.max_entries is None and cache.max_bytes is None
+    for i in range(5000):
+        await cache.set(f"token:{i}", "v", None)
+    assert cache.stats()["entries"] == 5000
+    assert cache.evictions == 0
+
+
+async def test_lru_eviction():
+    cache = make_cache(MAX_ENTRIES=3)
+    for key in ("a", "b", "c"):
+        await cache.set(key, key, None)
+    await cache.get("a")  # a 变为最近使用
+    await cache.set("d", "d", None)
+
+    assert await cache.get("b") is None
+    assert [await cache.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+    assert cache.evictions == 1
+    assert await cache.get_keys("") == ["a", "c", "d"]
+
+
+async def test_max_bytes_eviction():
+    cache = make_cache(MAX_BYTES=2000)
+    for i in range(100):
+        await cache.set(f"k{i}", "x" * 100, None)
+    stats = cache.stats()
+    assert stats["bytes"] <= 2000
+    assert stats["evictions"] == 100 - stats["entries"]
+    assert await cache.get("k99") == "x" * 100
+
+
+async def test_expire_on_read(clock: Clock):
+    cache = make_cache()
+    await cache.set("a", "1", 10)
+    await cache.set("b", "2", None)
+    assert await cache.get("a") == "1"
+
+    clock.now += 10
+    assert await cache.get("a") is None
+    assert await cache.get("b") == "2"
+    assert cache.expirations == 1
+    assert await cache.get_keys("") == ["b"]
+
+
+async def test_sweep_on_write(clock: Clock):
+    cache = make_cache(SWEEP_BATCH=1000)
+    for i in range(100):
+        await cache.set(f"k{i}", "v", 5)
+    clock.now += 5
+    await cache.set("new", "v", None)
+    assert cache.stats()["entries"] == 1
+    assert cache.expirations == 100
+
+
+async def test_reset_expire(clock: Clock):
+    cache = make_cache()
+    await cache.set("a", "1", 5)
+    await cache.set("a", "2", 60)  # 堆中旧的过期记录应被忽略
+    clock.now += 10
+    assert await cache.sweep() == 0
+    assert await cache.get("a") == "2"
+
+
+async def test_stats():
+    cache = make_cache()
+    await cache.set("a", "1", None)
+    await cache.get("a")
+    await cache.get_many(["a", "b"])
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_sorted_keys_matches_reference(monkeypatch):
+    monkeypatch.setattr(menory_cache._SortedKeys, "LOAD", 4)
+    keys = menory_cache._SortedKeys()
+    reference = set()
+    rnd = random.Random(7)
+    for _ in range(5000):
+        key = f"{rnd.choice('abc')}:{rnd.randrange(300)}"
+        if key in reference and rnd.random() < 0.5:
+            keys.discard(key)
+            reference.discard(key)
+        elif key not in reference:
+            keys.add(key)
+            reference.add(key)
+    assert len(keys) == len(reference)
+    assert keys.prefix("") == sorted(reference)
+    assert keys.prefix("b:1") == sorted(key for key in reference if key.startswith("b:1"))
+
+    popped = keys.pop_prefix("a:")
+    assert popped == sorted(key for key in reference if key.startswith("a:"))
+    assert keys.prefix("") == sorted(key for key in reference if not key.startswith("a:"))
+
+
+async def test_get_keys_and_delete_prefix(clock: Clock, monkeypatch):
+    monkeypatch.setattr(menory_cache._SortedKeys, "LOAD", 4)
+    cache = make_cache()
+    for uid in (1, 2, 10):
+        for i in range(20):
+            await cache.set(f"user:{uid}:{i}", "v", None)
+    await cache.set("user:1:tmp", "v", 5)
+
+    assert len(await cache.get_keys("user:1:")) == 21
+    clock.now += 5
+    assert len(await cache.get_keys("user:1:")) == 20  # 已过期的键不返回
+
+    assert await cache.delete_prefix("user:1:") == 21
+    assert await cache.get_keys("user:1:") == []
+    assert len(await cache.get_keys("user:")) == 40
+    assert await cache.get("user:10:0") == "v"
+    assert cache.stats()["entries"] == 40
@@ -0,0 +1,108 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_middleware.py
+# Time       : 2025-04-30 14:36:51
+# Author     : lyx
+# version    : python 3.11
+# Description: 纯ASGI中间件: 执行顺序(越靠后注册越先执行)、提前响应、match 跳过、非 http 请求透传、request.state 共享
+"""
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from faplus.middlewares.base_middleware import BaseMiddleware
+from faplus.middlewares.static_middleware import StaticMiddleware
+from faplus.middlewares.whitelist_middleware import WhitelistMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+def recorder(name: str, stop_path: str = None, only: str = None):
+    """记录执行顺序的中间件, 请求 stop_path 时直接响应, only 不为空时只处理以 only 开头的路径"""
+
+    class Recorder(BaseMiddleware):
+        def match(self, path: str) -> bool:
+            return only is None or path.startswith(only)
+
+        async def process_request(self, request: Request) -> Optional[Response]:
+            order = getattr(request.state, "order", [])
+            request.state.order = order + [name]
+            if request.scope["path"] == stop_path:
+                return JSONResponse({"stopped_by": name, "order": request.state.order})
+            return None
+
+    Recorder.__name__ = name
+    return Recorder
+
+
+def make_app(*middlewares) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/stream/body")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk{i};".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/{path:path}")
+    async def endpoint(request: Request):
+        state = request.state
+        return {
+            "order": getattr(state, "order", []),
+            "static": getattr(state, "is_static", None),
+            "white": getattr(state, "is_whitelist", None),
+        }
+
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    return app
+
+
+def test_registration_order():
+    # 与 FAP_MIDDLEWARE_CLASSES 相同: 越靠后注册越先执行
+    client = TestClient(make_app(recorder("inner"), recorder("middle"), recorder("outer")))
+    assert client.get("/x").json()["order"] == ["outer", "middle", "inner"]
+
+
+def test_short_circuit():
+    client = TestClient(make_app(recorder("inner"), recorder("outer", stop_path="/stop")))
+    assert client.get("/stop").json() == {"stopped_by": "outer", "order": ["outer"]}
+    assert client.get("/go").json()["order"] == ["outer", "inner"]
+
+
+def test_match_skips_stage():
+    client = TestClient(make_app(recorder("api_only", only="/api/"), recorder("all")))
+    assert client.get("/api/x").json()["order"] == ["all", "api_only"]
+    assert client.get("/other").json()["order"] == ["all"]
+
+
+def test_builtin_flags_visible_to_later_stages():
+    # 模板中的顺序: Static、Whitelist 在 jwt 等中间件之后注册, 先执行
+    client = TestClient(make_app(recorder("jwt"), StaticMiddleware, WhitelistMiddleware))
+    assert client.get("/static/a.css").json() == {"order": ["jwt"], "static": True, "white": False}
+    assert client.get("/user/login").json() == {"order": ["jwt"], "static": False, "white": True}
+    assert client.get("/secure/me").json() == {"order": ["jwt"], "static": False, "white": False}
+
+
+def test_streaming_body_passes_through():
+    client = TestClient(make_app(recorder("a"), StaticMiddleware, WhitelistMiddleware))
+    r = client.get("/stream/body")
+    assert r.text == "chunk0;chunk1;chunk2;"
+
+
+async def test_non_http_passthrough():
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["type"])
+
+    middleware = recorder("a", stop_path="/")(app)
+    for scope_type in ("lifespan", "websocket"):
+        await middleware({"type": scope_type, "path": "/"}, None, None)
+    assert calls == ["lifespan", "websocket"]
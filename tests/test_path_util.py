@@ -0,0 +1,52 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_path_util.py
+# Time       : 2025-04-25 11:32:10
+# Author     : lyx
+# version    : python 3.11
+# Description: 路径分类器: 前缀/完全匹配/后缀规则, 与原 startswith/endswith 判断一致
+"""
+from faplus.core import settings
+from faplus.utils import path_util
+from faplus.utils.path_util import PathCategoryEnum, PathClassifier
+
+
+def test_prefix_exact_suffix():
+    classifier = PathClassifier()
+    classifier.add_prefix("/open/", PathCategoryEnum.whitelist)
+    classifier.add_exact("/login", PathCategoryEnum.whitelist)
+    classifier.add_suffix("/glogin", PathCategoryEnum.guest_login)
+
+    assert PathCategoryEnum.whitelist in classifier.classify("/open/ping")
+    assert PathCategoryEnum.whitelist in classifier.classify("/login")
+    assert PathCategoryEnum.whitelist not in classifier.classify("/login/x")
+    assert PathCategoryEnum.guest_login in classifier.classify("/secure/me/glogin")
+    assert classifier.classify("/secure/me") == PathCategoryEnum(0)
+
+
+def test_empty_prefix_matches_all():
+    classifier = PathClassifier()
+    classifier.add_prefix("", PathCategoryEnum.whitelist)
+    classifier.add_suffix("", PathCategoryEnum.static)
+    for path in ("/", "/secure/me", "/a/b/c"):
+        assert PathCategoryEnum.whitelist in classifier.classify(path)
+        assert PathCategoryEnum.static in classifier.classify(path)
+
+
+def test_star_whitelist(monkeypatch):
+    monkeypatch.setattr(settings, "FAP_JWT_WHITES", ["*"])
+    classifier = path_util.build_classifier()
+    assert PathCategoryEnum.whitelist in classifier.classify("/secure/me")
+    assert PathCategoryEnum.whitelist in classifier.classify("/")
+
+
+def test_stats():
+    classifier = PathClassifier(cache_size=2)
+    classifier.add_prefix("/open/", PathCategoryEnum.whitelist)
+    for path in ("/open/a", "/open/a", "/open/b", "/open/a"):
+        classifier.classify(path)
+
+    info = classifier.cache_info()
+    assert (info.hits, info.misses, info.currsize, info.maxsize) == (2, 2, 2, 2)
+    assert classifier.stats() == {"hits": 2, "misses": 2, "size": 2, "max_size": 2, "hit_rate": 0.5}
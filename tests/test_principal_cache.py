@@ -0,0 +1,130 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_principal_cache.py
+# Time       : 2025-04-30 11:18:05
+# Author     : lyx
+# version    : python 3.11
+# Description: 进程内认证主体缓存: 过期、LRU淘汰、按token/用户失效, JwtMiddleware 命中时不再校验token
+"""
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from faplus.core import StatusCodeEnum
+from faplus.middlewares import jwt_middleware
+from faplus.utils import principal_util, token_util
+from faplus.utils.principal_util import PrincipalCache
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock(object):
+    """替换 time.monotonic, 手动推进时间"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(principal_util.time, "monotonic", clock)
+    return clock
+
+
+def test_get_set_and_ttl(clock: Clock):
+    cache = PrincipalCache(ttl=10, max_size=100)
+    assert cache.get("t1") is None
+    cache.set("t1", {"uid": 1}, {"id": 1, "name": "a"})
+
+    payload, user_dict = cache.get("t1")
+    assert payload == {"uid": 1} and user_dict == {"id": 1, "name": "a"}
+    user_dict["name"] = "changed"  # 返回副本, 不影响缓存
+    assert cache.get("t1")[1]["name"] == "a"
+
+    clock.now += 10.5
+    assert cache.get("t1") is None
+    assert cache.stats()["size"] == 0
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_token_exp_limits_ttl(clock: Clock):
+    cache = PrincipalCache(ttl=60, max_size=100)
+    cache.set("t1", {"exp": time.time() + 5}, {"id": 1})
+    clock.now += 6
+    assert cache.get("t1") is None
+
+    cache.set("t2", {"exp": time.time() - 1}, {"id": 1})  # 已过期的token不缓存
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_eviction():
+    cache = PrincipalCache(ttl=60, max_size=2)
+    cache.set("t1", {}, {"id": 1})
+    cache.set("t2", {}, {"id": 2})
+    cache.get("t1")
+    cache.set("t3", {}, {"id": 3})
+    assert cache.get("t2") is None
+    assert cache.get("t1") is not None and cache.get("t3") is not None
+    assert cache._uid_index.keys() == {"1", "3"}
+
+
+def test_invalidate():
+    cache = PrincipalCache(ttl=60, max_size=100)
+    cache.set("t1", {}, {"id": 1})
+    cache.set("t2", {}, {"id": 1})
+    cache.set("t3", {}, {"id": 2})
+
+    cache.invalidate_token("t1")
+    assert cache.get("t1") is None and cache.get("t2") is not None
+
+    cache.invalidate_uid(1)
+    assert cache.get("t2") is None and cache.get("t3") is not None
+    assert cache._uid_index.keys() == {"2"}
+
+
+def test_disabled():
+    cache = PrincipalCache(ttl=0, max_size=100)
+    cache.set("t1", {}, {"id": 1})
+    assert cache.get("t1") is None
+    assert not PrincipalCache(ttl=10, max_size=0).enabled
+
+
+async def test_jwt_middleware_uses_principal_cache(monkeypatch):
+    cache = PrincipalCache(ttl=60, max_size=100)
+    monkeypatch.setattr(jwt_middleware, "principal_cache", cache)
+    monkeypatch.setattr(token_util, "principal_cache", cache)
+    monkeypatch.setattr(jwt_middleware, "get_token", lambda request: request.token)
+    calls = {"verify": 0, "user": 0}
+
+    async def verify_token(token):
+        calls["verify"] += 1
+        return {"uid": 7} if token == "good" else None
+
+    async def get_user_info(id):
+        calls["user"] += 1
+        return {"id": id, "username": "lyx"}
+
+    monkeypatch.setattr(jwt_middleware.token_util, "verify_token", verify_token)
+    monkeypatch.setattr(jwt_middleware.user_util, "get_user_info", get_user_info)
+
+    middleware = jwt_middleware.JwtMiddleware(None)
+    for _ in range(3):
+        request = SimpleNamespace(token="good", state=SimpleNamespace())
+        assert await middleware.authenticate(request) is None
+        assert (request.state.uid, request.state.user_info["username"]) == (7, "lyx")
+    assert calls == {"verify": 1, "user": 1}
+
+    # 注销token后重新校验
+    await token_util.revoke_token("good", pipe=SimpleNamespace(delete=lambda key: None))
+    await middleware.authenticate(SimpleNamespace(token="good", state=SimpleNamespace()))
+    assert calls == {"verify": 2, "user": 2}
+
+    response = await middleware.authenticate(SimpleNamespace(token="bad", state=SimpleNamespace()))
+    assert json.loads(response.body)["code"] == StatusCodeEnum.用户未登录.value
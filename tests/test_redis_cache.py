@@ -0,0 +1,96 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_redis_cache.py
+# Time       : 2025-04-30 09:52:44
+# Author     : lyx
+# version    : python 3.11
+# Description: RedisCache: SCAN 遍历键、按前缀批量删除、clear 只清理 PREFIX 内的键、关机时关闭所有后端(使用 fakeredis)
+"""
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from faplus.cache.backends.redis_cache import RedisCache
+from faplus.cache.cache_manager import CacheManager
+from faplus.shutdowns import cache_shutdown
+
+pytestmark = pytest.mark.anyio
+
+MEMORY_BACKEND = "faplus.cache.backends.menory_cache.MemoryCache"
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def make_cache(server):
+    def make(prefix: str = "p:") -> RedisCache:
+        cache = RedisCache({"PREFIX": prefix, "OPTIONS": {"HOST": "127.0.0.1", "PORT": 6379, "SCAN_COUNT": 3}})
+        cache._client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        return cache
+
+    return make
+
+
+async def fill(cache: RedisCache, keys: list[str]) -> None:
+    for key in keys:
+        await cache.client.set(key, "v")
+
+
+async def test_get_keys_within_prefix(make_cache):
+    cache = make_cache()
+    user_keys = [f"p:user:{i}" for i in range(10)]
+    await fill(cache, user_keys + ["p:order:1", "user:1", "q:user:1"])
+
+    assert sorted(await cache.get_keys("user:")) == sorted(user_keys)
+    assert sorted(await cache.get_keys("p:user:")) == sorted(user_keys)  # 已带 PREFIX
+    assert sorted([key async for key in cache.iter_keys("")]) == sorted(user_keys + ["p:order:1"])
+
+
+async def test_glob_characters_are_escaped(make_cache):
+    cache = make_cache()
+    await fill(cache, ["p:a*b", "p:axb", "p:a?c", "p:a[1]"])
+    assert await cache.get_keys("a*") == ["p:a*b"]
+    assert await cache.get_keys("a?") == ["p:a?c"]
+    assert await cache.get_keys("a[") == ["p:a[1]"]
+
+
+async def test_delete_prefix_in_batches(make_cache):
+    cache = make_cache()
+    await fill(cache, [f"p:user:{i}" for i in range(10)] + ["p:order:1", "user:1"])
+
+    assert await cache.delete_prefix("user:") == 10  # SCAN_COUNT 为 3, 分多批 UNLINK
+    assert await cache.get_keys("") == ["p:order:1"]
+    assert await cache.client.get("user:1") == "v"
+
+
+async def test_clear_only_own_prefix(make_cache):
+    a, b = make_cache("a:"), make_cache("b:")
+    await fill(a, ["a:1", "a:2", "b:1", "other"])
+
+    await a.clear()
+    assert sorted(await a.client.keys("*")) == ["b:1", "other"]
+    assert await b.get_keys("") == ["b:1"]
+
+
+async def test_cache_close_event_closes_all_backends(monkeypatch):
+    manager = CacheManager({"default": {"BACKEND": MEMORY_BACKEND}, "other": {"BACKEND": MEMORY_BACKEND}})
+    closed = []
+
+    async def fail():
+        closed.append("default")
+        raise RuntimeError("close failed")
+
+    async def close():
+        closed.append("other")
+
+    monkeypatch.setattr(manager.get_backend("default"), "close", fail)
+    monkeypatch.setattr(manager.get_backend("other"), "close", close)
+    monkeypatch.setattr(cache_shutdown, "cache", manager)
+
+    await cache_shutdown.cache_close_event()()
+    assert closed == ["default", "other"]  # 一个后端关闭失败不影响其他后端
+
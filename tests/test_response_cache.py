@@ -0,0 +1,138 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_response_cache.py
+# Time       : 2025-04-29 15:40:22
+# Author     : lyx
+# version    : python 3.11
+# Description: GET 视图的响应缓存: 命中时不调用视图、ETag/304、按查询参数与用户区分、失效、不缓存错误响应
+"""
+import asyncio
+from typing import Union
+
+import pytest
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from faplus.cache import response_cache
+from faplus.cache.cache_manager import CacheManager
+from faplus.core import StatusCodeEnum
+from faplus.schema import ErrorResponseSchema
+from faplus.utils.api_util import Response
+from faplus.view import GetView
+
+MEMORY_BACKEND = "faplus.cache.backends.menory_cache.MemoryCache"
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch) -> CacheManager:
+    cache = CacheManager({"default": {"BACKEND": MEMORY_BACKEND}})
+    monkeypatch.setattr(response_cache, "cache", cache)
+    return cache
+
+
+def make_view(vary_user: bool = False, fail: bool = False):
+    class View(GetView):
+        response_cache = 60
+        response_cache_vary_user = vary_user
+        calls = 0
+
+        @staticmethod
+        async def api(request: Request):
+            View.calls += 1
+            if fail:
+                return Response.error(StatusCodeEnum.内部服务器错误.value, "内部服务器错误")
+            return {"n": View.calls, "q": request.query_params.get("q")}
+
+    return View
+
+
+def make_client(view, path: str = "/items") -> TestClient:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def set_uid(request: Request, call_next):
+        request.state.uid = request.headers.get("x-uid", "")
+        return await call_next(request)
+
+    router = APIRouter()
+    router.add_api_route(
+        path,
+        endpoint=view.api,
+        methods=view.methods,
+        response_model=Union[view.response_model, ErrorResponseSchema],
+        route_class_override=response_cache.response_cache_route(view),
+    )
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_hit_and_not_modified():
+    view = make_view()
+    client = make_client(view)
+
+    first = client.get("/items")
+    assert first.status_code == 200
+    assert first.json()["data"] == {"n": 1, "q": None}
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "public, no-cache"
+
+    second = client.get("/items")
+    assert second.content == first.content
+    assert second.headers["etag"] == etag
+    assert view.calls == 1
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        r = client.get("/items", headers={"If-None-Match": if_none_match})
+        assert r.status_code == 304
+        assert r.content == b""
+        assert r.headers["etag"] == etag
+    assert client.get("/items", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert view.calls == 1
+
+
+def test_not_modified_on_miss(monkeypatch):
+    etag = make_client(make_view()).get("/items").headers["etag"]
+
+    # 缓存为空时调用视图, 响应体的 ETag 与 If-None-Match 匹配时同样返回 304
+    monkeypatch.setattr(response_cache, "cache", CacheManager({"default": {"BACKEND": MEMORY_BACKEND}}))
+    view = make_view()
+    r = make_client(view).get("/items", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+    assert view.calls == 1
+
+
+def test_vary_query_and_user():
+    view = make_view(vary_user=True)
+    client = make_client(view)
+
+    a = client.get("/items", params={"q": "a"}, headers={"x-uid": "1"})
+    assert a.headers["cache-control"] == "private, no-cache"
+    assert client.get("/items", params={"q": "b"}, headers={"x-uid": "1"}).json()["data"]["q"] == "b"
+    client.get("/items", params={"q": "a"}, headers={"x-uid": "2"})
+    assert view.calls == 3
+
+    assert client.get("/items", params={"q": "a"}, headers={"x-uid": "1"}).content == a.content
+    assert view.calls == 3
+
+
+def test_invalidate():
+    view = make_view()
+    client = make_client(view)
+    client.get("/items")
+    client.get("/items", params={"q": "x"})
+    assert view.calls == 2
+
+    assert asyncio.run(response_cache.invalidate_response_cache("/items")) == 2
+    assert client.get("/items").json()["data"]["n"] == 3
+
+
+def test_error_response_not_cached():
+    view = make_view(fail=True)
+    client = make_client(view)
+    for _ in range(2):
+        r = client.get("/items")
+        assert r.json()["code"] == StatusCodeEnum.内部服务器错误.value
+        assert "etag" not in r.headers
+    assert view.calls == 2
@@ -0,0 +1,96 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_sn_util.py
+# Time       : 2025-04-25 17:40:26
+# Author     : lyx
+# version    : python 3.11
+# Description: sn码生成器: 长度、字符集、单调递增(同一毫秒、序号溢出、时钟回拨)、不访问数据库
+"""
+import pytest
+
+from faplus.media.utils import file_util, sn_util
+from faplus.media.utils.sn_util import ALPHABET, SN_LENGTH, SNGenerator
+
+
+class Clock(object):
+    """替换 time.time_ns, 手动设置时间"""
+
+    def __init__(self):
+        self.ms = 1_745_000_000_000
+
+    def __call__(self) -> int:
+        return self.ms * 1_000_000
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(sn_util.time, "time_ns", clock)
+    return clock
+
+
+def test_length_and_alphabet():
+    generator = SNGenerator(worker_id=1)
+    for length in (1, 16, 18, 24):
+        sn = generator.generate(length)
+        assert len(sn) == max(SN_LENGTH, length)
+        assert set(sn) <= set(ALPHABET)
+    assert all(len(sn) == 20 for sn in generator.generate_many(10, 20))
+
+
+def test_monotonic_and_unique():
+    generator = SNGenerator(worker_id=1)
+    sns = generator.generate_many(50000) + [generator.generate() for _ in range(1000)]
+    assert sns == sorted(sns)
+    assert len(set(sns)) == len(sns)
+
+
+def test_sequence_overflow_in_one_millisecond(clock: Clock):
+    generator = SNGenerator(worker_id=1)
+    sns = generator.generate_many(sn_util.MAX_SEQUENCE * 2 + 10)
+    assert sns == sorted(sns)
+    assert len(set(sns)) == len(sns)
+
+
+def test_clock_rollback(clock: Clock):
+    generator = SNGenerator(worker_id=1)
+    before = generator.generate_many(100)
+    clock.ms -= 5000
+    after = generator.generate_many(100)
+    assert before[-1] < after[0]
+    assert after == sorted(after)
+
+
+def test_workers_do_not_collide(clock: Clock):
+    a, b = SNGenerator(worker_id=1), SNGenerator(worker_id=2)
+    sns_a, sns_b = a.generate_many(1000), b.generate_many(1000)
+    assert not set(sns_a) & set(sns_b)
+    assert sns_a[-1] < sns_b[0]  # 同一毫秒内按 worker 排序
+
+
+def test_invalid_worker_id():
+    with pytest.raises(ValueError):
+        SNGenerator(worker_id=sn_util.MAX_WORKER_ID + 1)
+    with pytest.raises(ValueError):
+        SNGenerator(worker_id=-1)
+
+
+def test_configured_worker_id_mixes_pid(monkeypatch, clock: Clock):
+    # --workers N 启动的进程共用同一个 FAP_SN_WORKER_ID
+    sns = []
+    for pid in (1000, 1001):
+        monkeypatch.setattr(sn_util.os, "getpid", lambda: pid)
+        generator = SNGenerator(worker_id=3)
+        sns.append(generator.generate_many(1000))
+        assert generator._worker == (3 << sn_util.PID_BITS) | (pid & 0xFF)
+    assert not set(sns[0]) & set(sns[1])
+
+
+@pytest.mark.anyio
+async def test_generate_sns_without_database():
+    # 未初始化数据库, 访问数据库会抛出异常
+    sns = await file_util.generate_sns(100)
+    assert len(set(sns)) == 100 and sns == sorted(sns)
+    assert len(await file_util.generate_sn()) == SN_LENGTH
+    assert await file_util.generate_sns(0) == []
@@ -0,0 +1,146 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_tiered_cache.py
+# Time       : 2025-04-28 09:46:12
+# Author     : lyx
+# version    : python 3.11
+# Description: 两级缓存: 跨实例失效、L1 回填、读 L2 期间本地写入、命中统计(L2 使用 fakeredis)
+"""
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from faplus.cache.backends.tiered_cache import TieredCache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+async def make_cache(server):
+    caches = []
+
+    async def make() -> TieredCache:
+        cache = TieredCache({
+            "BACKEND": "faplus.cache.backends.tiered_cache.TieredCache",
+            "PREFIX": "t:",
+            "OPTIONS": {"HOST": "127.0.0.1", "PORT": 6379},
+        })
+        cache.l2._client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        caches.append(cache)
+        await subscribed(cache, len(caches))
+        return cache
+
+    yield make
+    for cache in caches:
+        await cache.close()
+
+
+async def subscribed(cache: TieredCache, n: int) -> None:
+    """启动订阅并等待频道上有 n 个订阅者"""
+    cache._ensure_listener()
+    for _ in range(200):
+        (_, count), = await cache.client.pubsub_numsub(cache.channel)
+        if count >= n:
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError("tiered cache listener not subscribed")
+
+
+async def eventually(predicate) -> None:
+    for _ in range(200):
+        if await predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+async def test_l1_backfill_and_stats(make_cache):
+    cache = await make_cache()
+    await cache.l2.set("t:k", "v", 60)  # 只写 L2
+
+    assert await cache.get("t:k") == "v"  # L2 命中并回填 L1
+    assert await cache.l1.get("t:k") == "v"
+    assert await cache.get("t:k") == "v"  # L1 命中
+    assert await cache.get("t:missing") is None
+    assert await cache.get_many(["t:k", "t:missing"]) == {"t:k": "v"}
+
+    stats = cache.stats()
+    assert (stats["l1_hits"], stats["l2_hits"], stats["misses"]) == (2, 1, 2)
+    assert stats["hit_rate"] == pytest.approx(3 / 5)
+    assert stats["l2_hit_rate"] == pytest.approx(1 / 3)
+
+
+async def test_invalidation_across_instances(make_cache):
+    a = await make_cache()
+    b = await make_cache()
+
+    await a.set("t:k", "1", 60)
+    assert await b.get("t:k") == "1"
+    assert await b.l1.get("t:k") == "1"
+
+    await a.set("t:k", "2", 60)
+    await eventually(lambda: _l1_missing(b, "t:k"))
+    assert await b.get("t:k") == "2"
+
+    await a.delete("t:k")
+    await eventually(lambda: _l1_missing(b, "t:k"))
+    assert await b.get("t:k") is None
+
+    await a.set_many({"t:x:1": "1", "t:x:2": "2"}, 60)
+    assert await b.get_many(["t:x:1", "t:x:2"]) == {"t:x:1": "1", "t:x:2": "2"}
+    await a.delete_prefix("t:x:")
+    await eventually(lambda: _l1_missing(b, "t:x:1"))
+    assert await b.get_many(["t:x:1", "t:x:2"]) == {}
+
+
+async def _l1_missing(cache: TieredCache, key: str) -> bool:
+    return await cache.l1.get(key) is None
+
+
+@pytest.mark.parametrize("write", ["set", "set_many", "delete", "delete_prefix", "clear", "pipeline"])
+async def test_local_write_during_l2_read_not_backfilled(make_cache, write):
+    cache = await make_cache()
+    await cache.set("t:k", "old", 60)
+    await cache.l1.delete("t:k")
+
+    reading, release = asyncio.Event(), asyncio.Event()
+    l2_get = cache.l2.get
+
+    async def slow_get(key, default=None):
+        value = await l2_get(key, default)
+        reading.set()
+        await release.wait()
+        return value
+
+    cache.l2.get = slow_get
+    task = asyncio.create_task(cache.get("t:k"))
+    await reading.wait()
+
+    if write == "set":
+        await cache.set("t:k", "new", 60)
+    elif write == "set_many":
+        await cache.set_many({"t:k": "new"}, 60)
+    elif write == "delete":
+        await cache.delete("t:k")
+    elif write == "delete_prefix":
+        await cache.delete_prefix("t:k")
+    elif write == "clear":
+        await cache.clear()
+    else:
+        async with cache.pipeline() as p:
+            p.set("t:k", "new", 60)
+    release.set()
+    assert await task == "old"
+
+    # 旧值不能回填到 L1
+    assert await cache.l1.get("t:k") in (None, "new")
+    cache.l2.get = l2_get
+    assert await cache.get("t:k") == (None if write in ("delete", "delete_prefix", "clear") else "new")
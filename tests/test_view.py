@@ -0,0 +1,70 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : test_view.py
+# Time       : 2025-04-28 11:20:54
+# Author     : lyx
+# version    : python 3.11
+# Description: 视图: 快速json响应与 response_model 输出一致(过滤未声明的字段、别名), 不一致时交给 fastapi
+"""
+from typing import Union
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field
+
+from faplus.schema import ErrorResponseSchema, ResponseSchema
+from faplus.view import GetView
+
+
+class UserOut(BaseModel):
+    id: int
+    name: str = Field(serialization_alias="userName")
+
+
+class UserResponse(ResponseSchema):
+    data: UserOut
+
+
+USER = {"id": 1, "name": "lyx", "password": "secret", "internal_id": 42}
+
+
+def make_view(fast: bool, result=USER):
+    class View(GetView):
+        response_model = UserResponse
+        fast_json_response = fast
+
+        @staticmethod
+        async def api(request: Request):
+            return result
+
+    return View
+
+
+def make_client(*views) -> TestClient:
+    app = FastAPI()
+    for idx, view in enumerate(views):
+        app.add_api_route(
+            f"/v{idx}",
+            endpoint=view.api,
+            methods=view.methods,
+            response_model=Union[view.response_model, ErrorResponseSchema],
+        )
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_fast_json_filters_undeclared_fields():
+    client = make_client(make_view(fast=True), make_view(fast=False))
+    fast, slow = client.get("/v0"), client.get("/v1")
+    assert fast.status_code == slow.status_code == 200
+    assert fast.json() == {"code": "0", "msg": None, "data": {"id": 1, "userName": "lyx"}}
+    assert b"secret" not in fast.content and b"internal_id" not in fast.content
+    assert fast.content == slow.content
+
+
+@pytest.mark.parametrize("result", [{"id": 1}, {"id": "x", "name": "lyx"}])
+def test_fast_json_mismatch_falls_back(result):
+    client = make_client(make_view(fast=True, result=result), make_view(fast=False, result=result))
+    fast, slow = client.get("/v0"), client.get("/v1")
+    assert fast.status_code == slow.status_code == 500